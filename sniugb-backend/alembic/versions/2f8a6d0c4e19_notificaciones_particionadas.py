@@ -0,0 +1,143 @@
+"""Particiona notificaciones por mes (RANGE sobre fecha_creacion)
+
+Revision ID: 2f8a6d0c4e19
+Revises: 9c5e1a3b7d42
+Create Date: 2026-10-17 16:24:05.731862
+
+La tabla existente se renombra, se crea la tabla particionada con el mismo
+nombre (PK (id, fecha_creacion), misma secuencia), una partición por mes desde
+la notificación más antigua hasta 3 meses adelante + una DEFAULT de respaldo, se
+copian las filas y se borra la tabla vieja. Los triggers de NOTIFY y del
+contador se recrean al final para que la copia no los dispare.
+
+Reescribe la tabla completa bajo ACCESS EXCLUSIVE: correr en ventana de
+mantenimiento. Las particiones futuras y la retención las maneja el job
+maintain_notification_partitions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8a6d0c4e19'
+down_revision: Union[str, None] = '9c5e1a3b7d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MESES_ADELANTE = 3
+
+TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER notificaciones_notify_ins AFTER INSERT ON notificaciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_notify_ins()
+    """,
+    """
+    CREATE TRIGGER notificaciones_notify_upd AFTER UPDATE ON notificaciones
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_notify_upd()
+    """,
+    """
+    CREATE TRIGGER notificaciones_notify_del AFTER DELETE ON notificaciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_notify_del()
+    """,
+    """
+    CREATE TRIGGER notificaciones_contador_ins AFTER INSERT ON notificaciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_contador_ins()
+    """,
+    """
+    CREATE TRIGGER notificaciones_contador_upd AFTER UPDATE ON notificaciones
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_contador_upd()
+    """,
+    """
+    CREATE TRIGGER notificaciones_contador_del AFTER DELETE ON notificaciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_contador_del()
+    """,
+]
+
+# Límites en UTC explícito: no dependen del TimeZone de la sesión que migra.
+PARTICIONES_SQL = f"""
+    DO $$
+    DECLARE
+        mes date := date_trunc('month', coalesce(
+            (SELECT min(fecha_creacion) FROM notificaciones_legacy), now()) AT TIME ZONE 'UTC')::date;
+        fin date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MESES_ADELANTE + 1} months')::date;
+    BEGIN
+        WHILE mes < fin LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF notificaciones FOR VALUES FROM (%L) TO (%L)',
+                'notificaciones_p' || to_char(mes, 'YYYYMM'),
+                to_char(mes, 'YYYY-MM-DD') || ' 00:00:00+00',
+                to_char(mes + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+            );
+            mes := (mes + interval '1 month')::date;
+        END LOOP;
+    END $$
+"""
+
+
+def _renombrar_a_legacy() -> None:
+    op.execute("LOCK TABLE notificaciones IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE notificaciones RENAME TO notificaciones_legacy")
+    # Los nombres de índice son globales al esquema (el de la PK incluido); los de FK no
+    op.execute("ALTER TABLE notificaciones_legacy RENAME CONSTRAINT notificaciones_pkey TO notificaciones_legacy_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_notificaciones_id RENAME TO ix_notificaciones_legacy_id")
+    op.execute(
+        "ALTER INDEX IF EXISTS ix_notificaciones_usuario_leida_fecha "
+        "RENAME TO ix_notificaciones_legacy_usuario_leida_fecha"
+    )
+    # La secuencia sobrevive al DROP de la tabla vieja
+    op.execute("ALTER SEQUENCE notificaciones_id_seq OWNED BY NONE")
+
+
+def _crear_indices_y_copiar(columnas_fecha: str) -> None:
+    op.execute("ALTER SEQUENCE notificaciones_id_seq OWNED BY notificaciones.id")
+    op.execute("CREATE INDEX ix_notificaciones_id ON notificaciones (id)")
+    op.execute(
+        "CREATE INDEX ix_notificaciones_usuario_leida_fecha ON notificaciones (usuario_dni, leida, fecha_creacion)"
+    )
+    op.execute(f"""
+        INSERT INTO notificaciones (id, usuario_dni, mensaje, leida, fecha_creacion, link)
+        SELECT id, usuario_dni, mensaje, leida, {columnas_fecha}, link FROM notificaciones_legacy
+    """)
+    op.execute("DROP TABLE notificaciones_legacy")
+    for sql in TRIGGERS_SQL:
+        op.execute(sql)
+
+
+def upgrade() -> None:
+    _renombrar_a_legacy()
+    op.execute("""
+        CREATE TABLE notificaciones (
+            id integer NOT NULL DEFAULT nextval('notificaciones_id_seq'::regclass),
+            usuario_dni varchar NOT NULL REFERENCES datos_del_usuario (numero_de_dni),
+            mensaje varchar NOT NULL,
+            leida boolean,
+            fecha_creacion timestamptz NOT NULL DEFAULT now(),
+            link varchar,
+            CONSTRAINT notificaciones_pkey PRIMARY KEY (id, fecha_creacion)
+        ) PARTITION BY RANGE (fecha_creacion)
+    """)
+    op.execute(PARTICIONES_SQL)
+    op.execute("CREATE TABLE notificaciones_default PARTITION OF notificaciones DEFAULT")
+    _crear_indices_y_copiar("coalesce(fecha_creacion, now())")
+
+
+def downgrade() -> None:
+    _renombrar_a_legacy()
+    op.execute("""
+        CREATE TABLE notificaciones (
+            id integer NOT NULL DEFAULT nextval('notificaciones_id_seq'::regclass),
+            usuario_dni varchar NOT NULL REFERENCES datos_del_usuario (numero_de_dni),
+            mensaje varchar NOT NULL,
+            leida boolean,
+            fecha_creacion timestamptz DEFAULT now(),
+            link varchar,
+            CONSTRAINT notificaciones_pkey PRIMARY KEY (id)
+        )
+    """)
+    _crear_indices_y_copiar("fecha_creacion")
@@ -0,0 +1,106 @@
+"""NOTIFY de cambios en notificaciones (stream SSE)
+
+Revision ID: 4b7d2e9c1f60
+Revises: e91b4c6f0a27
+Create Date: 2026-10-17 14:02:47.553190
+
+Triggers por sentencia (con tablas de transición) que publican en el canal
+`sniugb_notificaciones`: un mensaje por notificación insertada y uno por usuario
+en updates/deletes, así una acción masiva no genera miles de NOTIFY. NOTIFY es
+transaccional: solo se entrega si la transacción hace commit.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2e9c1f60'
+down_revision: Union[str, None] = 'e91b4c6f0a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UPGRADE_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION sniugb_notificaciones_notify_ins() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('sniugb_notificaciones', json_build_object(
+            'evento', 'nueva',
+            'usuario_dni', n.usuario_dni,
+            'id', n.id,
+            'mensaje', left(n.mensaje, 1000),
+            'link', n.link,
+            'leida', coalesce(n.leida, false),
+            'fecha_creacion', n.fecha_creacion
+        )::text)
+        FROM nuevas n;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION sniugb_notificaciones_notify_upd() RETURNS trigger AS $$
+    BEGIN
+        -- Solo cambios de `leida`; los ids viajan si son pocos (si no, el cliente recarga)
+        PERFORM pg_notify('sniugb_notificaciones', json_build_object(
+            'evento', 'actualizadas',
+            'usuario_dni', c.usuario_dni,
+            'ids', CASE WHEN count(*) <= 50 THEN array_agg(c.id) END
+        )::text)
+        FROM (
+            SELECT n.id, n.usuario_dni FROM nuevas n JOIN viejas v ON v.id = n.id
+            WHERE n.leida IS DISTINCT FROM v.leida
+        ) c
+        GROUP BY c.usuario_dni;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION sniugb_notificaciones_notify_del() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('sniugb_notificaciones', json_build_object(
+            'evento', 'eliminadas',
+            'usuario_dni', v.usuario_dni,
+            'ids', CASE WHEN count(*) <= 50 THEN array_agg(v.id) END
+        )::text)
+        FROM viejas v
+        GROUP BY v.usuario_dni;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER notificaciones_notify_ins AFTER INSERT ON notificaciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_notify_ins()
+    """,
+    """
+    CREATE TRIGGER notificaciones_notify_upd AFTER UPDATE ON notificaciones
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_notify_upd()
+    """,
+    """
+    CREATE TRIGGER notificaciones_notify_del AFTER DELETE ON notificaciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_notify_del()
+    """,
+]
+
+DOWNGRADE_SQL = [
+    "DROP TRIGGER IF EXISTS notificaciones_notify_del ON notificaciones",
+    "DROP TRIGGER IF EXISTS notificaciones_notify_upd ON notificaciones",
+    "DROP TRIGGER IF EXISTS notificaciones_notify_ins ON notificaciones",
+    "DROP FUNCTION IF EXISTS sniugb_notificaciones_notify_del()",
+    "DROP FUNCTION IF EXISTS sniugb_notificaciones_notify_upd()",
+    "DROP FUNCTION IF EXISTS sniugb_notificaciones_notify_ins()",
+]
+
+
+def upgrade() -> None:
+    for sql in UPGRADE_SQL:
+        op.execute(sql)
+
+
+def downgrade() -> None:
+    for sql in DOWNGRADE_SQL:
+        op.execute(sql)
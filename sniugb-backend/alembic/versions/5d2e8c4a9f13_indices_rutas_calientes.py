@@ -0,0 +1,46 @@
+"""Índices compuestos para las rutas calientes
+
+Revision ID: 5d2e8c4a9f13
+Revises: b6a00be08052
+Create Date: 2026-10-17 09:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8c4a9f13'
+down_revision: Union[str, None] = 'b6a00be08052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas). Se mantienen en sincronía con los Index() de database_models.
+INDICES = [
+    ('ix_predios_propietario_dni', 'predios', ['propietario_dni']),
+    ('ix_animales_predio_codigo_estado', 'animales', ['predio_codigo', 'estado']),
+    ('ix_eventos_produccion_animal_tipo_fecha', 'eventos_produccion', ['animal_cui', 'tipo_evento', 'fecha_evento']),
+    ('ix_notificaciones_usuario_leida_fecha', 'notificaciones', ['usuario_dni', 'leida', 'fecha_creacion']),
+    ('ix_transferencias_receptor_estado', 'transferencias', ['receptor_dni', 'estado']),
+    ('ix_eventos_calendario_usuario_tipo_fecha', 'eventos_calendario', ['usuario_dni', 'tipo', 'fecha_evento']),
+    ('ix_transferencia_animal_animal_cui', 'transferencia_animal_association', ['animal_cui']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción: el bloque
+    # autocommit la cierra. Así las tablas siguen aceptando escrituras mientras se construyen.
+    # if_not_exists permite reintentar si una ejecución previa quedó a medias
+    # (un índice CONCURRENTLY fallido queda INVALID: borrarlo antes de reintentar).
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(
+                nombre, tabla, columnas, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""Contadores compartidos del rate limiter (respaldo sin Redis)
+
+Revision ID: 7a41c0e2d5b8
+Revises: 5d2e8c4a9f13
+Create Date: 2026-10-17 11:05:12.447913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7a41c0e2d5b8'
+down_revision: Union[str, None] = '5d2e8c4a9f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limit_contadores',
+        sa.Column('clave', sa.String(), nullable=False),
+        sa.Column('ventana', sa.BigInteger(), nullable=False),
+        sa.Column('conteo', sa.Integer(), nullable=False),
+        sa.Column('expira', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('clave', 'ventana'),
+        prefixes=['UNLOGGED'],
+    )
+    op.create_index(op.f('ix_rate_limit_contadores_expira'), 'rate_limit_contadores', ['expira'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rate_limit_contadores_expira'), table_name='rate_limit_contadores')
+    op.drop_table('rate_limit_contadores')
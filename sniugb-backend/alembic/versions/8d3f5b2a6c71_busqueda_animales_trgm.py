@@ -0,0 +1,52 @@
+"""Índices de búsqueda de animales: trigramas sobre nombre y prefijo de CUI
+
+Revision ID: 8d3f5b2a6c71
+Revises: 2f8a6d0c4e19
+Create Date: 2026-10-17 18:02:11.504937
+
+- ix_animales_predio_nombre_trgm: GIN (predio_codigo, nombre gin_trgm_ops). Sirve
+  ILIKE '%q%' y los operadores de similitud de pg_trgm sin salir del predio
+  (btree_gin aporta la clase de operadores para predio_codigo).
+- ix_animales_predio_cui_prefijo: btree (predio_codigo, cui COLLATE "C"). Con
+  collation "C" el LIKE 'q%' se resuelve como rango del índice y el resultado ya
+  sale ordenado por CUI.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f5b2a6c71'
+down_revision: Union[str, None] = '2f8a6d0c4e19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Ambas extensiones vienen en postgresql-contrib (imagen oficial, RDS, Supabase...)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # Igual que en 5d2e8c4a9f13: CONCURRENTLY fuera de la transacción para no
+    # bloquear las altas de animales mientras se construyen.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_animales_predio_cui_prefijo', 'animales',
+            ['predio_codigo', sa.text('cui COLLATE "C"')], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_animales_predio_nombre_trgm', 'animales', ['predio_codigo', 'nombre'], unique=False,
+            postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    # Las extensiones se dejan instaladas: otros objetos podrían depender de ellas.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_animales_predio_nombre_trgm', table_name='animales',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_animales_predio_cui_prefijo', table_name='animales',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,119 @@
+"""Contador de notificaciones no leídas por usuario
+
+Revision ID: 9c5e1a3b7d42
+Revises: 4b7d2e9c1f60
+Create Date: 2026-10-17 15:11:36.207415
+
+Tabla notificaciones_contadores mantenida por triggers por sentencia: un upsert
+por usuario afectado (no por fila), así las acciones masivas cuestan una
+sentencia. Los triggers se crean antes del backfill, dentro de la misma
+transacción, para que ninguna escritura concurrente quede fuera del conteo.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9c5e1a3b7d42'
+down_revision: Union[str, None] = '4b7d2e9c1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# "No leída" = leida = false, igual que el filtro de los endpoints (NULL no cuenta).
+UPGRADE_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION sniugb_notificaciones_contador_ins() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO notificaciones_contadores AS c (usuario_dni, no_leidas)
+        SELECT n.usuario_dni, count(*) FROM nuevas n
+        WHERE n.leida = false
+        GROUP BY n.usuario_dni
+        ORDER BY n.usuario_dni
+        ON CONFLICT (usuario_dni) DO UPDATE SET no_leidas = c.no_leidas + EXCLUDED.no_leidas;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION sniugb_notificaciones_contador_upd() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO notificaciones_contadores AS c (usuario_dni, no_leidas)
+        SELECT d.usuario_dni, sum(d.delta) FROM (
+            SELECT n.usuario_dni, 1 AS delta FROM nuevas n WHERE n.leida = false
+            UNION ALL
+            SELECT v.usuario_dni, -1 FROM viejas v WHERE v.leida = false
+        ) d
+        GROUP BY d.usuario_dni
+        HAVING sum(d.delta) <> 0
+        ORDER BY d.usuario_dni
+        ON CONFLICT (usuario_dni) DO UPDATE SET no_leidas = c.no_leidas + EXCLUDED.no_leidas;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION sniugb_notificaciones_contador_del() RETURNS trigger AS $$
+    BEGIN
+        UPDATE notificaciones_contadores c SET no_leidas = c.no_leidas - d.n
+        FROM (
+            SELECT v.usuario_dni, count(*) AS n FROM viejas v
+            WHERE v.leida = false
+            GROUP BY v.usuario_dni
+        ) d
+        WHERE c.usuario_dni = d.usuario_dni;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER notificaciones_contador_ins AFTER INSERT ON notificaciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_contador_ins()
+    """,
+    """
+    CREATE TRIGGER notificaciones_contador_upd AFTER UPDATE ON notificaciones
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_contador_upd()
+    """,
+    """
+    CREATE TRIGGER notificaciones_contador_del AFTER DELETE ON notificaciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_notificaciones_contador_del()
+    """,
+    # Backfill con los triggers ya activos (CREATE TRIGGER bloquea escrituras hasta el commit)
+    """
+    INSERT INTO notificaciones_contadores (usuario_dni, no_leidas)
+    SELECT usuario_dni, count(*) FROM notificaciones
+    WHERE leida = false
+    GROUP BY usuario_dni
+    ON CONFLICT (usuario_dni) DO UPDATE SET no_leidas = EXCLUDED.no_leidas
+    """,
+]
+
+DOWNGRADE_SQL = [
+    "DROP TRIGGER IF EXISTS notificaciones_contador_del ON notificaciones",
+    "DROP TRIGGER IF EXISTS notificaciones_contador_upd ON notificaciones",
+    "DROP TRIGGER IF EXISTS notificaciones_contador_ins ON notificaciones",
+    "DROP FUNCTION IF EXISTS sniugb_notificaciones_contador_del()",
+    "DROP FUNCTION IF EXISTS sniugb_notificaciones_contador_upd()",
+    "DROP FUNCTION IF EXISTS sniugb_notificaciones_contador_ins()",
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notificaciones_contadores',
+        sa.Column('usuario_dni', sa.String(), nullable=False),
+        sa.Column('no_leidas', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['usuario_dni'], ['datos_del_usuario.numero_de_dni'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('usuario_dni'),
+    )
+    for sql in UPGRADE_SQL:
+        op.execute(sql)
+
+
+def downgrade() -> None:
+    for sql in DOWNGRADE_SQL:
+        op.execute(sql)
+    op.drop_table('notificaciones_contadores')
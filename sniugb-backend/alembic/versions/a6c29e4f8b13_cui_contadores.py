@@ -0,0 +1,47 @@
+"""Contadores de serial de CUI por (departamento, especie)
+
+Revision ID: a6c29e4f8b13
+Revises: 8d3f5b2a6c71
+Create Date: 2026-10-17 19:37:52.220614
+
+Reemplaza el MAX(SUBSTRING(cui ...)) sobre animales de cada alta por la tabla
+cui_contadores (ver animal_service.reservar_seriales_cui). Se siembra con el
+serial más alto ya usado en cada par; animales queda en modo SHARE mientras
+tanto (lecturas sí, altas no) para que ningún CUI se cuele entre el cálculo y
+el alta del contador. Desplegar sin instancias viejas registrando animales: el
+código anterior seguiría calculando el serial con MAX y podría repetir uno.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c29e4f8b13'
+down_revision: Union[str, None] = '8d3f5b2a6c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cui_contadores',
+        sa.Column('codigo_ubigeo', sa.String(length=2), nullable=False),
+        sa.Column('digito_especie', sa.String(length=1), nullable=False),
+        sa.Column('ultimo_serial', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('codigo_ubigeo', 'digito_especie'),
+    )
+    op.execute("LOCK TABLE animales IN SHARE MODE")
+    # CUI = especie (1) + ubigeo (2) + serie (7) + Luhn (1); se ignoran los que no tienen ese formato
+    op.execute("""
+        INSERT INTO cui_contadores (codigo_ubigeo, digito_especie, ultimo_serial)
+        SELECT SUBSTRING(cui FROM 2 FOR 2), SUBSTRING(cui FROM 1 FOR 1),
+               MAX(CAST(SUBSTRING(cui FROM 4 FOR 7) AS INTEGER))
+        FROM animales
+        WHERE cui ~ '^[0-9]{11}$'
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('cui_contadores')
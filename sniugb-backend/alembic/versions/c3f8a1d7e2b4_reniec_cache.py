@@ -0,0 +1,34 @@
+"""Caché persistente de consultas RENIEC
+
+Revision ID: c3f8a1d7e2b4
+Revises: 7a41c0e2d5b8
+Create Date: 2026-10-17 12:20:31.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a1d7e2b4'
+down_revision: Union[str, None] = '7a41c0e2d5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reniec_cache',
+        sa.Column('dni', sa.String(length=8), nullable=False),
+        sa.Column('nombre_completo', sa.String(), nullable=True),
+        sa.Column('consultado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expira', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('dni'),
+    )
+    op.create_index(op.f('ix_reniec_cache_expira'), 'reniec_cache', ['expira'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reniec_cache_expira'), table_name='reniec_cache')
+    op.drop_table('reniec_cache')
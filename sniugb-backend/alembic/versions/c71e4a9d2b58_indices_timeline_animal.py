@@ -0,0 +1,42 @@
+"""Índices de la línea de tiempo del animal (GET /animales/{cui}/timeline)
+
+Revision ID: c71e4a9d2b58
+Revises: a6c29e4f8b13
+Create Date: 2026-10-17 20:41:05.318274
+
+- ix_eventos_produccion_animal_fecha_id: btree (animal_cui, fecha_evento, id). La
+  rama de producción (la que crece a diario en lecheras) se lee con un Index Scan
+  Backward desde el cursor `(fecha_evento, id) < (...)` y se corta en el LIMIT.
+- ix_evento_sanitario_animales_animal_cui / ix_control_calidad_animales_animal_cui:
+  las PK de las tablas de asociación empiezan por el evento, no por el animal.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71e4a9d2b58'
+down_revision: Union[str, None] = 'a6c29e4f8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICES = [
+    ('ix_eventos_produccion_animal_fecha_id', 'eventos_produccion', ['animal_cui', 'fecha_evento', 'id']),
+    ('ix_evento_sanitario_animales_animal_cui', 'evento_sanitario_animales', ['animal_cui']),
+    ('ix_control_calidad_animales_animal_cui', 'control_calidad_animales', ['animal_cui']),
+]
+
+
+def upgrade() -> None:
+    # Igual que en 5d2e8c4a9f13: CONCURRENTLY fuera de la transacción para no
+    # bloquear el registro de eventos mientras se construyen.
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(nombre, tabla, columnas, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,59 @@
+"""NOTIFY de cambios en datos_del_usuario (invalidación de principal_cache)
+
+Revision ID: e4a8c2f61b37
+Revises: c71e4a9d2b58
+Create Date: 2026-10-18 10:14:22.907315
+
+Cada worker cachea el usuario autenticado (src/utils/principal_cache.py). Estos
+triggers publican en `sniugb_usuarios` el DNI de cada fila actualizada o borrada,
+venga de la API de cualquier worker, de un job o de SQL manual, y cada proceso
+descarta su copia al recibirlo. NOTIFY es transaccional: llega tras el commit, y
+los DNI repetidos en una misma transacción se entregan una sola vez.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a8c2f61b37'
+down_revision: Union[str, None] = 'c71e4a9d2b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UPGRADE_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION sniugb_usuarios_notify() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('sniugb_usuarios', v.numero_de_dni) FROM viejas v;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    # Una tabla de transición admite un solo evento por trigger: uno para UPDATE y otro para DELETE
+    """
+    CREATE TRIGGER usuarios_notify_upd AFTER UPDATE ON datos_del_usuario
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_usuarios_notify()
+    """,
+    """
+    CREATE TRIGGER usuarios_notify_del AFTER DELETE ON datos_del_usuario
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION sniugb_usuarios_notify()
+    """,
+]
+
+DOWNGRADE_SQL = [
+    "DROP TRIGGER IF EXISTS usuarios_notify_del ON datos_del_usuario",
+    "DROP TRIGGER IF EXISTS usuarios_notify_upd ON datos_del_usuario",
+    "DROP FUNCTION IF EXISTS sniugb_usuarios_notify()",
+]
+
+
+def upgrade() -> None:
+    for sql in UPGRADE_SQL:
+        op.execute(sql)
+
+
+def downgrade() -> None:
+    for sql in DOWNGRADE_SQL:
+        op.execute(sql)
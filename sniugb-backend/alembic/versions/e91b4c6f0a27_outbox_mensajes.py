@@ -0,0 +1,45 @@
+"""Outbox de mensajes (email / WhatsApp)
+
+Revision ID: e91b4c6f0a27
+Revises: c3f8a1d7e2b4
+Create Date: 2026-10-17 13:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91b4c6f0a27'
+down_revision: Union[str, None] = 'c3f8a1d7e2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox_mensajes',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('canal', sa.String(length=16), nullable=False),
+        sa.Column('tipo', sa.String(length=64), nullable=False),
+        sa.Column('destinatario', sa.String(), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('estado', sa.String(length=16), server_default='pendiente', nullable=False),
+        sa.Column('intentos', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('proximo_intento', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('ultimo_error', sa.Text(), nullable=True),
+        sa.Column('creado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('enviado_en', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_outbox_mensajes_pendientes', 'outbox_mensajes', ['proximo_intento'], unique=False,
+        postgresql_where=sa.text("estado IN ('pendiente', 'enviando')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_mensajes_pendientes', table_name='outbox_mensajes')
+    op.drop_table('outbox_mensajes')
@@ -0,0 +1,108 @@
+"""
+Datos propios del benchmark: dos ganaderos, sus predios y N animales.
+
+Todo lo que se crea lleva prefijos reconocibles (DNI 7700000x, predios BENCH-*,
+CUIs de especie 9 / departamento 99) para poder borrarlo sin tocar datos reales.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import cast, delete, insert, or_, select
+
+from src.api.animales import PG_TIPO_EVENTO_GRUPO
+from src.config.database import SessionLocal
+from src.models.database_models import (
+    Animal, EventoSanitario, EventoSanitarioAnimal, Notificacion, Predio, Raza,
+    RefreshToken, TipoEvento, Transferencia, TransferenciaAnimal, Usuario,
+)
+from src.services.animal_service import calcular_digito_luhn
+from src.utils.security import get_password_hash
+
+PASSWORD = "Bench-2024!"
+VENDEDOR_DNI = "77000001"
+COMPRADOR_DNI = "77000002"
+PREDIO_VENDEDOR = "BENCH-V"
+PREDIO_COMPRADOR = "BENCH-C"
+TIPO_ENFERMEDAD = "Bench enfermedad"
+RAZA = "BENCH"
+DNIS = (VENDEDOR_DNI, COMPRADOR_DNI)
+
+
+@dataclass
+class DatosBench:
+    cuis: list[str]
+    tipo_enfermedad_id: int
+
+
+def cui_bench(n: int) -> str:
+    """CUI válido (Luhn) en un rango que la app nunca asigna: especie 9, depto 99."""
+    base = f"999{n:07d}"
+    return base + calcular_digito_luhn(base)
+
+
+def limpiar_transferencias(db) -> None:
+    """Borra las transferencias (y sus notificaciones) de los usuarios del benchmark."""
+    ids = select(Transferencia.id).where(
+        or_(Transferencia.solicitante_dni.in_(DNIS), Transferencia.receptor_dni.in_(DNIS))
+    )
+    db.execute(delete(TransferenciaAnimal).where(TransferenciaAnimal.transferencia_id.in_(ids)))
+    db.execute(delete(Transferencia).where(Transferencia.id.in_(ids)))
+    db.execute(delete(Notificacion).where(Notificacion.usuario_dni.in_(DNIS)))
+    db.commit()
+
+
+def limpiar() -> None:
+    """Elimina todo lo creado por el benchmark (idempotente)."""
+    db = SessionLocal()
+    try:
+        limpiar_transferencias(db)
+        eventos = select(EventoSanitario.id).where(EventoSanitario.creador_dni.in_(DNIS))
+        db.execute(delete(EventoSanitarioAnimal).where(EventoSanitarioAnimal.evento_id.in_(eventos)))
+        db.execute(delete(EventoSanitario).where(EventoSanitario.creador_dni.in_(DNIS)))
+        db.execute(delete(Animal).where(Animal.predio_codigo.in_([PREDIO_VENDEDOR, PREDIO_COMPRADOR])))
+        db.execute(delete(Predio).where(Predio.propietario_dni.in_(DNIS)))
+        db.execute(delete(RefreshToken).where(RefreshToken.usuario_dni.in_(DNIS)))
+        db.execute(delete(Usuario).where(Usuario.numero_de_dni.in_(DNIS)))
+        db.execute(delete(TipoEvento).where(TipoEvento.nombre == TIPO_ENFERMEDAD))
+        db.execute(delete(Raza).where(Raza.nombre == RAZA))
+        db.commit()
+    finally:
+        db.close()
+
+
+def preparar(animales: int) -> DatosBench:
+    """Crea usuarios, predios y `animales` animales en el predio del vendedor."""
+    limpiar()
+    db = SessionLocal()
+    try:
+        hash_pw = get_password_hash(PASSWORD)
+        db.execute(insert(Usuario), [
+            {"numero_de_dni": dni, "nombre_completo": f"Bench {dni}", "email": f"{dni}@bench.local",
+             "telefono": f"+51{dni}0", "password": hash_pw, "estado": "activo"}
+            for dni in DNIS
+        ])
+        db.execute(insert(Predio), [
+            {"codigo_predio": PREDIO_VENDEDOR, "nombre_predio": "Bench vendedor", "departamento": "LIMA",
+             "ubicacion": "bench", "propietario_dni": VENDEDOR_DNI},
+            {"codigo_predio": PREDIO_COMPRADOR, "nombre_predio": "Bench comprador", "departamento": "LIMA",
+             "ubicacion": "bench", "propietario_dni": COMPRADOR_DNI},
+        ])
+        raza_id = db.execute(
+            insert(Raza).values(nombre=RAZA, digito_especie="9").returning(Raza.id)
+        ).scalar_one()
+        tipo_id = db.execute(
+            insert(TipoEvento)
+            .values(nombre=TIPO_ENFERMEDAD, grupo=cast("ENFERMEDAD", PG_TIPO_EVENTO_GRUPO), multi_animal=True)
+            .returning(TipoEvento.id)
+        ).scalar_one()
+
+        cuis = [cui_bench(i) for i in range(1, animales + 1)]
+        db.execute(insert(Animal), [
+            {"cui": cui, "nombre": f"Bench {i}", "raza_id": raza_id, "sexo": "HEMBRA",
+             "fecha_nacimiento": "2020-01-01", "peso": "400", "estado": "activo",
+             "predio_codigo": PREDIO_VENDEDOR}
+            for i, cui in enumerate(cuis, start=1)
+        ])
+        db.commit()
+        return DatosBench(cuis=cuis, tipo_enfermedad_id=tipo_id)
+    finally:
+        db.close()
@@ -0,0 +1,231 @@
+"""
+Benchmark de endpoints críticos contra la BD local (la de .env).
+
+Mide p50/p95/p99 y el número de consultas SQL (cabecera X-DB-Queries) de cada
+escenario llamando a la app en proceso (httpx + ASGITransport, sin red ni
+servidor) y compara contra `benchmarks/baselines.json`:
+
+    python -m benchmarks.run                     # falla (exit 1) si hay más consultas SQL
+    python -m benchmarks.run --update-baseline   # regraba la línea base
+    python -m benchmarks.run --solo login kpis   # solo algunos escenarios
+    python -m benchmarks.run --latencia          # la latencia también hace fallar
+
+Regresión = más consultas SQL que en la línea base. El conteo es determinista (no
+tiene tolerancia) y no depende de la máquina, así que es lo único que hace fallar
+por defecto. Las latencias sí dependen del equipo: p50 o p95 por encima de la línea
+base * (1 + tolerancia) se informa como aviso, y solo cuenta como regresión con
+--latencia (o BENCH_STRICT_LATENCY=true) en la misma máquina que grabó la base.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+from benchmarks import datos  # noqa: E402
+from src.config.database import SessionLocal  # noqa: E402
+from src.utils.limiter import limiter  # noqa: E402
+
+API = "/api/v1"
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+TOLERANCIA = float(os.getenv("BENCH_TOLERANCE", "0.25"))
+LATENCIA_ESTRICTA = os.getenv("BENCH_STRICT_LATENCY", "false").lower() == "true"
+
+
+@dataclass
+class Escenario:
+    nombre: str
+    peticion: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+    iteraciones: int
+    esperado: int = 200
+    despues: Callable[[], None] | None = None  # limpieza entre iteraciones (no se mide)
+
+
+@dataclass
+class Resultado:
+    nombre: str
+    latencias_ms: list[float] = field(default_factory=list)
+    consultas: list[int] = field(default_factory=list)
+
+    def percentil(self, p: float) -> float:
+        orden = sorted(self.latencias_ms)
+        k = max(0, min(len(orden) - 1, int(round(p / 100 * len(orden))) - 1))
+        return orden[k]
+
+    def resumen(self) -> dict:
+        return {
+            "n": len(self.latencias_ms),
+            "p50_ms": round(self.percentil(50), 2),
+            "p95_ms": round(self.percentil(95), 2),
+            "p99_ms": round(self.percentil(99), 2),
+            "consultas": max(self.consultas) if self.consultas else 0,
+        }
+
+
+def _limpiar_transferencias() -> None:
+    db = SessionLocal()
+    try:
+        datos.limpiar_transferencias(db)
+    finally:
+        db.close()
+
+
+async def _token(client: httpx.AsyncClient, dni: str) -> dict:
+    r = await client.post(f"{API}/auth/login", data={"username": dni, "password": datos.PASSWORD})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def escenarios(d: datos.DatosBench, vendedor: dict, comprador: dict, escala: float) -> list[Escenario]:
+    def n(base: int) -> int:
+        return max(3, int(base * escala))
+
+    return [
+        Escenario(
+            "login",
+            lambda c: c.post(f"{API}/auth/login", data={"username": datos.VENDEDOR_DNI, "password": datos.PASSWORD}),
+            n(20),
+        ),
+        Escenario(
+            "predio_animales",
+            lambda c: c.get(f"{API}/predios/{datos.PREDIO_VENDEDOR}/animales", headers=vendedor),
+            n(50),
+        ),
+        Escenario(
+            "dashboard_kpis",
+            lambda c: c.get(f"{API}/dashboard/{datos.PREDIO_VENDEDOR}/kpis", params={"periodo": "mes"}, headers=vendedor),
+            n(100),
+        ),
+        Escenario(
+            "eventos_sanitarios_1k",
+            lambda c: c.post(f"{API}/animales/eventos-sanitarios", headers=vendedor, json={
+                "fecha_evento_enfermedad": "2024-06-01T08:00:00Z",
+                "tipo_evento_enfermedad_id": d.tipo_enfermedad_id,
+                "observaciones": "benchmark",
+                "animales_cui": d.cuis[:1000],
+            }),
+            n(20),
+            esperado=201,
+        ),
+        Escenario(
+            "transferencia_solicitar",
+            lambda c: c.post(f"{API}/transferencias/solicitar", headers=comprador, json={
+                "animal_cuis": d.cuis[:5],
+                "predio_destino_codigo": datos.PREDIO_COMPRADOR,
+            }),
+            n(30),
+            esperado=201,
+            despues=_limpiar_transferencias,
+        ),
+        Escenario(
+            "reportes_generar",
+            lambda c: c.post(f"{API}/reportes/generar", headers=vendedor, json={
+                "tabla_principal": "animales",
+                "columnas": ["cui", "nombre", "sexo", "estado"],
+                "filtros": [{"columna": "nombre", "operador": "contiene", "valor": "Bench 1"}],
+            }),
+            n(30),
+        ),
+    ]
+
+
+async def correr(esc: Escenario, client: httpx.AsyncClient, calentamiento: int = 2) -> Resultado:
+    res = Resultado(esc.nombre)
+    for i in range(calentamiento + esc.iteraciones):
+        inicio = time.perf_counter()
+        r = await esc.peticion(client)
+        duracion = (time.perf_counter() - inicio) * 1000
+        if r.status_code != esc.esperado:
+            raise SystemExit(f"[{esc.nombre}] HTTP {r.status_code} (esperado {esc.esperado}): {r.text[:300]}")
+        if i >= calentamiento:
+            res.latencias_ms.append(duracion)
+            res.consultas.append(int(r.headers.get("X-DB-Queries", 0)))
+        if esc.despues:
+            esc.despues()
+    return res
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> tuple[list[str], list[str]]:
+    """(consultas de más, latencias por encima de la tolerancia)."""
+    consultas = []
+    if actual["consultas"] > base["consultas"]:
+        consultas.append(f"consultas {actual['consultas']} > {base['consultas']}")
+    latencias = []
+    for metrica in ("p50_ms", "p95_ms"):
+        limite = base[metrica] * (1 + tolerancia)
+        if actual[metrica] > limite:
+            latencias.append(f"{metrica} {actual[metrica]:.2f} > {limite:.2f} (base {base[metrica]:.2f})")
+    return consultas, latencias
+
+
+async def main_async(args) -> int:
+    limiter.enabled = False  # el benchmark no debe chocar con los límites de /auth
+    print(f"Preparando datos ({args.animales} animales) ...")
+    d = datos.preparar(args.animales)
+    resultados: dict[str, dict] = {}
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            vendedor = await _token(client, datos.VENDEDOR_DNI)
+            comprador = await _token(client, datos.COMPRADOR_DNI)
+            for esc in escenarios(d, vendedor, comprador, args.escala):
+                if args.solo and esc.nombre not in args.solo:
+                    continue
+                res = await correr(esc, client)
+                resultados[esc.nombre] = res.resumen()
+    finally:
+        datos.limpiar()
+
+    base = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    print(f"\n{'escenario':<26} {'n':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'SQL':>5}  estado")
+    fallos = 0
+    for nombre, r in resultados.items():
+        estado = "sin línea base"
+        if nombre in base and not args.update_baseline:
+            consultas, latencias = comparar(r, base[nombre], args.tolerancia)
+            problemas = consultas + latencias if args.latencia else consultas
+            avisos = [] if args.latencia else latencias
+            estado = "OK" if not problemas else "REGRESIÓN: " + "; ".join(problemas)
+            if avisos:
+                estado += " (más lento que la base: " + "; ".join(avisos) + ")"
+            fallos += bool(problemas)
+        print(f"{nombre:<26} {r['n']:>4} {r['p50_ms']:>7.2f}ms {r['p95_ms']:>7.2f}ms {r['p99_ms']:>7.2f}ms "
+              f"{r['consultas']:>5}  {estado}")
+
+    if args.update_baseline:
+        base.update(resultados)
+        BASELINE_PATH.write_text(json.dumps(base, indent=2, sort_keys=True) + "\n")
+        print(f"\nLínea base actualizada: {BASELINE_PATH.relative_to(ROOT)}")
+        return 0
+    if fallos:
+        detalle = f", latencia con tolerancia {args.tolerancia:.0%}" if args.latencia else ""
+        print(f"\n{fallos} escenario(s) con regresión (consultas SQL{detalle}).")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update-baseline", action="store_true", help="regraba benchmarks/baselines.json")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="margen de latencia (0.25 = 25%%)")
+    parser.add_argument("--latencia", action="store_true", default=LATENCIA_ESTRICTA,
+                        help="la latencia por encima de la tolerancia también es regresión")
+    parser.add_argument("--animales", type=int, default=1000, help="animales en el predio del vendedor (>= 1000)")
+    parser.add_argument("--escala", type=float, default=1.0, help="multiplica las iteraciones de cada escenario")
+    parser.add_argument("--solo", nargs="*", help="nombres de escenarios a correr")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
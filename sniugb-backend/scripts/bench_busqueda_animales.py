@@ -0,0 +1,165 @@
+"""
+Benchmark de la búsqueda de animales del chip de la UI (GET /animales?predio=&q=,
+revisión 8d3f5b2a6c71).
+
+Carga un predio con 50 000 animales (más otros predios de relleno) y mide, para
+varios textos típicos, la consulta ANTERIOR (cui/nombre ILIKE '%q%', sin los
+índices nuevos) y la ACTUAL (`consulta_busqueda`, con los índices de trigramas y
+de prefijo de CUI). Termina con exit 1 si algún p95 actual supera el objetivo
+(--objetivo-ms, 10 ms por defecto), así sirve también como chequeo en CI.
+
+Igual que bench_indices.py, todo ocurre dentro de UNA transacción que se descarta
+al final (ROLLBACK), pero DROP/CREATE INDEX bloquean `animales` mientras dura:
+usar solo contra una BD de desarrollo/staging. Requiere pg_trgm y btree_gin
+(`alembic upgrade head`).
+
+Uso:
+    python scripts/bench_busqueda_animales.py
+    python scripts/bench_busqueda_animales.py --animales 50000 --relleno 200000 --explain
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import or_, select, text  # noqa: E402
+
+from bench_indices import _indice, medir, nodo_principal  # noqa: E402
+from src.api.animales import BUSQUEDA_LIMITE, consulta_busqueda, consulta_busqueda_respaldo  # noqa: E402
+from src.config.database import engine  # noqa: E402
+from src.models.database_models import Animal  # noqa: E402
+
+INDICES = ["ix_animales_predio_cui_prefijo", "ix_animales_predio_nombre_trgm"]
+
+PREDIO = "BUS-1"
+DNI = "S0000001"
+NOMBRES = [
+    "Lola", "Manchita", "Pinta", "Negra", "Canela", "Estrella", "Paloma", "Rosita", "Chola", "Morena",
+    "Blanca", "Princesa", "Linda", "Flor", "Luna", "Perla", "Mariposa", "Gringa", "Colorada", "Bonita",
+    "Toro", "Campeón", "Sultán", "Pancho", "Zorro", "Bravo", "Chato", "Moro", "Tigre", "Rey",
+]
+
+# (etiqueta, texto escrito en el chip)
+BUSQUEDAS = [
+    ("sin texto", ""),
+    ("cui 3 dígitos", "115"),
+    ("cui 7 dígitos", "1150001"),
+    ("cui completo", "11500123450"),
+    ("cui inexistente", "999"),
+    ("nombre 2 letras", "lo"),
+    ("nombre", "lola"),
+    ("nombre con error", "lolla"),
+    ("parte del nombre", "ancha"),
+    ("nombre inexistente", "zzzz"),
+]
+# Segunda pasada de list_animales cuando ningún CUI empieza con los dígitos: se
+# informa aparte y sin objetivo (recorre el predio; no es el camino normal).
+BUSQUEDAS_RESPALDO = [
+    ("cui terminación", "2345"),
+]
+
+
+def cargar_dataset(conn, animales: int, relleno: int, seed: float) -> None:
+    """Predio objetivo con CUIs 115xxxxxxx0 y relleno repartido en 200 predios de otro departamento."""
+    conn.execute(text("SELECT setseed(:s)"), {"s": seed})
+    params = {"a": animales, "r": relleno, "dni": DNI, "predio": PREDIO, "nombres": NOMBRES}
+    nombre = """((:nombres)::text[])[1 + floor(random() * cardinality((:nombres)::text[]))::int]
+                || ' ' || (1 + floor(random() * 300))::int"""
+    sentencias = [
+        """INSERT INTO datos_del_usuario (numero_de_dni, nombre_completo, email, telefono, password, estado, rol)
+           VALUES (:dni, 'Bench búsqueda', 'bench-busqueda@bench.local', '+51980000001', 'x', 'activo', 'GANADERO')""",
+        """INSERT INTO predios (codigo_predio, nombre_predio, departamento, ubicacion, propietario_dni)
+           SELECT 'BUS-' || g, 'Predio ' || g, 'LIMA', 'bench', :dni FROM generate_series(1, 201) g""",
+        f"""INSERT INTO animales (cui, nombre, sexo, fecha_nacimiento, peso, estado, predio_codigo)
+            SELECT '115' || lpad(g::text, 7, '0') || '0', {nombre}, 'HEMBRA', now(), '400', 'activo', :predio
+            FROM generate_series(1, :a) g""",
+        f"""INSERT INTO animales (cui, nombre, sexo, fecha_nacimiento, peso, estado, predio_codigo)
+            SELECT '121' || lpad(g::text, 7, '0') || '0', {nombre}, 'HEMBRA', now(), '400', 'activo',
+                   'BUS-' || (2 + g % 200)
+            FROM generate_series(1, :r) g""",
+    ]
+    for sql in sentencias:
+        conn.execute(text(sql), params)
+
+
+def consulta_anterior(q: str):
+    """La consulta que emitía list_animales antes de la revisión 8d3f5b2a6c71."""
+    qs = select(Animal).where(Animal.predio_codigo == PREDIO)
+    if q:
+        like = f"%{q.strip()}%"
+        qs = qs.where(or_(Animal.cui.ilike(like), Animal.nombre.ilike(like)))
+    return qs.order_by(Animal.cui.asc()).limit(BUSQUEDA_LIMITE)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--animales", type=int, default=50_000, help="animales del predio medido")
+    parser.add_argument("--relleno", type=int, default=100_000, help="animales de otros predios")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--seed", type=float, default=0.42, help="semilla de setseed() (-1..1)")
+    parser.add_argument("--objetivo-ms", type=float, default=10.0, help="p95 máximo aceptado")
+    parser.add_argument("--explain", action="store_true", help="imprime los planes completos")
+    args = parser.parse_args()
+
+    resultados: dict[str, dict] = {}
+    respaldo: dict[str, dict] = {}
+    with engine.connect() as conn:
+        faltan = {"pg_trgm", "btree_gin"} - set(conn.execute(text(
+            "SELECT extname FROM pg_extension WHERE extname IN ('pg_trgm', 'btree_gin')")).scalars())
+        if faltan:
+            raise SystemExit(f"Faltan extensiones: {', '.join(sorted(faltan))} (correr `alembic upgrade head`).")
+        conn.rollback()  # cierra la transacción implícita de la verificación
+
+        trans = conn.begin()
+        try:
+            print(f"Cargando dataset: {args.animales} animales en {PREDIO} + {args.relleno} de relleno ...")
+            inicio = time.perf_counter()
+            cargar_dataset(conn, args.animales, args.relleno, args.seed)
+            print(f"  listo en {time.perf_counter() - inicio:.1f}s")
+
+            for fase in ("antes", "ahora"):
+                for nombre in INDICES:
+                    if fase == "antes":
+                        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {nombre}")
+                    else:
+                        _indice(nombre).create(conn)
+                conn.exec_driver_sql("ANALYZE animales")
+                for etiqueta, q in BUSQUEDAS:
+                    stmt = consulta_anterior(q) if fase == "antes" else consulta_busqueda(PREDIO, q)
+                    resultados.setdefault(etiqueta, {})[fase] = medir(conn, stmt, args.repeticiones)
+                for etiqueta, q in BUSQUEDAS_RESPALDO:
+                    stmt = consulta_anterior(q) if fase == "antes" else consulta_busqueda_respaldo(PREDIO, q)
+                    respaldo.setdefault(etiqueta, {})[fase] = medir(conn, stmt, args.repeticiones)
+        finally:
+            trans.rollback()
+
+    print()
+    print(f"{'búsqueda':<20} {'antes p50':>10} {'antes p95':>10} {'ahora p50':>10} {'ahora p95':>10} {'x':>6}")
+    lentas = []
+    for etiqueta, r in resultados.items():
+        (a50, a95, aplan), (n50, n95, nplan) = r["antes"], r["ahora"]
+        marca = "" if n95 <= args.objetivo_ms else "  <-- supera el objetivo"
+        if marca:
+            lentas.append(etiqueta)
+        print(f"{etiqueta:<20} {a50:>8.2f}ms {a95:>8.2f}ms {n50:>8.2f}ms {n95:>8.2f}ms {a50 / n50:>5.1f}x{marca}")
+        print(f"    antes: {nodo_principal(aplan)}")
+        print(f"    ahora: {nodo_principal(nplan)}")
+        if args.explain:
+            print("    --- plan actual ---\n    " + nplan.replace("\n", "\n    "))
+    for etiqueta, r in respaldo.items():
+        (a50, a95, _), (n50, n95, nplan) = r["antes"], r["ahora"]
+        print(f"{etiqueta:<20} {a50:>8.2f}ms {a95:>8.2f}ms {n50:>8.2f}ms {n95:>8.2f}ms {a50 / n50:>5.1f}x  (respaldo, sin objetivo)")
+        print(f"    ahora: {nodo_principal(nplan)}")
+    print("\nROLLBACK: el dataset sintético y los cambios de índices se descartaron.")
+
+    if lentas:
+        print(f"FALLA: p95 > {args.objetivo_ms:g} ms en: {', '.join(lentas)}")
+        sys.exit(1)
+    print(f"OK: todas las búsquedas con p95 <= {args.objetivo_ms:g} ms")
+
+
+if __name__ == "__main__":
+    main()
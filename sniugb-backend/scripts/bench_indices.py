@@ -0,0 +1,228 @@
+"""
+Benchmark de los índices de rutas calientes (revisión 5d2e8c4a9f13).
+
+Carga un dataset sintético, mide las consultas del dashboard (KPIs), el contador
+de notificaciones y las transferencias pendientes SIN los índices compuestos y
+luego CON ellos, e imprime latencia (p50/p95) y el nodo principal de cada plan.
+
+Todo ocurre dentro de UNA transacción que se descarta al final (ROLLBACK): la BD
+queda como estaba. Aun así, DROP/CREATE INDEX toman locks exclusivos sobre las
+tablas mientras dura el script: usar solo contra una BD de desarrollo/staging.
+
+Uso:
+    python scripts/bench_indices.py --usuarios 2000 --animales 200000 --seed 0.42
+    python scripts/bench_indices.py --explain        # imprime los planes completos
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import func, select, text  # noqa: E402
+
+from src.config.database import engine  # noqa: E402
+from src.models.database_models import (  # noqa: E402
+    Base, Animal, AnimalCondicionSalud, CalendarioEventoTipo, Evento, EventoProduccion,
+    Notificacion, ProduccionTipo, Transferencia, TransferenciaAnimal, TransferenciaEstado,
+)
+
+# Índices de la revisión 5d2e8c4a9f13 (las definiciones se toman de los modelos).
+INDICES = [
+    "ix_predios_propietario_dni",
+    "ix_animales_predio_codigo_estado",
+    "ix_eventos_produccion_animal_tipo_fecha",
+    "ix_notificaciones_usuario_leida_fecha",
+    "ix_transferencias_receptor_estado",
+    "ix_eventos_calendario_usuario_tipo_fecha",
+    "ix_transferencia_animal_animal_cui",
+]
+TABLAS = [
+    "datos_del_usuario", "predios", "animales", "eventos_produccion", "notificaciones",
+    "transferencias", "transferencia_animal_association", "eventos_calendario",
+]
+
+PREFIJO = "B"  # DNIs sintéticos: B0000001, B0000002, ...
+
+
+def _indice(nombre: str):
+    for tabla in Base.metadata.tables.values():
+        for indice in tabla.indexes:
+            if indice.name == nombre:
+                return indice
+    raise SystemExit(f"El índice {nombre} no está definido en los modelos.")
+
+
+def cargar_dataset(conn, usuarios: int, animales: int, seed: float) -> None:
+    """Genera el dataset con generate_series; setseed() lo hace reproducible."""
+    tipos_prod = [t.name for t in ProduccionTipo]
+    estados_tr = [e.name for e in TransferenciaEstado]
+    params = {
+        "u": usuarios, "a": animales, "p": PREFIJO,
+        "tipos_prod": tipos_prod, "estados_tr": estados_tr,
+    }
+    conn.execute(text("SELECT setseed(:s)"), {"s": seed})
+    sentencias = [
+        # Usuarios
+        """INSERT INTO datos_del_usuario (numero_de_dni, nombre_completo, email, telefono, password, estado, rol)
+           SELECT :p || lpad(g::text, 7, '0'), 'Bench ' || g, 'bench' || g || '@bench.local',
+                  '+5190' || lpad(g::text, 7, '0'), 'x', 'activo', 'GANADERO'
+           FROM generate_series(1, :u) g""",
+        # Dos predios por usuario
+        """INSERT INTO predios (codigo_predio, nombre_predio, departamento, ubicacion, propietario_dni)
+           SELECT 'BPR-' || g, 'Predio ' || g, 'LIMA', 'bench', :p || lpad((((g - 1) % :u) + 1)::text, 7, '0')
+           FROM generate_series(1, :u * 2) g""",
+        # Animales: ~90 % activos, ~10 % con alerta sanitaria
+        """INSERT INTO animales (cui, nombre, sexo, fecha_nacimiento, peso, condicion_salud, estado, predio_codigo)
+           SELECT 'B' || lpad(g::text, 10, '0'), 'A' || g, CASE WHEN random() < 0.5 THEN 'MACHO' ELSE 'HEMBRA' END,
+                  now() - (random() * 3000) * interval '1 day', '400',
+                  (CASE WHEN random() < 0.9 THEN 'SANO' WHEN random() < 0.5 THEN 'EN_OBSERVACION' ELSE 'ENFERMO' END)::animal_condicion_salud_enum,
+                  CASE WHEN random() < 0.9 THEN 'activo' ELSE 'inactivo' END,
+                  'BPR-' || (((g - 1) % (:u * 2)) + 1)
+           FROM generate_series(1, :a) g""",
+        # Tres eventos de producción por animal en el último año
+        """INSERT INTO eventos_produccion (animal_cui, fecha_evento, tipo_evento, valor_cantidad, unidad_medida)
+           SELECT 'B' || lpad((((g - 1) % :a) + 1)::text, 10, '0'), now() - (random() * 365) * interval '1 day',
+                  ((:tipos_prod)::text[])[1 + floor(random() * cardinality((:tipos_prod)::text[]))::int]::produccion_tipo_enum,
+                  round((random() * 30)::numeric, 1), 'kg'
+           FROM generate_series(1, :a * 3) g""",
+        # 100 notificaciones por usuario, ~80 % leídas
+        """INSERT INTO notificaciones (usuario_dni, mensaje, leida, fecha_creacion)
+           SELECT :p || lpad((((g - 1) % :u) + 1)::text, 7, '0'), 'bench', random() < 0.8,
+                  now() - (random() * 180) * interval '1 day'
+           FROM generate_series(1, :u * 100) g""",
+        # 5 transferencias por usuario con estados mezclados
+        """INSERT INTO transferencias (codigo_transferencia, codigo_confirmacion, solicitante_dni, receptor_dni,
+                                       predio_destino_codigo, estado, fecha_solicitud)
+           SELECT 'BTR-' || g, '000000', :p || lpad(((g % :u) + 1)::text, 7, '0'),
+                  :p || lpad((((g - 1) % :u) + 1)::text, 7, '0'), 'BPR-' || (((g - 1) % (:u * 2)) + 1),
+                  ((:estados_tr)::text[])[1 + floor(random() * cardinality((:estados_tr)::text[]))::int]::transferencia_estado_enum,
+                  now() - (random() * 30) * interval '1 day'
+           FROM generate_series(1, :u * 5) g""",
+        # Dos animales por transferencia
+        """INSERT INTO transferencia_animal_association (transferencia_id, animal_cui)
+           SELECT t.id, 'B' || lpad((((t.id * 2 + k) % :a) + 1)::text, 10, '0')
+           FROM transferencias t CROSS JOIN generate_series(0, 1) k
+           WHERE t.codigo_transferencia LIKE 'BTR-%'""",
+        # 50 eventos de calendario por usuario
+        """INSERT INTO eventos_calendario (usuario_dni, fecha_evento, titulo, tipo, es_completado)
+           SELECT :p || lpad((((g - 1) % :u) + 1)::text, 7, '0'),
+                  date_trunc('day', now()) + (floor(random() * 120) - 60) * interval '1 day', 'bench',
+                  (CASE WHEN random() < 0.7 THEN 'RECORDATORIO' ELSE 'EVENTO' END)::calendario_evento_tipo_enum,
+                  random() < 0.5
+           FROM generate_series(1, :u * 50) g""",
+    ]
+    for sql in sentencias:
+        conn.execute(text(sql), params)
+
+
+def consultas(dni: str, predio: str, cuis: list[str]) -> dict:
+    """Las mismas sentencias que emiten los endpoints medidos."""
+    hoy = date.today()
+    inicio_hoy = datetime.combine(hoy, datetime.min.time(), tzinfo=timezone.utc)
+    mes = (inicio_hoy - timedelta(days=30), inicio_hoy + timedelta(days=1))
+    return {
+        "kpi hato activo": select(func.count()).select_from(Animal).where(
+            Animal.predio_codigo == predio, Animal.estado == "activo"),
+        "kpi alertas": select(func.count()).select_from(Animal).where(
+            Animal.predio_codigo == predio,
+            Animal.condicion_salud.in_([AnimalCondicionSalud.ENFERMO, AnimalCondicionSalud.EN_OBSERVACION])),
+        "kpi tareas hoy": select(func.count()).select_from(Evento).where(
+            Evento.usuario_dni == dni, Evento.tipo == CalendarioEventoTipo.RECORDATORIO,
+            Evento.es_completado == False,  # noqa: E712
+            Evento.fecha_evento >= inicio_hoy, Evento.fecha_evento < inicio_hoy + timedelta(days=1)),
+        "kpi producción carne": select(func.sum(EventoProduccion.valor_cantidad)).join(Animal).where(
+            Animal.predio_codigo == predio, EventoProduccion.fecha_evento.between(*mes),
+            EventoProduccion.tipo_evento == ProduccionTipo.CARNE,
+            EventoProduccion.unidad_medida.in_(["kg", "Kg", "KG"])),
+        "kpi transf. pendientes": select(func.count()).select_from(Transferencia).where(
+            Transferencia.receptor_dni == dni, Transferencia.estado == TransferenciaEstado.PENDIENTE),
+        "contador no leídas": select(func.count()).select_from(Notificacion).where(
+            Notificacion.usuario_dni == dni, Notificacion.leida == False),  # noqa: E712
+        "animales ya solicitados": select(Animal.cui).join(
+            TransferenciaAnimal, Animal.cui == TransferenciaAnimal.animal_cui).join(
+            Transferencia, TransferenciaAnimal.transferencia_id == Transferencia.id).where(
+            Transferencia.estado == TransferenciaEstado.PENDIENTE, Animal.cui.in_(cuis)),
+    }
+
+
+def medir(conn, stmt, repeticiones: int) -> tuple[float, float, str]:
+    """Devuelve (p50 ms, p95 ms, plan) de `stmt`."""
+    tiempos = []
+    conn.execute(stmt).all()  # calentamiento
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        conn.execute(stmt).all()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    plan = "\n".join(f[0] for f in conn.exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + sql).all())
+    p95 = tiempos[min(len(tiempos) - 1, int(round(len(tiempos) * 0.95)) - 1)]
+    return statistics.median(tiempos), p95, plan
+
+
+def nodo_principal(plan: str) -> str:
+    """Primer nodo de acceso a tabla/índice del plan (Seq Scan / Index Scan ...)."""
+    for linea in plan.splitlines():
+        linea = linea.strip().removeprefix("->").strip()
+        if "Scan" in linea:
+            return linea.split("  (")[0]
+    return plan.splitlines()[0].split("  (")[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--animales", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--seed", type=float, default=0.42, help="semilla de setseed() (-1..1)")
+    parser.add_argument("--explain", action="store_true", help="imprime los planes completos")
+    args = parser.parse_args()
+
+    resultados: dict[str, dict] = {}
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            print(f"Cargando dataset: {args.usuarios} usuarios, {args.animales} animales ...")
+            inicio = time.perf_counter()
+            cargar_dataset(conn, args.usuarios, args.animales, args.seed)
+            print(f"  listo en {time.perf_counter() - inicio:.1f}s")
+
+            dni = PREFIJO + "0000001"
+            predio = "BPR-1"
+            cuis = [c for c, in conn.execute(
+                select(Animal.cui).where(Animal.predio_codigo == predio).limit(20))]
+            stmts = consultas(dni, predio, cuis)
+
+            for fase in ("sin", "con"):
+                for nombre in INDICES:
+                    if fase == "sin":
+                        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {nombre}")
+                    else:
+                        _indice(nombre).create(conn)
+                for tabla in TABLAS:
+                    conn.exec_driver_sql(f"ANALYZE {tabla}")
+                for etiqueta, stmt in stmts.items():
+                    resultados.setdefault(etiqueta, {})[fase] = medir(conn, stmt, args.repeticiones)
+        finally:
+            trans.rollback()
+
+    print()
+    print(f"{'consulta':<26} {'sin p50':>9} {'sin p95':>9} {'con p50':>9} {'con p95':>9} {'x':>6}")
+    for etiqueta, r in resultados.items():
+        (s50, s95, splan), (c50, c95, cplan) = r["sin"], r["con"]
+        print(f"{etiqueta:<26} {s50:>8.2f}ms {s95:>8.2f}ms {c50:>8.2f}ms {c95:>8.2f}ms {s50 / c50:>5.1f}x")
+        print(f"    sin: {nodo_principal(splan)}")
+        print(f"    con: {nodo_principal(cplan)}")
+        if args.explain:
+            print("    --- plan sin índices ---\n    " + splan.replace("\n", "\n    "))
+            print("    --- plan con índices ---\n    " + cplan.replace("\n", "\n    "))
+    print("\nROLLBACK: el dataset sintético y los cambios de índices se descartaron.")
+
+
+if __name__ == "__main__":
+    main()
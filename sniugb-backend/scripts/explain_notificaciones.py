@@ -0,0 +1,89 @@
+"""
+Verifica la poda de particiones de la bandeja de notificaciones (revisión 2f8a6d0c4e19).
+
+Hace EXPLAIN de las consultas de GET /notificaciones (primera consulta, acotada
+a la ventana reciente) y de GET /notificaciones/contador-no-leidas para un DNI,
+y lista las particiones de `notificaciones` que aparece en cada plan.
+
+Sale con código 1 si la consulta de la ventana toca una partición anterior a la
+ventana, o si el contador toca la tabla de notificaciones.
+
+Uso:
+    python scripts/explain_notificaciones.py --dni 12345678
+    python scripts/explain_notificaciones.py --dni 12345678 --solo-no-leidas --plan
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import select  # noqa: E402
+
+from src.api.notificaciones import LIST_WINDOW_DAYS, consulta_listado  # noqa: E402
+from src.config.database import engine  # noqa: E402
+from src.models.database_models import NotificacionContador  # noqa: E402
+
+PARTICION = re.compile(r"^notificaciones_(p(\d{4})(\d{2})|default)$")
+
+
+def _relaciones(nodo: dict) -> list[str]:
+    encontradas = [nodo["Relation Name"]] if "Relation Name" in nodo else []
+    for hijo in nodo.get("Plans", []):
+        encontradas += _relaciones(hijo)
+    return encontradas
+
+
+def explicar(conn, consulta, mostrar_plan: bool) -> list[str]:
+    compilada = consulta.compile(dialect=engine.dialect)
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compilada}", compilada.params).scalar()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    if mostrar_plan:
+        texto = conn.exec_driver_sql(f"EXPLAIN {compilada}", compilada.params).scalars().all()
+        print("\n".join(f"    {linea}" for linea in texto))
+    return _relaciones(plan[0]["Plan"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dni", required=True)
+    parser.add_argument("--solo-no-leidas", action="store_true")
+    parser.add_argument("--plan", action="store_true", help="imprime los planes completos")
+    args = parser.parse_args()
+
+    desde = datetime.now(timezone.utc) - timedelta(days=LIST_WINDOW_DAYS)
+    mes_ventana = date(desde.year, desde.month, 1)
+    errores = []
+    with engine.connect() as conn:
+        print(f"Listado (ventana de {LIST_WINDOW_DAYS} días, desde {desde:%Y-%m-%d}):")
+        relaciones = explicar(
+            conn, consulta_listado(args.dni, args.solo_no_leidas, desde=desde).limit(20), args.plan
+        )
+        for nombre in relaciones:
+            m = PARTICION.match(nombre)
+            if not m:
+                continue
+            vieja = m.group(2) is not None and date(int(m.group(2)), int(m.group(3)), 1) < mes_ventana
+            print(f"  - {nombre}{'  <-- anterior a la ventana' if vieja else ''}")
+            if vieja:
+                errores.append(nombre)
+
+        print("Contador de no leídas:")
+        relaciones = explicar(conn, select(NotificacionContador.no_leidas).where(
+            NotificacionContador.usuario_dni == args.dni
+        ), args.plan)
+        print("".join(f"  - {nombre}\n" for nombre in relaciones), end="")
+        if any(PARTICION.match(nombre) or nombre == "notificaciones" for nombre in relaciones):
+            errores.append("contador")
+
+    if errores:
+        raise SystemExit(f"FALLO: consultas fuera de las particiones recientes: {errores}")
+    print("OK: solo se tocan particiones recientes.")
+
+
+if __name__ == "__main__":
+    main()
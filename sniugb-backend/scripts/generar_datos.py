@@ -0,0 +1,326 @@
+"""
+Generador de datos sintéticos a escala nacional, cargados con COPY (psycopg 3).
+
+Produce ganaderos, predios repartidos en los 25 departamentos (con más peso en
+las regiones ganaderas), animales con CUI válido (Luhn, mismo formato que
+`generar_nuevo_cui`), eventos de producción, eventos sanitarios, transferencias
+y notificaciones. Con la misma semilla y escala se obtienen exactamente los
+mismos datos, así que las pruebas de capacidad y los benchmarks son repetibles.
+
+Tamaño aproximado por unidad de escala (--escala 1):
+    1.000 ganaderos · ~2.700 predios · ~120.000 animales · ~2,4 M eventos de producción
+    ~25.000 eventos sanitarios · ~600 transferencias · ~50.000 notificaciones
+(--escala 10 ≈ 1,2 M animales y 24 M eventos de producción.)
+
+Requisitos: tablas creadas y maestras pobladas (`python seed.py`). Todo se carga en
+una sola transacción: si algo falla no queda nada a medias. Usar una BD dedicada;
+los DNIs generados empiezan en --dni-inicio y el script aborta si ya existen.
+
+Uso:
+    python scripts/generar_datos.py --escala 1 --semilla 42
+    python scripts/generar_datos.py --escala 10 --semilla 7 --hasta 2025-06-30
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config.database import engine  # noqa: E402
+from src.models.database_models import (  # noqa: E402
+    AnimalCondicionSalud, ProduccionTipo, TransferenciaEstado, UserRole,
+)
+from src.services.animal_service import calcular_digito_luhn  # noqa: E402
+from src.utils.security import get_password_hash  # noqa: E402
+
+PASSWORD = "Ganadero123!"
+
+# Peso relativo de cada departamento en la población bovina (aprox.). El resto vale 1.
+PESO_DEPARTAMENTO = {
+    "PUNO": 9, "CAJAMARCA": 8, "CUSCO": 6, "AYACUCHO": 4, "JUNIN": 4, "AMAZONAS": 4,
+    "APURIMAC": 4, "HUANCAVELICA": 3, "ANCASH": 3, "PIURA": 3, "SAN MARTIN": 3,
+    "AREQUIPA": 3, "LA LIBERTAD": 3, "HUANUCO": 3, "LIMA": 2,
+}
+NOMBRES = ["Rosa", "Luna", "Pinta", "Canela", "Estrella", "Negra", "Blanca", "Manchada",
+           "Toro", "Bravo", "Moro", "Chola", "Paloma", "Perla", "Reina", "Duque"]
+APELLIDOS = ["Quispe", "Mamani", "Huamán", "Flores", "Rojas", "Condori", "Chávez", "Torres",
+             "Vargas", "Ramos", "Castillo", "Mendoza", "Pérez", "Sánchez", "Gutiérrez"]
+
+
+class Generador:
+    def __init__(self, conn, escala: float, semilla: int, hasta: date, dni_inicio: int):
+        self.conn = conn  # conexión psycopg nativa (para COPY)
+        self.rng = random.Random(semilla)
+        self.escala = escala
+        self.hasta = datetime.combine(hasta, datetime.min.time(), tzinfo=timezone.utc)
+        self.dni_inicio = dni_inicio
+
+        self.ganaderos: list[str] = []
+        self.predios: list[tuple[str, str, str]] = []      # (codigo, dni, departamento)
+        self.animales_por_predio: dict[str, list[str]] = {}
+        self.cantidades: dict[str, int] = {}
+
+    # ---------- utilidades ----------
+    def _copy(self, tabla: str, columnas: list[str], filas) -> int:
+        n = 0
+        inicio = time.perf_counter()
+        with self.conn.cursor() as cur:
+            with cur.copy(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN") as copy:
+                for fila in filas:
+                    copy.write_row(fila)
+                    n += 1
+        self.cantidades[tabla] = self.cantidades.get(tabla, 0) + n
+        print(f"  {tabla:<34} {n:>12,} filas  {time.perf_counter() - inicio:7.1f}s")
+        return n
+
+    def _fecha(self, dias_max: int) -> datetime:
+        return self.hasta - timedelta(seconds=self.rng.randint(0, dias_max * 86400))
+
+    def _scalar(self, sql: str, params=None):
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchone()[0]
+
+    def _filas(self, sql: str, params=None) -> list[tuple]:
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+    def _siguiente_id(self, tabla: str, cantidad: int) -> int:
+        """Reserva `cantidad` ids de la secuencia serial de `tabla` y devuelve el primero."""
+        seq = self._scalar("SELECT pg_get_serial_sequence(%s, 'id')", (tabla,))
+        maximo = self._scalar(f"SELECT COALESCE(MAX(id), 0) FROM {tabla}")
+        self._scalar("SELECT setval(%s, %s)", (seq, maximo + cantidad + 1))
+        return maximo + 1
+
+    # ---------- maestras ----------
+    def cargar_maestras(self) -> None:
+        self.departamentos = self._filas("SELECT nombre, codigo_ubigeo FROM departamentos ORDER BY codigo_ubigeo")
+        self.razas = self._filas("SELECT id, digito_especie FROM razas WHERE digito_especie ~ '^[0-9]$' ORDER BY id")
+        if not self.departamentos or not self.razas:
+            raise SystemExit("Faltan departamentos o razas: ejecutar `python seed.py` primero.")
+        self.peso_depto = [PESO_DEPARTAMENTO.get(nombre, 1) for nombre, _ in self.departamentos]
+
+        # Continuar la serie de CUIs de cui_contadores por (especie, departamento); las filas
+        # quedan bloqueadas hasta el commit para que la app no asigne los mismos seriales
+        self.serial = {
+            (esp, dep): ultimo for esp, dep, ultimo in self._filas(
+                "SELECT digito_especie, codigo_ubigeo, ultimo_serial FROM cui_contadores FOR UPDATE"
+            )
+        }
+
+        self.tipos_enfermedad = self._tipos("ENFERMEDAD", ["Mastitis", "Fiebre aftosa", "Neumonía"])
+        self.tipos_tratamiento = self._tipos("TRATAMIENTO", ["Antibiótico", "Antiparasitario"])
+
+    def _tipos(self, grupo: str, por_defecto: list[str]) -> list[int]:
+        ids = [i for i, in self._filas(
+            "SELECT id FROM tipo_evento WHERE grupo::text = %s ORDER BY id", (grupo,))]
+        if ids:
+            return ids
+        return [self._scalar(
+            "INSERT INTO tipo_evento (nombre, grupo, multi_animal) "
+            "VALUES (%s, CAST(%s AS tipo_evento_grupo_enum), true) RETURNING id", (nombre, grupo)
+        ) for nombre in por_defecto]
+
+    def _nuevo_cui(self, especie: str, depto: str) -> str:
+        serial = self.serial.get((especie, depto), 0) + 1
+        if serial > 9_999_999:
+            raise SystemExit(f"Serie de CUI agotada para especie {especie} / departamento {depto}.")
+        self.serial[(especie, depto)] = serial
+        base = f"{especie}{depto}{serial:07d}"
+        return base + calcular_digito_luhn(base)
+
+    # ---------- tablas ----------
+    def usuarios(self) -> None:
+        n = max(1, int(1000 * self.escala))
+        fin = self.dni_inicio + n - 1
+        if self._scalar(
+            "SELECT count(*) FROM datos_del_usuario WHERE numero_de_dni BETWEEN %s AND %s",
+            (str(self.dni_inicio), str(fin)),
+        ):
+            raise SystemExit(f"Ya hay usuarios en el rango de DNIs {self.dni_inicio}-{fin}: usar otra BD o --dni-inicio.")
+        hash_pw = get_password_hash(PASSWORD)
+        self.ganaderos = [str(self.dni_inicio + i) for i in range(n)]
+
+        def filas():
+            for dni in self.ganaderos:
+                nombre = f"{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}"
+                yield (dni, nombre, f"{dni}@ganadero.test", f"+519{dni}", hash_pw, "activo",
+                       UserRole.GANADERO.name, self._fecha(1500))
+        self._copy("datos_del_usuario",
+                   ["numero_de_dni", "nombre_completo", "email", "telefono", "password", "estado", "rol",
+                    "fecha_de_registro"], filas())
+
+    def predios_(self) -> None:
+        def filas():
+            k = 0
+            for dni in self.ganaderos:
+                # Un departamento "base" por ganadero; la mayoría tiene todo ahí
+                depto = self.rng.choices(self.departamentos, weights=self.peso_depto)[0][0]
+                for j in range(1, self.rng.choice([1, 1, 2, 2, 3, 3, 4, 6]) + 1):
+                    k += 1
+                    codigo = f"PRD-{dni}-{j}"
+                    self.predios.append((codigo, dni, depto))
+                    yield (codigo, f"Fundo {self.rng.choice(APELLIDOS)} {k}", depto, f"Sector {k % 97}", dni)
+        self._copy("predios", ["codigo_predio", "nombre_predio", "departamento", "ubicacion", "propietario_dni"],
+                   filas())
+
+    def animales(self) -> None:
+        ubigeo = dict(self.departamentos)
+        salud = [c.name for c in AnimalCondicionSalud]
+
+        def filas():
+            for codigo, _, depto in self.predios:
+                cuis = []
+                for _ in range(max(1, int(self.rng.lognormvariate(3.4, 0.9)))):
+                    raza_id, especie = self.rng.choice(self.razas)
+                    cui = self._nuevo_cui(especie, ubigeo[depto])
+                    cuis.append(cui)
+                    yield (cui, f"{self.rng.choice(NOMBRES)} {len(cuis)}", raza_id,
+                           "HEMBRA" if self.rng.random() < 0.7 else "MACHO",
+                           self._fecha(4000), str(self.rng.randint(180, 750)),
+                           self.rng.choices(salud, weights=[90, 6, 4])[0],
+                           "activo" if self.rng.random() < 0.93 else "inactivo", codigo)
+                self.animales_por_predio[codigo] = cuis
+        self._copy("animales", ["cui", "nombre", "raza_id", "sexo", "fecha_nacimiento", "peso",
+                                "condicion_salud", "estado", "predio_codigo"], filas())
+        with self.conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO cui_contadores (codigo_ubigeo, digito_especie, ultimo_serial) VALUES (%s, %s, %s) "
+                "ON CONFLICT (codigo_ubigeo, digito_especie) DO UPDATE SET ultimo_serial = EXCLUDED.ultimo_serial",
+                [(dep, esp, ultimo) for (esp, dep), ultimo in self.serial.items()],
+            )
+
+    def eventos_produccion(self) -> None:
+        tipos = [(ProduccionTipo.LECHE.name, "L", 4, 30), (ProduccionTipo.PESAJE.name, "kg", 150, 750),
+                 (ProduccionTipo.CARNE.name, "kg", 100, 400)]
+
+        def filas():
+            for cuis in self.animales_por_predio.values():
+                for cui in cuis:
+                    for _ in range(self.rng.randint(0, 40)):
+                        tipo, unidad, minimo, maximo = self.rng.choices(tipos, weights=[80, 18, 2])[0]
+                        yield (cui, self._fecha(730), tipo, round(self.rng.uniform(minimo, maximo), 1), unidad)
+        self._copy("eventos_produccion",
+                   ["animal_cui", "fecha_evento", "tipo_evento", "valor_cantidad", "unidad_medida"], filas())
+
+    def eventos_sanitarios(self) -> None:
+        # Se planifican primero para reservar ids y enlazar la tabla de asociación
+        plan = []
+        for codigo, dni, _ in self.predios:
+            cuis = self.animales_por_predio[codigo]
+            for _ in range(self.rng.randint(0, max(1, len(cuis) // 10))):
+                afectados = self.rng.sample(cuis, self.rng.randint(1, min(20, len(cuis))))
+                plan.append((dni, afectados))
+        primer_id = self._siguiente_id("eventos_sanitarios", len(plan))
+
+        def eventos():
+            for i, (dni, _) in enumerate(plan):
+                fecha = self._fecha(730)
+                tratado = self.rng.random() < 0.6
+                yield (primer_id + i, fecha, self.rng.choice(self.tipos_enfermedad),
+                       fecha + timedelta(days=self.rng.randint(0, 5)) if tratado else None,
+                       self.rng.choice(self.tipos_tratamiento) if tratado else None,
+                       "Oxitetraciclina" if tratado else None,
+                       round(self.rng.uniform(5, 50), 1) if tratado else None,
+                       "ml" if tratado else None, dni, fecha)
+        self._copy("eventos_sanitarios",
+                   ["id", "fecha_evento_enfermedad", "tipo_evento_enfermedad_id", "fecha_evento_tratamiento",
+                    "tipo_evento_tratamiento_id", "nombre_tratamiento", "dosis", "unidad_medida_dosis",
+                    "creador_dni", "fecha_creacion"], eventos())
+        self._copy("evento_sanitario_animales", ["evento_id", "animal_cui"],
+                   ((primer_id + i, cui) for i, (_, cuis) in enumerate(plan) for cui in cuis))
+
+    def transferencias(self) -> None:
+        predios_por_dni: dict[str, list[str]] = {}
+        for codigo, dni, _ in self.predios:
+            predios_por_dni.setdefault(dni, []).append(codigo)
+        estados = [e.name for e in TransferenciaEstado]
+
+        plan = []
+        for solicitante in self.ganaderos:
+            if self.rng.random() >= 0.25:
+                continue
+            for _ in range(self.rng.randint(1, 3)):
+                origen, receptor, _ = self.rng.choice(self.predios)
+                if receptor == solicitante or not self.animales_por_predio[origen]:
+                    continue
+                cuis = self.animales_por_predio[origen]
+                animales = self.rng.sample(cuis, self.rng.randint(1, min(5, len(cuis))))
+                plan.append((solicitante, receptor, self.rng.choice(predios_por_dni[solicitante]), animales))
+        primer_id = self._siguiente_id("transferencias", len(plan))
+
+        def filas():
+            for i, (solicitante, receptor, destino, _) in enumerate(plan):
+                fecha = self._fecha(365)
+                estado = self.rng.choices(estados, weights=[10, 70, 10, 10])[0]
+                yield (primer_id + i, f"TRANS-G{primer_id + i:08d}", f"{self.rng.randint(0, 999999):06d}",
+                       solicitante, receptor, destino, estado, fecha,
+                       None if estado == TransferenciaEstado.PENDIENTE.name else fecha + timedelta(days=1))
+        self._copy("transferencias",
+                   ["id", "codigo_transferencia", "codigo_confirmacion", "solicitante_dni", "receptor_dni",
+                    "predio_destino_codigo", "estado", "fecha_solicitud", "fecha_actualizacion"], filas())
+        self._copy("transferencia_animal_association", ["transferencia_id", "animal_cui"],
+                   ((primer_id + i, cui) for i, (*_, cuis) in enumerate(plan) for cui in cuis))
+
+    def notificaciones(self) -> None:
+        mensajes = ["Has recibido una solicitud de transferencia.", "Tu transferencia fue aprobada.",
+                    "Recordatorio: vacunación pendiente.", "Stock bajo en inventario."]
+
+        def filas():
+            for dni in self.ganaderos:
+                for _ in range(self.rng.randint(10, 90)):
+                    fecha = self._fecha(365)
+                    # Las antiguas casi siempre están leídas
+                    leida = self.rng.random() < (0.95 if (self.hasta - fecha).days > 30 else 0.4)
+                    yield (dni, self.rng.choice(mensajes), leida, fecha, None)
+        self._copy("notificaciones", ["usuario_dni", "mensaje", "leida", "fecha_creacion", "link"], filas())
+
+    def generar(self) -> None:
+        self.cargar_maestras()
+        self.usuarios()
+        self.predios_()
+        self.animales()
+        self.eventos_produccion()
+        self.eventos_sanitarios()
+        self.transferencias()
+        self.notificaciones()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", type=float, default=1.0, help="factor de escala (1 = ~120k animales)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--hasta", type=date.fromisoformat, default=date(2025, 6, 30),
+                        help="fecha de referencia: los datos cubren los años previos (determinista)")
+    parser.add_argument("--dni-inicio", type=int, default=60_000_000)
+    args = parser.parse_args()
+
+    print(f"Generando escala={args.escala} semilla={args.semilla} hasta={args.hasta} ...")
+    inicio = time.perf_counter()
+    raw = engine.raw_connection()
+    try:
+        gen = Generador(raw.driver_connection, args.escala, args.semilla, args.hasta, args.dni_inicio)
+        gen.generar()
+        raw.commit()
+    except BaseException:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    # ANALYZE fuera de la transacción de carga para que el planner vea los volúmenes reales
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for tabla in gen.cantidades:
+            conn.exec_driver_sql(f"ANALYZE {tabla}")
+    total = sum(gen.cantidades.values())
+    print(f"Listo: {total:,} filas en {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Perfil y presupuesto del tiempo de arranque de `import server`.
+
+Ejecuta `import server` en procesos nuevos (arranque en frío) y:
+  1. imprime los paquetes más costosos según `python -X importtime`;
+  2. verifica que las dependencias pesadas de carga diferida (pandas, Pillow,
+     sendgrid, requests, ...) NO se importen al arrancar;
+  3. falla (exit 1) si la mediana supera el presupuesto.
+
+Uso:
+    python scripts/import_profile.py                    # presupuesto IMPORT_BUDGET_MS (2500 ms)
+    python scripts/import_profile.py --budget-ms 1800 --top 30
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Deben cargarse solo dentro de los endpoints/servicios que las usan.
+DIFERIDOS = ("pandas", "numpy", "PIL", "sendgrid", "requests", "sentry_sdk")
+
+MEDIR = """
+import sys, time
+t = time.perf_counter()
+import server
+dt = time.perf_counter() - t
+cargados = [m for m in {diferidos!r} if m in sys.modules]
+print(f"{{dt * 1000:.1f}}|{{','.join(cargados)}}")
+""".format(diferidos=DIFERIDOS)
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.pop("SENTRY_DSN", None)  # sentry solo se importa si está configurado
+    return env
+
+
+def medir(repeticiones: int) -> tuple[list[float], set[str]]:
+    tiempos, cargados = [], set()
+    for _ in range(repeticiones):
+        out = subprocess.run(
+            [sys.executable, "-c", MEDIR], cwd=ROOT, env=_env(),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        ms, mods = out.split("|")
+        tiempos.append(float(ms))
+        cargados.update(m for m in mods.split(",") if m)
+    return tiempos, cargados
+
+
+def perfil(top: int) -> list[tuple[str, int, int]]:
+    """(paquete, suma de tiempos propios µs, mayor tiempo acumulado de uno de sus módulos µs)."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"], cwd=ROOT, env=_env(),
+        capture_output=True, text=True, check=True,
+    ).stderr
+    propio: dict[str, int] = {}
+    acumulado: dict[str, int] = {}
+    for linea in err.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        _, self_us, cum_us, nombre = (p.strip() for p in linea.replace("import time:", "|").split("|"))
+        paquete = nombre.split(".")[0]
+        if nombre.startswith("src."):
+            paquete = ".".join(nombre.split(".")[:3])
+        propio[paquete] = propio.get(paquete, 0) + int(self_us)
+        acumulado[paquete] = max(acumulado.get(paquete, 0), int(cum_us))
+    orden = sorted(propio, key=propio.get, reverse=True)[:top]
+    return [(p, propio[p], acumulado[p]) for p in orden]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "2500")))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'paquete':<40} {'propio':>10} {'acumulado':>10}")
+    for paquete, self_us, cum_us in perfil(args.top):
+        print(f"{paquete:<40} {self_us / 1000:>8.1f}ms {cum_us / 1000:>8.1f}ms")
+
+    tiempos, cargados = medir(args.repeticiones)
+    mediana = statistics.median(tiempos)
+    print(f"\nimport server: mediana {mediana:.0f} ms (min {min(tiempos):.0f}, max {max(tiempos):.0f}, "
+          f"n={len(tiempos)}) · presupuesto {args.budget_ms:.0f} ms")
+
+    fallos = []
+    if cargados:
+        fallos.append(f"dependencias que deberían cargarse en diferido: {', '.join(sorted(cargados))}")
+    if mediana > args.budget_ms:
+        fallos.append(f"arranque {mediana:.0f} ms > presupuesto {args.budget_ms:.0f} ms")
+    for f in fallos:
+        print(f"FALLO: {f}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
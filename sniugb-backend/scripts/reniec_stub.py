@@ -0,0 +1,70 @@
+"""
+Stub local de ApiPeru (/api/dni/{dni}) para desarrollo y CI, sin gastar cuota.
+
+    python scripts/reniec_stub.py --port 8089 --latencia-ms 300
+    APIPERU_URL=http://127.0.0.1:8089/api/dni APIPERU_TOKEN=stub uvicorn server:app
+
+Respuestas deterministas:
+  - DNI que empieza con "0"  -> 404 (no encontrado)
+  - DNI que empieza con "9"  -> 200 con success=false (error de negocio)
+  - resto                    -> 200 con nombres derivados del DNI
+Cada consulta se imprime con un contador, para verificar la caché y la
+coalescencia de consultas simultáneas.
+"""
+import argparse
+import itertools
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RUTA = re.compile(r"^/api/dni/(\d{8})$")
+_contador = itertools.count(1)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latencia = 0.0
+
+    def _responder(self, codigo: int, cuerpo: dict) -> None:
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):  # noqa: N802 (nombre impuesto por BaseHTTPRequestHandler)
+        m = RUTA.match(self.path)
+        if not m:
+            return self._responder(404, {"success": False, "message": "ruta no encontrada"})
+        dni = m.group(1)
+        print(f"#{next(_contador)} GET {dni}", flush=True)
+        time.sleep(self.latencia)
+        if dni.startswith("0"):
+            return self._responder(404, {"success": False, "message": "No se encontraron resultados"})
+        if dni.startswith("9"):
+            return self._responder(200, {"success": False, "message": "DNI inválido"})
+        return self._responder(200, {"success": True, "data": {
+            "numero": dni,
+            "nombres": f"NOMBRE {dni[:4]}",
+            "apellido_paterno": f"PATERNO {dni[4:6]}",
+            "apellido_materno": f"MATERNO {dni[6:]}",
+        }})
+
+    def log_message(self, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latencia-ms", type=float, default=0, help="demora simulada por consulta")
+    args = parser.parse_args()
+    StubHandler.latencia = args.latencia_ms / 1000
+    print(f"Stub ApiPeru en http://{args.host}:{args.port}/api/dni/<dni>")
+    ThreadingHTTPServer((args.host, args.port), StubHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
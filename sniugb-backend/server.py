@@ -10,7 +10,6 @@ from fastapi.responses import JSONResponse, FileResponse
 
 # Observabilidad / seguridad
 import structlog
-import sentry_sdk
 from prometheus_fastapi_instrumentator import Instrumentator
 
 # Rate limiting
@@ -19,7 +18,15 @@ from slowapi.middleware import SlowAPIMiddleware
 from slowapi.errors import RateLimitExceeded
 
 # Handlers de error uniformes
-from src.utils import error_handler
+from src.utils import error_handler, http_client
+
+# Conteo de consultas SQL por petición (X-DB-Queries / X-DB-Time)
+from src.utils.query_stats import query_stats_middleware
+
+# Réplica de lectura (read-your-writes)
+from src.config.database import REPLICA_CONFIGURED
+from src.utils import replica
+from src.utils.security import subject_from_request
 
 # Routers
 from src.api.auth import auth_router
@@ -41,6 +48,12 @@ from src.api.categorias import categorias_router
 # Scheduler
 from src.jobs.scheduler import scheduler, setup_jobs
 
+# Stream SSE de notificaciones (conexión LISTEN por proceso)
+from src.services.notificaciones_stream import difusor
+
+# Caché de usuarios autenticados (LISTEN de invalidaciones por proceso)
+from src.utils import principal_cache
+
 # =========================
 # Configuración base
 # =========================
@@ -64,6 +77,8 @@ def setup_logging() -> None:
 # Sentry (opcional)
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 if SENTRY_DSN:
+    import sentry_sdk  # solo se carga si está configurado
+
     sentry_sdk.init(dsn=SENTRY_DSN, traces_sample_rate=float(os.getenv("SENTRY_TRACES", "0.2")))
 
 @asynccontextmanager
@@ -72,12 +87,16 @@ async def lifespan(app: FastAPI):
     if not scheduler.running:
         setup_jobs()
         scheduler.start()
+    principal_cache.iniciar()
     try:
         yield
     finally:
         # Apagado
         if scheduler.running:
             scheduler.shutdown()
+        await http_client.cerrar()
+        await difusor.detener()
+        await principal_cache.detener()
 
 # Inicializa logging antes de crear la app
 setup_logging()
@@ -104,6 +123,28 @@ def ratelimit_handler(request, exc):
         content={"error": {"code": "RATE_LIMIT", "message": "Rate limit exceeded"}}
     )
 
+# Consultas SQL por petición. Se registra antes que CORS para que las cabeceras
+# X-DB-* lleguen también en las respuestas cross-origin.
+app.middleware("http")(query_stats_middleware)
+
+# Read-your-writes: tras una escritura exitosa, las lecturas del mismo usuario
+# van a la primaria unos segundos (ver DB_REPLICA_STICKY_SECONDS). La marca se
+# entrega al cliente (cabecera + cookie) para que valga en cualquier worker.
+if REPLICA_CONFIGURED:
+    @app.middleware("http")
+    async def read_your_writes(request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            dni = subject_from_request(request)
+            marca = replica.marca_escritura(dni) if dni else None
+            if marca:
+                response.headers[replica.HEADER] = marca
+                response.set_cookie(
+                    replica.COOKIE, marca, max_age=replica.vigencia_marca(), httponly=True,
+                    samesite="lax", secure=request.url.scheme == "https",
+                )
+        return response
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -111,6 +152,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "X-DB-Time", replica.HEADER],
 )
 
 # Static (si lo usas)
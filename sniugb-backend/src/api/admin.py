@@ -1,33 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
 from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRoute
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import inspect
+from sqlalchemy import func, insert, literal, select, text
 from datetime import datetime
 from typing import List
-from PIL import Image
-import pandas as pd
 import zipfile
 import shutil
 import uuid
 import io
 import os
+import time
 import aiofiles
 from slugify import slugify
 from src.utils.slug import generate_unique_slug 
+from src.utils import principal_cache, slow_queries
 
 # Imports de la aplicación
-from src.utils.security import get_current_admin_user, get_db, get_current_user
+from src.utils.security import get_current_admin_user, get_db, get_read_db, get_current_user
 from src.models.database_models import (
-    Usuario, Base, Raza, Departamento, Articulo, Categoria, ContenidoAyuda
+    Usuario, Base, Raza, Departamento, Articulo, Categoria, ContenidoAyuda, Notificacion, Predio
 )
 from src.models.user_models import UserResponseSchema
 from src.models.soporte_models import ContenidoAyudaResponseSchema
 from src.models.admin_models import (
     RazaCreateUpdateSchema, RazaResponseSchema, 
     DepartamentoCreateUpdateSchema, DepartamentoResponseSchema,
-    ArticuloSchema, CategoriaCreateUpdateSchema, CategoriaSchema
+    ArticuloSchema, CategoriaCreateUpdateSchema, CategoriaSchema,
+    SlowQuerySchema, DifusionNotificacionSchema
 )
+from src.models.notificacion_models import OperacionMasivaResponse
 
 # Router principal para la sección de administración
 admin_router = APIRouter(
@@ -52,6 +54,7 @@ async def toggle_user_status(dni: str, db: Session = Depends(get_db)):
     
     user.estado = "inactivo" if user.estado == "activo" else "activo"
     db.commit()
+    principal_cache.invalidar(dni)
     db.refresh(user)
     return user
 
@@ -163,6 +166,8 @@ async def create_categoria(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al guardar la imagen: {e}")
 
+    from PIL import Image  # import diferido: Pillow solo hace falta al subir imágenes
+
     try:
         with Image.open(original_path) as img:
             img.thumbnail((800, 600)) 
@@ -226,6 +231,8 @@ async def create_articulo(
         raise HTTPException(status_code=500, detail=f"Error al guardar imagen original: {e}")
 
     # 4. Procesamiento de imágenes (display y thumbnail)
+    from PIL import Image  # import diferido: Pillow solo hace falta al subir imágenes
+
     try:
         with Image.open(original_path) as img:
             # Versión de visualización (grande, para fondos)
@@ -289,12 +296,20 @@ async def delete_articulo(articulo_id: int, db: Session = Depends(get_db)):
 
 # --- Backup de Base de Datos ---
 @admin_router.get("/backup/db")
-async def backup_database(db: Session = Depends(get_db)):
+async def backup_database(db: Session = Depends(get_read_db)):
     """(Admin) Genera y descarga un .zip con todas las tablas en formato .csv."""
+    import pandas as pd  # import diferido: pandas tarda ~0,3 s en cargar
+
     zip_buffer = io.BytesIO()
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        inspector = inspect(db.get_bind())
-        table_names = inspector.get_table_names()
+        # Las particiones (notificaciones_p*) se exportan a través de su tabla padre:
+        # listarlas también duplicaría las filas en el backup.
+        table_names = db.execute(text("""
+            SELECT c.relname FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+            ORDER BY c.relname
+        """)).scalars().all()
 
         for table_name in table_names:
             if table_name == 'alembic_version':
@@ -312,6 +327,53 @@ async def backup_database(db: Session = Depends(get_db)):
         headers={"Content-Disposition": f"attachment; filename=sniugb_backup_{datetime.now().strftime('%Y%m%d')}.zip"}
     )
 
+# --- Notificaciones masivas ---
+@admin_router.post("/notificaciones/difusion", response_model=OperacionMasivaResponse, status_code=status.HTTP_201_CREATED)
+async def difundir_notificacion(datos: DifusionNotificacionSchema, db: Session = Depends(get_db)):
+    """
+    (Admin) Crea una notificación para cada usuario activo que cumpla los filtros
+    (rol, departamento de alguno de sus predios) con un solo INSERT ... SELECT.
+    """
+    destinatarios = select(
+        Usuario.numero_de_dni, literal(datos.mensaje), literal(datos.link), literal(False)
+    ).where(Usuario.estado == "activo")
+    if datos.rol is not None:
+        destinatarios = destinatarios.where(Usuario.rol == datos.rol)
+    if datos.departamento:
+        destinatarios = destinatarios.where(
+            select(Predio.codigo_predio).where(
+                Predio.propietario_dni == Usuario.numero_de_dni,
+                func.lower(Predio.departamento) == datos.departamento.strip().lower()
+            ).exists()
+        )
+
+    inicio = time.perf_counter()
+    creadas = db.execute(insert(Notificacion).from_select(
+        ["usuario_dni", "mensaje", "link", "leida"], destinatarios
+    ).execution_options(preserve_rowcount=True)).rowcount
+    db.commit()
+    return {"afectadas": creadas, "duracion_ms": round((time.perf_counter() - inicio) * 1000, 2)}
+
+# --- Rendimiento ---
+@admin_router.get("/perf/slow-queries", response_model=List[SlowQuerySchema])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=slow_queries.SLOW_QUERY_BUFFER),
+    ruta: str | None = None,
+):
+    """
+    (Admin) Últimas sentencias SQL que superaron DB_SLOW_QUERY_MS, con su ruta de origen y plan.
+    Solo las del worker que atiende esta petición (campo `pid`): el registro es por proceso.
+    """
+    registros = slow_queries.slow_queries()
+    if ruta:
+        registros = [r for r in registros if r["ruta"] == ruta]
+    return registros[:limit]
+
+@admin_router.delete("/perf/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries():
+    """(Admin) Vacía el registro de sentencias lentas (solo el del worker que atiende la petición)."""
+    slow_queries.limpiar()
+
 @admin_router.get("/ayuda", response_model=List[ContenidoAyudaResponseSchema])
 async def get_ayuda_admin(db: Session = Depends(get_db)):
     """(Admin) Obtiene todo el contenido de la sección de ayuda."""
@@ -1,12 +1,18 @@
+import base64
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.routing import APIRoute
-from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, or_
-from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import String, any_, bindparam, select, func, cast, literal, null, or_, true, tuple_, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, ENUM
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
 
-from src.utils.security import get_current_user, get_db
+from src.utils.security import get_current_user_async, get_async_db
+from src.utils.query_stats import query_budget
+from src.utils.cui import CUI, verificar_cuis
 from src.models.database_models import (
     Usuario, Animal, Predio,
     AnimalCondicionSalud,
@@ -17,7 +23,12 @@ from src.models.database_models import (
 )
 from src.models.animal_models import (
     AnimalResponseSchema, AnimalDeleteConfirmationSchema,
-    AnimalDetailResponseSchema, AnimalUpdateSchema
+    AnimalDetailResponseSchema, AnimalUpdateSchema,
+    ValidarCuisSchema, ValidacionCuisResponseSchema
+)
+from src.models.evento_models import (
+    EventoSanitarioResponseSchema, EventoProduccionResponseSchema,
+    TimelineAnimalResponseSchema, TipoTimeline
 )
 
 # ============================================================
@@ -60,7 +71,7 @@ class EventoSanitarioMasivoIn(BaseModel):
     dosis: Optional[float] = None
     unidad_medida_dosis: Optional[str] = None
     observaciones: Optional[str] = None
-    animales_cui: List[str]
+    animales_cui: List[CUI]
 
 # ---- Producción (individual): front envía "producto" y "valor" ----
 class EventoProduccionIn(BaseModel):
@@ -85,7 +96,7 @@ class ControlCalidadMasivoIn(BaseModel):
     valor_cantidad: Optional[float] = None
     unidad_medida: Optional[str] = None
     observaciones: Optional[str] = None
-    animales_cui: List[str]
+    animales_cui: List[CUI]
     tipo_evento_calidad_id: Optional[int] = None
     metodo_id: Optional[int] = None  # alias que manda el front
 
@@ -117,111 +128,364 @@ class AnimalCreateSchema(BaseModel):
 # ============================================================
 
 @animales_router.get("/{cui}", response_model=AnimalDetailResponseSchema)
+@query_budget(5)
 async def get_animal_detail(
-    cui: str,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    cui: CUI,
+    incluir_historial: bool = Query(
+        False, description="Adjunta TODOS los eventos sanitarios y de producción; para paginar usar /{cui}/timeline"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    animal = (
-        db.query(Animal)
+    animal = (await db.execute(
+        select(Animal)
         .join(Animal.predio)
-        .filter(
+        .where(
             Animal.cui == cui,
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .first()
-    )
+        .options(selectinload(Animal.raza))
+    )).scalars().first()
     if not animal:
         raise HTTPException(status_code=404, detail="Animal no encontrado.")
-    return animal
+    detalle = AnimalDetailResponseSchema.model_validate(AnimalResponseSchema.model_validate(animal).model_dump())
+    if incluir_historial:
+        sanitarios = (await db.execute(
+            select(EventoSanitario)
+            .join(EventoSanitarioAnimal, EventoSanitarioAnimal.evento_id == EventoSanitario.id)
+            .where(EventoSanitarioAnimal.animal_cui == cui)
+            .order_by(EventoSanitario.fecha_evento_enfermedad.desc(), EventoSanitario.id.desc())
+        )).scalars().all()
+        produccion = (await db.execute(
+            select(EventoProduccion)
+            .where(EventoProduccion.animal_cui == cui)
+            .order_by(EventoProduccion.fecha_evento.desc(), EventoProduccion.id.desc())
+        )).scalars().all()
+        detalle.eventos_sanitarios = [EventoSanitarioResponseSchema.model_validate(e) for e in sanitarios]
+        detalle.eventos_produccion = [EventoProduccionResponseSchema.model_validate(e) for e in produccion]
+    return detalle
+
+# ============================================================
+# Línea de tiempo (producción + sanidad + calidad, con cursor)
+# ============================================================
+
+TIMELINE_LIMITE = 20
+TIMELINE_LIMITE_MAX = 100
+TIMELINE_TIPOS = ("calidad", "produccion", "sanitario")  # desempate del orden (fecha, tipo, id) descendente
+
+def _codificar_cursor(fecha: datetime, tipo: str, id_: int) -> str:
+    return base64.urlsafe_b64encode(f"{fecha.isoformat()}|{tipo}|{id_}".encode()).decode().rstrip("=")
+
+def _decodificar_cursor(cursor: str) -> tuple[datetime, str, int]:
+    try:
+        fecha, tipo, id_ = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
+        if tipo not in TIMELINE_TIPOS:
+            raise ValueError(tipo)
+        return datetime.fromisoformat(fecha), tipo, int(id_)
+    except ValueError:  # incluye base64 (binascii.Error) y UTF-8 inválidos
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
+
+def _despues_del_cursor(tipo: str, fecha_col, id_col, cursor: tuple[datetime, str, int] | None):
+    """
+    Filas de la rama `tipo` que van después del cursor en el orden (fecha, tipo, id) DESC.
+    Dentro de una rama el tipo es constante, así que queda una condición sobre
+    (fecha, id) que el índice de la rama resuelve como rango.
+    """
+    if cursor is None:
+        return true()
+    fecha, tipo_cursor, id_ = cursor
+    if tipo < tipo_cursor:
+        return fecha_col <= fecha
+    if tipo > tipo_cursor:
+        return fecha_col < fecha
+    return tuple_(fecha_col, id_col) < tuple_(fecha, id_)
+
+def consulta_timeline(cui: str, tipos: set[str], cursor: tuple[datetime, str, int] | None, limite: int):
+    """
+    UNION ALL de una rama por tipo, cada una ya filtrada por el cursor, ordenada y
+    cortada en limite + 1 (la fila extra indica si hay otra página). Así nunca se
+    lee más que una página por tipo, por largo que sea el historial de producción.
+    """
+    ramas = []
+    if "produccion" in tipos:
+        ramas.append(
+            select(
+                literal("produccion").label("tipo"),
+                EventoProduccion.id.label("id"),
+                EventoProduccion.fecha_evento.label("fecha"),
+                cast(EventoProduccion.tipo_evento, String).label("subtipo"),
+                cast(null(), String).label("producto"),
+                EventoProduccion.valor_cantidad.label("valor_cantidad"),
+                EventoProduccion.unidad_medida.label("unidad_medida"),
+                cast(null(), String).label("tratamiento"),
+                EventoProduccion.observaciones.label("observaciones"),
+            )
+            .where(
+                EventoProduccion.animal_cui == cui,
+                _despues_del_cursor("produccion", EventoProduccion.fecha_evento, EventoProduccion.id, cursor),
+            )
+            .order_by(EventoProduccion.fecha_evento.desc(), EventoProduccion.id.desc())
+            .limit(limite + 1)
+        )
+    if "sanitario" in tipos:
+        ramas.append(
+            select(
+                literal("sanitario").label("tipo"),
+                EventoSanitario.id.label("id"),
+                EventoSanitario.fecha_evento_enfermedad.label("fecha"),
+                TipoEvento.nombre.label("subtipo"),
+                cast(null(), String).label("producto"),
+                EventoSanitario.dosis.label("valor_cantidad"),
+                EventoSanitario.unidad_medida_dosis.label("unidad_medida"),
+                EventoSanitario.nombre_tratamiento.label("tratamiento"),
+                EventoSanitario.observaciones.label("observaciones"),
+            )
+            .join(EventoSanitarioAnimal, EventoSanitarioAnimal.evento_id == EventoSanitario.id)
+            .join(TipoEvento, TipoEvento.id == EventoSanitario.tipo_evento_enfermedad_id)
+            .where(
+                EventoSanitarioAnimal.animal_cui == cui,
+                _despues_del_cursor("sanitario", EventoSanitario.fecha_evento_enfermedad, EventoSanitario.id, cursor),
+            )
+            .order_by(EventoSanitario.fecha_evento_enfermedad.desc(), EventoSanitario.id.desc())
+            .limit(limite + 1)
+        )
+    if "calidad" in tipos:
+        ramas.append(
+            select(
+                literal("calidad").label("tipo"),
+                ControlCalidad.id.label("id"),
+                ControlCalidad.fecha_evento.label("fecha"),
+                TipoEvento.nombre.label("subtipo"),
+                cast(ControlCalidad.producto, String).label("producto"),
+                ControlCalidad.valor_cantidad.label("valor_cantidad"),
+                ControlCalidad.unidad_medida.label("unidad_medida"),
+                cast(null(), String).label("tratamiento"),
+                ControlCalidad.observaciones.label("observaciones"),
+            )
+            .join(ControlCalidadAnimal, ControlCalidadAnimal.control_id == ControlCalidad.id)
+            .join(TipoEvento, TipoEvento.id == ControlCalidad.tipo_evento_calidad_id)
+            .where(
+                ControlCalidadAnimal.animal_cui == cui,
+                _despues_del_cursor("calidad", ControlCalidad.fecha_evento, ControlCalidad.id, cursor),
+            )
+            .order_by(ControlCalidad.fecha_evento.desc(), ControlCalidad.id.desc())
+            .limit(limite + 1)
+        )
+    eventos = union_all(*ramas).subquery("eventos")
+    return (
+        select(eventos)
+        .order_by(eventos.c.fecha.desc(), eventos.c.tipo.desc(), eventos.c.id.desc())
+        .limit(limite + 1)
+    )
+
+# 3 = usuario (si no está en principal_cache) + propiedad del animal + UNION ALL de la página
+@animales_router.get("/{cui}/timeline", response_model=TimelineAnimalResponseSchema)
+@query_budget(3)
+async def get_animal_timeline(
+    cui: CUI,
+    tipos: Optional[List[TipoTimeline]] = Query(None, description="Filtrar por tipo (repetible); por defecto todos"),
+    cursor: Optional[str] = Query(None, description="`siguiente_cursor` de la página anterior"),
+    limite: int = Query(TIMELINE_LIMITE, ge=1, le=TIMELINE_LIMITE_MAX),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    """Eventos del animal del más reciente al más antiguo, `limite` por página."""
+    posicion = _decodificar_cursor(cursor) if cursor else None
+    existe = (await db.execute(
+        select(Animal.cui)
+        .join(Animal.predio)
+        .where(Animal.cui == cui, Predio.propietario_dni == current_user.numero_de_dni)
+    )).first()
+    if not existe:
+        raise HTTPException(status_code=404, detail="Animal no encontrado.")
+
+    filas = (await db.execute(
+        consulta_timeline(cui, set(tipos or TIMELINE_TIPOS), posicion, limite)
+    )).mappings().all()
+    items = filas[:limite]
+    siguiente = None
+    if len(filas) > limite:
+        ultima = items[-1]
+        siguiente = _codificar_cursor(ultima["fecha"], ultima["tipo"], ultima["id"])
+    return {"items": items, "siguiente_cursor": siguiente}
 
 @animales_router.put("/{cui}", response_model=AnimalResponseSchema)
 async def update_animal_details(
     cui: str,
     animal_data: AnimalUpdateSchema,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    animal = (
-        db.query(Animal)
+    animal = (await db.execute(
+        select(Animal)
         .join(Animal.predio)
-        .filter(
+        .where(
             Animal.cui == cui,
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .first()
-    )
+        .options(selectinload(Animal.raza))
+    )).scalars().first()
     if not animal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Animal no encontrado.")
     update_data = animal_data.model_dump(exclude_unset=True)
     for k, v in update_data.items():
         setattr(animal, k, v)
     try:
-        db.commit()
-        db.refresh(animal)
+        await db.commit()
         return animal
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al actualizar el animal: {e}")
 
 # ============================================================
 # NUEVOS: soporte a la UI (chips/sugerencias y alta de animal)
 # ============================================================
 
+BUSQUEDA_LIMITE = 50
+BUSQUEDA_MIN_TRIGRAMA = 3  # con menos caracteres pg_trgm no puede podar con el índice
+
+
+def _escapar_like(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def consulta_busqueda(predio_codigo: str, q: str):
+    """
+    Animales de un predio para el chip de búsqueda (también la mide
+    scripts/bench_busqueda_animales.py). Según lo escrito:
+    - solo dígitos: prefijo de CUI (ancho fijo, se tipea desde la izquierda);
+      rango sobre ix_animales_predio_cui_prefijo, ya ordenado por CUI. Si no
+      hay ninguno, list_animales prueba consulta_busqueda_respaldo.
+    - 3+ caracteres: nombre que contiene el texto o se le parece por palabra
+      (pg_trgm, ix_animales_predio_nombre_trgm), del más al menos similar.
+    - 1-2 caracteres: recorre el predio en orden de CUI y corta al llenar la página.
+    """
+    cui = Animal.cui.collate("C")
+    qs = select(Animal).where(Animal.predio_codigo == predio_codigo)
+    q = q.strip()
+    if not q:
+        return qs.order_by(cui).limit(BUSQUEDA_LIMITE)
+    if q.isascii() and q.isdigit():
+        return qs.where(cui.startswith(q)).order_by(cui).limit(BUSQUEDA_LIMITE)
+
+    contiene = Animal.nombre.ilike(f"%{_escapar_like(q)}%")
+    if len(q) < BUSQUEDA_MIN_TRIGRAMA:
+        return qs.where(contiene).order_by(cui).limit(BUSQUEDA_LIMITE)
+    # `q <% nombre`: word_similarity(q, nombre) >= pg_trgm.word_similarity_threshold (0.6),
+    # tolera errores de tipeo ("lolla" -> "Lola")
+    parecido = literal(q).op("<%")(Animal.nombre)
+    return (
+        qs.where(or_(contiene, parecido))
+        .order_by(func.similarity(Animal.nombre, q).desc(), cui)
+        .limit(BUSQUEDA_LIMITE)
+    )
+
+
+def consulta_busqueda_respaldo(predio_codigo: str, q: str):
+    """
+    Segunda pasada para un texto de solo dígitos que no es prefijo de ningún CUI
+    del predio: CUI o nombre que lo contienen (p. ej. los últimos dígitos del CUI
+    que muestran los mensajes de transferencia). None si no aplica. El `LIKE
+    '%q%'` sobre el CUI no tiene índice y recorre el predio: por eso solo se
+    ejecuta cuando el prefijo no devolvió nada.
+    """
+    q = q.strip()
+    if not (q.isascii() and q.isdigit()):
+        return None
+    contiene = f"%{q}%"
+    return (
+        select(Animal)
+        .where(Animal.predio_codigo == predio_codigo, or_(Animal.cui.like(contiene), Animal.nombre.ilike(contiene)))
+        .order_by(Animal.cui.collate("C"))
+        .limit(BUSQUEDA_LIMITE)
+    )
+
+
 @animales_router.get("", response_model=list[AnimalResponseSchema])
+@query_budget(5)
 async def list_animales(
     predio: str = Query(..., description="Código de predio (del usuario actual)"),
-    q: str = Query("", description="Búsqueda por CUI o nombre"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    q: str = Query("", description="Búsqueda por prefijo de CUI o por nombre (ordenada por similitud)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async),
 ):
     # Verifica que el predio pertenezca al usuario actual
-    predio_obj = (
-        db.query(Predio)
-        .filter(
+    predio_obj = (await db.execute(
+        select(Predio)
+        .where(
             Predio.codigo_predio == predio,
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .first()
-    )
+    )).scalars().first()
     if not predio_obj:
         raise HTTPException(status_code=404, detail="Predio no encontrado o no autorizado.")
 
-    qs = (
-        db.query(Animal)
-        .join(Animal.predio)
-        .filter(
-            Predio.codigo_predio == predio,
-            Predio.propietario_dni == current_user.numero_de_dni
-        )
-    )
-    if q:
-        like = f"%{q.strip()}%"
-        qs = qs.filter(or_(Animal.cui.ilike(like), Animal.nombre.ilike(like)))
-
-    results = qs.order_by(Animal.cui.asc()).limit(50).all()
+    qs = consulta_busqueda(predio, q).options(selectinload(Animal.raza))
+    results = (await db.execute(qs)).scalars().all()
+    if not results:
+        respaldo = consulta_busqueda_respaldo(predio, q)
+        if respaldo is not None:
+            results = (await db.execute(respaldo.options(selectinload(Animal.raza)))).scalars().all()
     return results
 
+@animales_router.post("/validar-cuis", response_model=ValidacionCuisResponseSchema)
+@query_budget(2)
+async def validar_cuis(
+    payload: ValidarCuisSchema,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async),
+):
+    """
+    Valida un lote de CUIs (p. ej. una lectura del lector de crotales): formato y
+    dígito de control en una pasada vectorizada, y con UNA consulta (= ANY) cuáles
+    de los válidos están en el hato del usuario.
+    """
+    cuis = list(dict.fromkeys(c.strip() for c in payload.cuis))  # sin repetidos, en orden
+    motivos = verificar_cuis(cuis)
+    validos = [c for c, motivo in zip(cuis, motivos) if motivo is None]
+
+    en_hato = []
+    if validos:
+        qs = (
+            select(Animal.cui, Animal.predio_codigo, Animal.estado)
+            .join(Animal.predio)
+            .where(
+                Animal.cui == any_(bindparam("cuis", validos, type_=ARRAY(String))),
+                Predio.propietario_dni == current_user.numero_de_dni,
+            )
+        )
+        if payload.predio:
+            qs = qs.where(Predio.codigo_predio == payload.predio)
+        en_hato = (await db.execute(qs)).all()
+
+    encontrados = {fila.cui for fila in en_hato}
+    return {
+        "total": len(cuis),
+        "validos": len(validos),
+        "invalidos": [{"cui": c, "motivo": m} for c, m in zip(cuis, motivos) if m is not None],
+        "en_hato": [fila._asdict() for fila in en_hato],
+        "no_en_hato": [c for c in validos if c not in encontrados],
+    }
+
 @animales_router.post("", response_model=AnimalResponseSchema, status_code=status.HTTP_201_CREATED)
 async def crear_animal(
     payload: AnimalCreateSchema,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async),
 ):
     # Validar predio del usuario
-    predio = (
-        db.query(Predio)
-        .filter(
+    predio = (await db.execute(
+        select(Predio)
+        .where(
             Predio.codigo_predio == payload.predio_codigo,
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .first()
-    )
+    )).scalars().first()
     if not predio:
         raise HTTPException(status_code=404, detail="Predio no encontrado o no autorizado.")
 
     # Evitar duplicados de CUI
-    exists = db.query(Animal).filter(Animal.cui == payload.cui).first()
+    exists = await db.get(Animal, payload.cui)
     if exists:
         raise HTTPException(status_code=409, detail="Ya existe un animal con ese CUI.")
 
@@ -234,8 +498,8 @@ async def crear_animal(
         predio_id=predio.id
     )
     db.add(animal)
-    db.commit()
-    db.refresh(animal)
+    await db.commit()
+    await db.refresh(animal)
     return animal
 
 # ============================================================
@@ -245,15 +509,14 @@ async def crear_animal(
 @animales_router.get("/tipos/{grupo}", response_model=list[TipoEventoResponse])
 async def listar_tipos_por_grupo(
     grupo: str,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    tipos = (
-        db.query(TipoEvento)
-          .filter(TipoEvento.grupo == cast(grupo, PG_TIPO_EVENTO_GRUPO))
+    tipos = (await db.execute(
+        select(TipoEvento)
+          .where(TipoEvento.grupo == cast(grupo, PG_TIPO_EVENTO_GRUPO))
           .order_by(TipoEvento.nombre.asc())
-          .all()
-    )
+    )).scalars().all()
     return [TipoEventoResponse(id=t.id, nombre=t.nombre, grupo=_enum_val(t.grupo)) for t in tipos]
 
 # ============================================================
@@ -263,36 +526,35 @@ async def listar_tipos_por_grupo(
 @animales_router.post("/eventos-sanitarios", status_code=status.HTTP_201_CREATED)
 async def crear_evento_sanitario_masivo(
     payload: EventoSanitarioMasivoIn,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     # Validar tipos
-    tipo_enf = db.query(TipoEvento).filter(
+    tipo_enf = (await db.execute(select(TipoEvento).where(
         TipoEvento.id == payload.tipo_evento_enfermedad_id,
         TipoEvento.grupo == cast('ENFERMEDAD', PG_TIPO_EVENTO_GRUPO)
-    ).first()
+    ))).scalars().first()
     if not tipo_enf:
         raise HTTPException(status_code=422, detail="Tipo de ENFERMEDAD inválido.")
 
     tipo_trat = None
     if payload.tipo_evento_tratamiento_id:
-        tipo_trat = db.query(TipoEvento).filter(
+        tipo_trat = (await db.execute(select(TipoEvento).where(
             TipoEvento.id == payload.tipo_evento_tratamiento_id,
             TipoEvento.grupo == cast('TRATAMIENTO', PG_TIPO_EVENTO_GRUPO)
-        ).first()
+        ))).scalars().first()
         if not tipo_trat:
             raise HTTPException(status_code=422, detail="Tipo de TRATAMIENTO inválido.")
 
     # Filtrar animales del usuario (por dueño del predio)
-    animales = (
-        db.query(Animal)
+    animales = (await db.execute(
+        select(Animal)
         .join(Animal.predio)
-        .filter(
+        .where(
             Animal.cui.in_(payload.animales_cui),
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .all()
-    )
+    )).scalars().all()
     if len(animales) == 0:
         raise HTTPException(status_code=404, detail="No se encontraron animales válidos del usuario.")
 
@@ -308,7 +570,7 @@ async def crear_evento_sanitario_masivo(
         creador_dni=current_user.numero_de_dni
     )
     db.add(evento)
-    db.flush()  # id
+    await db.flush()  # id
 
     # Asociaciones + reglas de estado
     for a in animales:
@@ -318,7 +580,7 @@ async def crear_evento_sanitario_masivo(
         else:
             a.condicion_salud = AnimalCondicionSalud.ENFERMO
 
-    db.commit()
+    await db.commit()
     return {"id": evento.id, "cuids": [a.cui for a in animales], "detalle": "Evento sanitario registrado."}
 
 # ============================================================
@@ -329,18 +591,17 @@ async def crear_evento_sanitario_masivo(
 async def create_evento_produccion(
     cui: str,
     evento_data: EventoProduccionIn,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    animal = (
-        db.query(Animal)
+    animal = (await db.execute(
+        select(Animal)
         .join(Animal.predio)
-        .filter(
+        .where(
             Animal.cui == cui,
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .first()
-    )
+    )).scalars().first()
     if not animal:
         raise HTTPException(status_code=404, detail="Animal no encontrado.")
 
@@ -358,8 +619,8 @@ async def create_evento_produccion(
         observaciones=evento_data.observaciones
     )
     db.add(nuevo)
-    db.commit()
-    db.refresh(nuevo)
+    await db.commit()
+    await db.refresh(nuevo)
     return nuevo
 
 # ============================================================
@@ -369,8 +630,8 @@ async def create_evento_produccion(
 @animales_router.post("/control-calidad", status_code=status.HTTP_201_CREATED)
 async def crear_control_calidad_masivo(
     payload: ControlCalidadMasivoIn,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     try:
         producto = ProduccionTipo(payload.producto)
@@ -380,22 +641,21 @@ async def crear_control_calidad_masivo(
         raise HTTPException(status_code=422, detail="Producto inválido (LECHE/CARNE/CUERO).")
 
     tipo_id = payload.resolved_tipo_evento_id()
-    tipo = db.query(TipoEvento).filter(
+    tipo = (await db.execute(select(TipoEvento).where(
         TipoEvento.id == tipo_id,
         TipoEvento.grupo == cast('CONTROL_CALIDAD', PG_TIPO_EVENTO_GRUPO)
-    ).first()
+    ))).scalars().first()
     if not tipo:
         raise HTTPException(status_code=422, detail="Tipo de control de calidad inválido.")
 
-    animales = (
-        db.query(Animal)
+    animales = (await db.execute(
+        select(Animal)
         .join(Animal.predio)
-        .filter(
+        .where(
             Animal.cui.in_(payload.animales_cui),
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .all()
-    )
+    )).scalars().all()
     if len(animales) == 0:
         raise HTTPException(status_code=404, detail="No se encontraron animales válidos del usuario.")
 
@@ -409,12 +669,12 @@ async def crear_control_calidad_masivo(
         creador_dni=current_user.numero_de_dni
     )
     db.add(control)
-    db.flush()
+    await db.flush()
 
     for a in animales:
         db.add(ControlCalidadAnimal(control_id=control.id, animal_cui=a.cui))
 
-    db.commit()
+    await db.commit()
     return {"id": control.id, "cuids": [a.cui for a in animales], "detalle": "Control de calidad registrado."}
 
 # ============================================================
@@ -425,44 +685,42 @@ async def crear_control_calidad_masivo(
 async def soft_delete_animal(
     cui: str,
     confirmation_data: AnimalDeleteConfirmationSchema,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     if cui != confirmation_data.confirmacion_cui:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El CUI de confirmación no coincide.")
-    animal = (
-        db.query(Animal)
+    animal = (await db.execute(
+        select(Animal)
         .join(Animal.predio)
-        .filter(
+        .where(
             Animal.cui == cui,
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .first()
-    )
+    )).scalars().first()
     if not animal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Animal no encontrado.")
     animal.estado = "en_papelera"
-    db.commit()
+    await db.commit()
     return {"message": f"El animal con CUI {cui} ha sido enviado a la papelera por 30 días."}
 
 @animales_router.post("/{cui}/restaurar", status_code=status.HTTP_200_OK)
 async def restore_animal(
     cui: str,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    animal = (
-        db.query(Animal)
+    animal = (await db.execute(
+        select(Animal)
         .join(Animal.predio)
-        .filter(
+        .where(
             Animal.cui == cui,
             Animal.estado == "en_papelera",
             Predio.propietario_dni == current_user.numero_de_dni
         )
-        .first()
-    )
+    )).scalars().first()
     if not animal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Animal no encontrado en la papelera.")
     animal.estado = "activo"
-    db.commit()
+    await db.commit()
     return {"message": f"El animal con CUI {cui} ha sido restaurado."}
\ No newline at end of file
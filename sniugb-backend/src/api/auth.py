@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 import os
 import secrets
 
-from src.utils.limiter import limiter
+from src.utils.limiter import limiter, limitar_por_dni
 from src.models.user_models import (
     UserCreateSchema,
     UserResponseSchema,
@@ -22,14 +23,15 @@ from src.services.notification_service import (
     send_reset_code_by_whatsapp,
 )
 from src.utils.security import (
-    verify_password,
+    verify_and_update_password,
     create_access_token,
     create_refresh_token,
     get_db,
-    get_password_hash,
+    get_password_hash_async,
     validate_password,
     get_current_user,
 )
+from src.utils import principal_cache, token_denylist
 
 auth_router = APIRouter(
     prefix="/auth",
@@ -48,7 +50,7 @@ async def register_user(user_data: UserCreateSchema, db: Session = Depends(get_d
             detail="La contraseña no cumple con los requisitos de seguridad.",
         )
 
-    new_user = create_new_user(user_data, db)
+    new_user = await create_new_user(user_data, db)
     if new_user == "dni_not_found":
         raise HTTPException(status_code=404, detail="El DNI ingresado no es válido o no fue encontrado.")
     if new_user == "duplicate_phone":
@@ -73,14 +75,22 @@ async def login_user(
     """
     Autentica a un usuario y devuelve access_token, refresh_token y rol (lowercase).
     """
+    limitar_por_dni(request, form_data.username, "5/minute")
     user = db.query(Usuario).filter(Usuario.numero_de_dni == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+    valido, nuevo_hash = (False, None)
+    if user:
+        valido, nuevo_hash = await verify_and_update_password(form_data.password, user.password)
+    if not valido:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="DNI o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Rehash transparente si el hash guardado usa un esquema/parámetros obsoletos
+    if nuevo_hash:
+        user.password = nuevo_hash
+
     # Access
     user_role_val = getattr(user.rol, "value", user.rol)
     role_lower = str(user_role_val).lower()
@@ -98,7 +108,10 @@ async def login_user(
     # Persistencia (si hay jti/exp -> modo con revocación)
     if jti and exp:
         db.add(RefreshToken(jti=jti, usuario_dni=user.numero_de_dni, expires_at=exp))
+    if db.dirty or db.new:
         db.commit()
+    if nuevo_hash:
+        principal_cache.invalidar(user.numero_de_dni)
 
     return {
         "access_token": access_token,
@@ -123,6 +136,7 @@ async def forgot_password(
     - No revela si el usuario existe (respuesta neutra si no existe).
     - Si el envío falla para un usuario válido, devuelve 500 para poder depurar.
     """
+    limitar_por_dni(request, body.numero_de_dni, "5/minute")
     user = db.query(Usuario).filter(Usuario.numero_de_dni == body.numero_de_dni).first()
 
     # Si NO existe, responder neutro para no filtrar usuarios.
@@ -141,12 +155,12 @@ async def forgot_password(
     if method == "email":
         if not user.email:
             raise HTTPException(status_code=400, detail="El usuario no tiene email registrado.")
-        sent_ok = send_reset_code_by_email(user.email, code)
+        sent_ok = await send_reset_code_by_email(user.email, code)
 
     elif method == "whatsapp":
         if not user.telefono:
             raise HTTPException(status_code=400, detail="El usuario no tiene teléfono registrado.")
-        sent_ok = send_reset_code_by_whatsapp(user.telefono, code)
+        sent_ok = await send_reset_code_by_whatsapp(user.telefono, code)
 
     else:
         raise HTTPException(status_code=400, detail="Método no válido. Debe ser 'email' o 'whatsapp'.")
@@ -172,6 +186,7 @@ async def verify_reset_code(
     Verifica si un código de reseteo es válido para un DNI.
     Manejo robusto de tz naive/aware.
     """
+    limitar_por_dni(request, body.numero_de_dni, "5/minute")
     user = db.query(Usuario).filter(Usuario.numero_de_dni == body.numero_de_dni).first()
 
     if not user or not user.reset_token or not user.reset_token_expires:
@@ -203,6 +218,7 @@ async def reset_password(
     Resetea la contraseña si el código es válido y no ha expirado.
     Manejo robusto de tz naive/aware.
     """
+    limitar_por_dni(request, body.numero_de_dni, "5/minute")
     user = db.query(Usuario).filter(Usuario.numero_de_dni == body.numero_de_dni).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado.")
@@ -218,10 +234,11 @@ async def reset_password(
     if user.reset_token != body.code or now > expires:
         raise HTTPException(status_code=400, detail="El código es inválido o ha expirado.")
 
-    user.password = get_password_hash(body.new_password)
+    user.password = await get_password_hash_async(body.new_password)
     user.reset_token = None
     user.reset_token_expires = None
     db.commit()
+    principal_cache.invalidar(user.numero_de_dni)
 
     return {"message": "Contraseña actualizada exitosamente."}
 
@@ -251,6 +268,10 @@ async def refresh(body: RefreshRequest, db: Session = Depends(get_db)):
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
 
+    # Reuso de un refresh ya revocado en este worker: se rechaza sin ir a la BD
+    if jti and token_denylist.esta_revocado(jti):
+        raise HTTPException(status_code=401, detail="Refresh no válido o revocado")
+
     user = db.query(Usuario).filter(Usuario.numero_de_dni == sub).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado.")
@@ -259,14 +280,24 @@ async def refresh(body: RefreshRequest, db: Session = Depends(get_db)):
 
     # Modo persistente (si hay jti en el payload)
     if jti and exp:
-        token_row = db.query(RefreshToken).filter(RefreshToken.jti == jti).first()
+        # Validar y revocar el refresh usado en una sola sentencia (por el índice
+        # único de jti); dos refresh concurrentes con el mismo token no pasan ambos.
         now = datetime.now(timezone.utc)
-        if not token_row or token_row.revoked_at is not None or token_row.expires_at < now:
+        consumido = db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.jti == jti,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now,
+            )
+            .values(revoked_at=now)
+            .returning(RefreshToken.id)
+        ).first()
+        token_denylist.revocar(jti, exp)
+        if consumido is None:
+            db.rollback()
             raise HTTPException(status_code=401, detail="Refresh no válido o revocado")
 
-        # Revocar el refresh usado
-        token_row.revoked_at = now
-
         # Emitir nuevos tokens
         access_token = create_access_token(data={"sub": user.numero_de_dni, "rol": role_lower})
         rt = create_refresh_token(data={"sub": user.numero_de_dni, "rol": role_lower})
@@ -311,12 +342,14 @@ async def logout(current_user: Usuario = Depends(get_current_user), db: Session
     En modo stateless, el cliente ignora el refresh localmente.
     """
     now = datetime.now(timezone.utc)
-    tokens = (
-        db.query(RefreshToken)
-        .filter(RefreshToken.usuario_dni == current_user.numero_de_dni, RefreshToken.revoked_at.is_(None))
-        .all()
-    )
-    for t in tokens:
-        t.revoked_at = now
+    revocados = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.usuario_dni == current_user.numero_de_dni, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .returning(RefreshToken.jti, RefreshToken.expires_at)
+    ).all()
     db.commit()
+    for jti, expires_at in revocados:
+        token_denylist.revocar(jti, expires_at.timestamp())
+    principal_cache.invalidar(current_user.numero_de_dni)
     return None
@@ -1,7 +1,9 @@
+import calendar
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.routing import APIRoute
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func, and_
+from sqlalchemy import extract, and_
 from typing import List
 from datetime import date, datetime, timezone, time
 
@@ -77,14 +79,24 @@ async def create_recordatorio(
 @calendario_router.get("/eventos/{year}/{month}", response_model=List[EventoResponseSchema])
 async def get_eventos_del_mes(year: int, month: int, db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_user)):
     """Obtiene todos los eventos y recordatorios de un mes, con su estado calculado."""
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="Mes inválido.")
+    # 9998: el fin del rango de diciembre cae en year + 1 y datetime llega hasta 9999
+    if not 1 <= year <= 9998:
+        raise HTTPException(status_code=400, detail="Año inválido.")
     hoy = date.today()
     response_list = []
-    
+
+    # Rango semiabierto [inicio, fin) en lugar de extract(year/month): permite usar
+    # el índice sobre fecha_evento en vez de evaluar la función fila por fila.
+    inicio_mes = datetime(year, month, 1, tzinfo=timezone.utc)
+    fin_mes = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc)
+
     recordatorios_manuales = db.query(Evento).filter(
         Evento.usuario_dni == current_user.numero_de_dni,
         Evento.tipo == TipoEvento.RECORDATORIO,
-        extract('year', Evento.fecha_evento) == year,
-        extract('month', Evento.fecha_evento) == month
+        Evento.fecha_evento >= inicio_mes,
+        Evento.fecha_evento < fin_mes
     ).all()
     for evento in recordatorios_manuales:
         response_list.append(format_evento_response(evento, hoy))
@@ -95,7 +107,10 @@ async def get_eventos_del_mes(year: int, month: int, db: Session = Depends(get_d
     ).all()
     
     for animal in animales_del_mes:
-        cumple_fecha = animal.fecha_nacimiento.replace(year=year, tzinfo=timezone.utc)
+        nacimiento = animal.fecha_nacimiento
+        if nacimiento.month == 2 and nacimiento.day == 29 and not calendar.isleap(year):
+            nacimiento = nacimiento.replace(day=28)  # nacidos un 29 de febrero: el 28 en años no bisiestos
+        cumple_fecha = nacimiento.replace(year=year, tzinfo=timezone.utc)
         evento_temporal = Evento(id=0, fecha_evento=cumple_fecha, titulo=f"Aniv. Nacimiento: {animal.nombre}", tipo=TipoEvento.EVENTO, origen_tipo="ANIMAL_BIRTHDAY", es_completado=False)
         response_list.append(format_evento_response(evento_temporal, hoy))
         
@@ -111,7 +126,7 @@ async def get_recordatorios_activos(db: Session = Depends(get_db), current_user:
         Evento.usuario_dni == current_user.numero_de_dni,
         Evento.tipo == TipoEvento.RECORDATORIO,
         Evento.es_completado == False,
-        func.date(Evento.fecha_evento) >= hoy
+        Evento.fecha_evento >= datetime.combine(hoy, time(0, 0), tzinfo=timezone.utc)
     ).all()
     for recordatorio in recordatorios_manuales:
         response_list.append(format_evento_response(recordatorio, hoy))
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.routing import APIRoute
 import os
-import requests
 import json
+import httpx
 from dotenv import load_dotenv
 
+from src.utils import http_client
+
 load_dotenv()
 
 # --- Configuración ---
@@ -24,7 +26,7 @@ chatbot_router = APIRouter(
 user_states = {}
 
 # --- Función para enviar mensajes  ---
-def send_whatsapp_message(to: str, text: str):
+async def send_whatsapp_message(to: str, text: str):
     """
     Envía un mensaje de texto simple a un número de WhatsApp.
     """
@@ -39,12 +41,15 @@ def send_whatsapp_message(to: str, text: str):
         "text": {"body": text},
     }
     try:
-        response = requests.post(API_URL, headers=headers, json=payload)
+        response = await http_client.request("whatsapp", "POST", API_URL, headers=headers, json=payload)
         response.raise_for_status()
         print(f"Mensaje enviado a {to} exitosamente.")
         return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error al enviar mensaje de WhatsApp: {e.response.text if e.response else e}")
+    except httpx.HTTPStatusError as e:
+        print(f"Error al enviar mensaje de WhatsApp: {e.response.text}")
+        return None
+    except httpx.HTTPError as e:
+        print(f"Error al enviar mensaje de WhatsApp: {e}")
         return None
 
 # --- Lógica Principal del Chatbot ---
@@ -54,33 +59,35 @@ async def handle_message(message):
     state = user_states.get(sender_id, {'stage': 'inicio'})
 
     if state['stage'] == 'inicio' and text == '1':
-        send_whatsapp_message(sender_id, "Por favor, ingresa tu número de DNI:")
+        await send_whatsapp_message(sender_id, "Por favor, ingresa tu número de DNI:")
         user_states[sender_id] = {'stage': 'awaiting_login_dni'}
         
     elif state['stage'] == 'awaiting_login_dni':
         dni = text
-        send_whatsapp_message(sender_id, "Gracias. Ahora, ingresa tu contraseña:")
+        await send_whatsapp_message(sender_id, "Gracias. Ahora, ingresa tu contraseña:")
         user_states[sender_id] = {'stage': 'awaiting_login_password', 'dni': dni}
         
     elif state['stage'] == 'awaiting_login_password':
         password = text
         dni = state['dni']
         try:
-            response = requests.post("http://127.0.0.1:8000/api/auth/login", data={'username': dni, 'password': password})
+            response = await http_client.request(
+                "sniugb", "POST", "http://127.0.0.1:8000/api/auth/login", data={'username': dni, 'password': password}
+            )
             response.raise_for_status()
             token_data = response.json()
             user_states[sender_id] = {'stage': 'authenticated', 'token': token_data['access_token']}
-            send_whatsapp_message(sender_id, f"✅ ¡Bienvenido! Sesión iniciada.")
-            send_whatsapp_message(sender_id, "Menú Principal:\n1. Consultar animal por QR\n2. Registrar nuevo animal")
-        except requests.exceptions.HTTPError:
-            send_whatsapp_message(sender_id, "❌ DNI o contraseña incorrectos. Por favor, intenta de nuevo.")
+            await send_whatsapp_message(sender_id, f"✅ ¡Bienvenido! Sesión iniciada.")
+            await send_whatsapp_message(sender_id, "Menú Principal:\n1. Consultar animal por QR\n2. Registrar nuevo animal")
+        except httpx.HTTPStatusError:
+            await send_whatsapp_message(sender_id, "❌ DNI o contraseña incorrectos. Por favor, intenta de nuevo.")
             user_states[sender_id] = {'stage': 'inicio'}
-            send_whatsapp_message(sender_id, "Menú:\n1. Iniciar Sesión\n2. Registrarse")
+            await send_whatsapp_message(sender_id, "Menú:\n1. Iniciar Sesión\n2. Registrarse")
     
     else:
         user_states[sender_id] = {'stage': 'inicio'}
-        send_whatsapp_message(sender_id, "Bienvenido al Chatbot de SNIUGB. Responde con un número para elegir una opción:")
-        send_whatsapp_message(sender_id, "1. Iniciar Sesión\n2. Registrarse")
+        await send_whatsapp_message(sender_id, "Bienvenido al Chatbot de SNIUGB. Responde con un número para elegir una opción:")
+        await send_whatsapp_message(sender_id, "1. Iniciar Sesión\n2. Registrarse")
 
 
 # --- ENDPOINTS DEL WEBHOOK ---
@@ -1,11 +1,13 @@
 # src/api/dashboard.py
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.routing import APIRoute
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta, date, time
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func
+from datetime import datetime, timedelta, date, time, timezone
 
-from src.utils.security import get_current_user, get_db
+from src.utils.security import get_current_user_async, get_async_db, get_async_read_db
+from src.utils.query_stats import query_budget
 from src.models.database_models import (
     Usuario, Predio, Animal,
     EventoProduccion,
@@ -21,6 +23,19 @@ dashboard_router = APIRouter(
     route_class=APIRoute
 )
 
+async def _contar(db: AsyncSession, *condiciones, desde=None) -> int:
+    """SELECT count(*) con las condiciones dadas sobre `desde`."""
+    return (await db.execute(select(func.count()).select_from(desde).where(*condiciones))).scalar_one()
+
+async def _predio_del_usuario(db: AsyncSession, predio_codigo: str, dni: str) -> Predio:
+    predio = (await db.execute(select(Predio).where(
+        Predio.codigo_predio == predio_codigo,
+        Predio.propietario_dni == dni
+    ))).scalars().first()
+    if not predio:
+        raise HTTPException(status_code=404, detail="Predio no encontrado o no te pertenece.")
+    return predio
+
 def rango_por_periodo(periodo: str):
     today = date.today()
     if periodo == "hoy":
@@ -37,63 +52,68 @@ def rango_por_periodo(periodo: str):
 
 
 @dashboard_router.get("/{predio_codigo}/kpis", response_model=KPISchema)
+@query_budget(8)
 async def get_dashboard_kpis(
     predio_codigo: str,
     periodo: str = Query("hoy", enum=["hoy", "semana", "mes"]), 
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     # Verificación de pertenencia del predio
-    predio = db.query(Predio).filter(
-        Predio.codigo_predio == predio_codigo,
-        Predio.propietario_dni == current_user.numero_de_dni
-    ).first()
-    if not predio:
-        raise HTTPException(status_code=404, detail="Predio no encontrado o no te pertenece.")
+    await _predio_del_usuario(db, predio_codigo, current_user.numero_de_dni)
 
     start_dt, end_dt = rango_por_periodo(periodo)
 
     # KPI 1: Hato activo
-    total_hato = db.query(Animal).filter(
+    total_hato = await _contar(
+        db,
         Animal.predio_codigo == predio_codigo,
-        Animal.estado == "activo"
-    ).count()
+        Animal.estado == "activo",
+        desde=Animal,
+    )
 
     # KPI 2: Alertas (estado != SANO)
-    alertas_salud = db.query(Animal).filter(
+    alertas_salud = await _contar(
+        db,
         Animal.predio_codigo == predio_codigo,
-        Animal.condicion_salud.in_([AnimalCondicionSalud.ENFERMO, AnimalCondicionSalud.EN_OBSERVACION])
-    ).count()
+        Animal.condicion_salud.in_([AnimalCondicionSalud.ENFERMO, AnimalCondicionSalud.EN_OBSERVACION]),
+        desde=Animal,
+    )
 
     # KPI 3: Tareas (hoy)
     today = date.today()
-    tareas_para_hoy = db.query(Evento).filter(
+    tareas_para_hoy = await _contar(
+        db,
         Evento.usuario_dni == current_user.numero_de_dni,
         Evento.tipo == CalendarioEventoTipo.RECORDATORIO,
         Evento.es_completado == False,
-        func.date(Evento.fecha_evento) == today
-    ).count()
+        Evento.fecha_evento >= datetime.combine(today, time.min, tzinfo=timezone.utc),
+        Evento.fecha_evento < datetime.combine(today + timedelta(days=1), time.min, tzinfo=timezone.utc),
+        desde=Evento,
+    )
 
     # KPI 4: Producción por periodo (CARNE en kg, LECHE en litros)
-    prod_carne = db.query(func.sum(EventoProduccion.valor_cantidad)).join(Animal).filter(
+    prod_carne = (await db.execute(select(func.sum(EventoProduccion.valor_cantidad)).join(Animal).where(
         Animal.predio_codigo == predio_codigo,
         EventoProduccion.fecha_evento.between(start_dt, end_dt),
         EventoProduccion.tipo_evento == ProduccionTipo.CARNE,
         EventoProduccion.unidad_medida.in_(["kg","Kg","KG"])
-    ).scalar() or 0.0
+    ))).scalar() or 0.0
 
-    prod_leche = db.query(func.sum(EventoProduccion.valor_cantidad)).join(Animal).filter(
+    prod_leche = (await db.execute(select(func.sum(EventoProduccion.valor_cantidad)).join(Animal).where(
         Animal.predio_codigo == predio_codigo,
         EventoProduccion.fecha_evento.between(start_dt, end_dt),
         EventoProduccion.tipo_evento == ProduccionTipo.LECHE,
         EventoProduccion.unidad_medida.in_(["L","Lt","Lts","l"])
-    ).scalar() or 0.0
+    ))).scalar() or 0.0
 
     # KPI 5: Transferencias pendientes recibidas
-    solicitudes_transferencia = db.query(Transferencia).filter(
+    solicitudes_transferencia = await _contar(
+        db,
         Transferencia.receptor_dni == current_user.numero_de_dni,
-        Transferencia.estado == TransferenciaEstado.PENDIENTE
-    ).count()
+        Transferencia.estado == TransferenciaEstado.PENDIENTE,
+        desde=Transferencia,
+    )
 
     return {
         "total_hato": total_hato,
@@ -105,19 +125,15 @@ async def get_dashboard_kpis(
     }
 
 @dashboard_router.get("/{predio_codigo}/tabla")
+@query_budget(5)
 async def get_tabla_dashboard(
     predio_codigo: str,
     tipo: str = Query(..., pattern="^(hato|alertas|tareas|produccion|transferencias)$"),
     periodo: str | None = Query(None, pattern="^(hoy|semana|mes)$"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    predio = db.query(Predio).filter(
-        Predio.codigo_predio == predio_codigo,
-        Predio.propietario_dni == current_user.numero_de_dni
-    ).first()
-    if not predio:
-        raise HTTPException(status_code=404, detail="Predio no encontrado o no te pertenece.")
+    await _predio_del_usuario(db, predio_codigo, current_user.numero_de_dni)
 
     def rango(periodo_str: str | None):
         if not periodo_str:
@@ -127,10 +143,10 @@ async def get_tabla_dashboard(
     start_dt, end_dt = rango(periodo)
 
     if tipo == "hato":
-        animales = db.query(Animal).filter(
+        animales = (await db.execute(select(Animal).where(
             Animal.predio_codigo == predio_codigo,
             Animal.estado == "activo"
-        ).all()
+        ).options(selectinload(Animal.raza)))).scalars().all()
         return [{
             "cui": a.cui,
             "nombre": a.nombre,
@@ -142,11 +158,11 @@ async def get_tabla_dashboard(
         } for a in animales]
 
     if tipo == "alertas":
-        animales = db.query(Animal).filter(
+        animales = (await db.execute(select(Animal).where(
             Animal.predio_codigo == predio_codigo,
             Animal.estado == "activo",
             Animal.condicion_salud.in_([AnimalCondicionSalud.ENFERMO, AnimalCondicionSalud.EN_OBSERVACION])
-        ).all()
+        ).options(selectinload(Animal.raza)))).scalars().all()
         return [{
             "cui": a.cui,
             "nombre": a.nombre,
@@ -158,12 +174,12 @@ async def get_tabla_dashboard(
         } for a in animales]
 
     if tipo == "tareas":
-        eventos = db.query(Evento).filter(
+        eventos = (await db.execute(select(Evento).where(
             Evento.usuario_dni == current_user.numero_de_dni,
             Evento.tipo == CalendarioEventoTipo.RECORDATORIO,
             Evento.es_completado == False,
             Evento.fecha_evento.between(start_dt, end_dt)
-        ).order_by(Evento.fecha_evento.desc()).all()
+        ).order_by(Evento.fecha_evento.desc()))).scalars().all()
         return [{
             "fecha_evento": e.fecha_evento.isoformat() if e.fecha_evento else None,
             "titulo": e.titulo,
@@ -171,10 +187,10 @@ async def get_tabla_dashboard(
         } for e in eventos]
 
     if tipo == "produccion":
-        eventos = db.query(EventoProduccion).join(Animal).filter(
+        eventos = (await db.execute(select(EventoProduccion).join(Animal).where(
             Animal.predio_codigo == predio_codigo,
             EventoProduccion.fecha_evento.between(start_dt, end_dt)
-        ).order_by(EventoProduccion.fecha_evento.desc()).all()
+        ).order_by(EventoProduccion.fecha_evento.desc()))).scalars().all()
         return [{
             "fecha_evento": ep.fecha_evento.isoformat() if ep.fecha_evento else None,
             "animal_cui": ep.animal_cui,
@@ -184,10 +200,13 @@ async def get_tabla_dashboard(
         } for ep in eventos]
 
     if tipo == "transferencias":
-        pendientes = db.query(Transferencia).filter(
+        pendientes = (await db.execute(select(Transferencia).where(
             Transferencia.receptor_dni == current_user.numero_de_dni,
             Transferencia.estado == TransferenciaEstado.PENDIENTE
-        ).order_by(Transferencia.fecha_solicitud.desc()).all()
+        ).order_by(Transferencia.fecha_solicitud.desc()).options(
+            selectinload(Transferencia.solicitante),
+            selectinload(Transferencia.animales),
+        ))).scalars().all()
         return [{
             "id": t.id,
             "solicitante": t.solicitante.nombre_completo if getattr(t, "solicitante", None) else t.solicitante_dni,
@@ -1,11 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRoute
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import delete, select, update
 from typing import List
 
-from src.utils.security import get_current_user, get_db
-from src.models.database_models import Usuario, Notificacion, Transferencia
-from src.models.notificacion_models import NotificacionResponse, NotificacionDetailResponse
+from src.config.database import AsyncSessionLocal
+from src.services.notificaciones_stream import RESYNC, StreamSaturado, Suscripcion, difusor
+from src.utils.metrics import SSE_EVENTS
+from src.utils.security import decode_token, get_current_user_async, get_async_db, oauth2_scheme
+from src.utils.query_stats import query_budget
+from src.models.database_models import Usuario, Notificacion, NotificacionContador, Transferencia, Animal
+from src.models.notificacion_models import (
+    NotificacionResponse, NotificacionDetailResponse, MarcarLeidasSchema, OperacionMasivaResponse
+)
 
 notificaciones_router = APIRouter(
     prefix="/notificaciones",
@@ -13,44 +28,215 @@ notificaciones_router = APIRouter(
     route_class=APIRoute
 )
 
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "5000"))
+# Tope de vida del stream (además de la expiración del access token): reparte las
+# conexiones entre workers tras un deploy y vuelve a validar la sesión al reconectar.
+SSE_MAX_SECONDS = float(os.getenv("SSE_MAX_SECONDS", "1800"))
+# Días de la ventana "reciente" de la bandeja (≈ particiones mensuales que toca la 1.ª consulta)
+LIST_WINDOW_DAYS = int(os.getenv("NOTIFICACIONES_LIST_WINDOW_DAYS", "62"))
+
+
+async def _contar_no_leidas(db: AsyncSession, dni: str) -> int:
+    # Lectura por PK del contador que mantienen los triggers (no un COUNT sobre el historial)
+    no_leidas = (await db.execute(
+        select(NotificacionContador.no_leidas).where(NotificacionContador.usuario_dni == dni)
+    )).scalar()
+    return max(no_leidas or 0, 0)
+
+def consulta_listado(dni: str, solo_no_leidas: bool = False, desde: datetime | None = None, antes_de: datetime | None = None):
+    """Bandeja del usuario, de la más reciente a la más antigua, opcionalmente acotada por fecha."""
+    q = select(Notificacion).where(Notificacion.usuario_dni == dni)
+    if solo_no_leidas:
+        q = q.where(Notificacion.leida == False)
+    if desde is not None:
+        q = q.where(Notificacion.fecha_creacion >= desde)
+    if antes_de is not None:
+        q = q.where(Notificacion.fecha_creacion < antes_de)
+    return q.order_by(Notificacion.fecha_creacion.desc())
+
 @notificaciones_router.get("", response_model=list[NotificacionResponse])
+@query_budget(3)
 async def listar_notificaciones(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     solo_no_leidas: bool = Query(False),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    q = db.query(Notificacion).filter(Notificacion.usuario_dni == current_user.numero_de_dni)
-    if solo_no_leidas:
-        q = q.filter(Notificacion.leida == False)
-    items = q.order_by(Notificacion.fecha_creacion.desc()).offset(offset).limit(limit).all()
+    # Primero la ventana reciente: con el filtro por fecha_creacion el planner poda las
+    # particiones viejas. Si la ventana llena la página, el resultado es el mismo que sin ella.
+    dni = current_user.numero_de_dni
+    desde = datetime.now(timezone.utc) - timedelta(days=LIST_WINDOW_DAYS)
+    items = (await db.execute(
+        consulta_listado(dni, solo_no_leidas, desde=desde).offset(offset).limit(limit)
+    )).scalars().all()
+    if len(items) < limit:
+        if offset == 0:
+            # La ventana tenía exactamente len(items) filas: se completa con las anteriores
+            items += (await db.execute(
+                consulta_listado(dni, solo_no_leidas, antes_de=desde).limit(limit - len(items))
+            )).scalars().all()
+        else:
+            items = (await db.execute(
+                consulta_listado(dni, solo_no_leidas).offset(offset).limit(limit)
+            )).scalars().all()
     return items
 
 @notificaciones_router.get("/contador-no-leidas")
+@query_budget(2)
 async def get_contador_notificaciones_no_leidas(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    count = await _contar_no_leidas(db, current_user.numero_de_dni)
+    return {"no_leidas": count}
+
+
+def _sse(evento: str, datos: dict, id_evento=None) -> str:
+    SSE_EVENTS.labels(evento=evento).inc()
+    cabecera = f"id: {id_evento}\n" if id_evento is not None else ""
+    return f"{cabecera}event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _eventos(request: Request, sub: Suscripcion, no_leidas: int, vence: float):
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        yield _sse("contador", {"no_leidas": no_leidas})
+        while True:
+            restante = vence - time.monotonic()
+            if restante <= 0:
+                break  # el cliente reconecta (con un token vigente)
+            try:
+                evento = await asyncio.wait_for(sub.cola.get(), timeout=min(SSE_HEARTBEAT_SECONDS, restante))
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+
+            # Se drena lo acumulado y el contador se recalcula una sola vez por lote
+            lote = [evento]
+            while not sub.cola.empty():
+                lote.append(sub.cola.get_nowait())
+            for ev in lote:
+                if ev is RESYNC:
+                    yield _sse("resync", {})
+                elif ev.get("evento") == "nueva":
+                    datos = {k: ev.get(k) for k in ("id", "mensaje", "link", "leida", "fecha_creacion")}
+                    yield _sse("notificacion", datos, id_evento=ev.get("id"))
+                else:
+                    yield _sse(ev.get("evento", "actualizadas"), {"ids": ev.get("ids")})
+            async with AsyncSessionLocal() as db:
+                no_leidas = await _contar_no_leidas(db, sub.dni)
+            yield _sse("contador", {"no_leidas": no_leidas})
+    finally:
+        difusor.desuscribir(sub)
+
+
+@notificaciones_router.get("/stream")
+async def stream_notificaciones(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    """
+    Stream SSE (text/event-stream) que reemplaza el polling de la lista y del contador.
+
+    Eventos: `contador` (al conectar y tras cada cambio), `notificacion` (nueva),
+    `actualizadas` / `eliminadas` (ids, o null si fueron muchas), `resync` (recargar
+    por REST: se perdieron eventos) y comentarios `: ping` cada SSE_HEARTBEAT_SECONDS.
+    El stream se cierra al expirar el access token. Si responde 503 (tope de
+    conexiones), el cliente sigue con polling de los endpoints REST.
+    """
+    dni = current_user.numero_de_dni
+    try:
+        sub = difusor.suscribir(dni)
+    except StreamSaturado:
+        raise HTTPException(
+            status_code=503,
+            detail="Demasiadas conexiones en tiempo real; usa la consulta periódica.",
+            headers={"Retry-After": "30"},
+        )
+    try:
+        # Suscrito antes de contar: un cambio entre ambos pasos llega como evento
+        no_leidas = await _contar_no_leidas(db, dni)
+    except Exception:
+        difusor.desuscribir(sub)
+        raise
+    await db.close()  # no retener una conexión del pool mientras dure el stream
+
+    exp = (decode_token(token) or {}).get("exp", 0)
+    vence = time.monotonic() + max(0.0, min(SSE_MAX_SECONDS, exp - time.time()))
+    return StreamingResponse(
+        _eventos(request, sub, no_leidas, vence),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Operaciones masivas (una sentencia; los triggers ajustan contador y stream) ---
+
+@notificaciones_router.patch("/leidas", response_model=OperacionMasivaResponse)
+@query_budget(2)
+async def marcar_notificaciones_leidas(
+    datos: MarcarLeidasSchema | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    count = db.query(Notificacion).filter(
+    """Marca como leídas todas las notificaciones del usuario, o las creadas hasta `hasta`."""
+    inicio = time.perf_counter()
+    q = update(Notificacion).where(
         Notificacion.usuario_dni == current_user.numero_de_dni,
         Notificacion.leida == False
-    ).count()
-    return {"no_leidas": count}
+    )
+    if datos and datos.hasta:
+        q = q.where(Notificacion.fecha_creacion <= datos.hasta)
+    afectadas = (await db.execute(
+        q.values(leida=True).execution_options(synchronize_session=False)
+    )).rowcount
+    await db.commit()
+    return {"afectadas": afectadas, "duracion_ms": round((time.perf_counter() - inicio) * 1000, 2)}
+
+@notificaciones_router.delete("", response_model=OperacionMasivaResponse)
+@query_budget(2)
+async def eliminar_notificaciones(
+    hasta: datetime = Query(..., description="Elimina las creadas hasta este instante (inclusive)."),
+    desde: datetime | None = Query(None, description="Límite inferior opcional del rango."),
+    solo_leidas: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    """Elimina las notificaciones del usuario en un rango de fechas de creación."""
+    if desde and desde > hasta:
+        raise HTTPException(status_code=400, detail="`desde` no puede ser posterior a `hasta`.")
+    inicio = time.perf_counter()
+    q = delete(Notificacion).where(
+        Notificacion.usuario_dni == current_user.numero_de_dni,
+        Notificacion.fecha_creacion <= hasta
+    )
+    if desde:
+        q = q.where(Notificacion.fecha_creacion >= desde)
+    if solo_leidas:
+        q = q.where(Notificacion.leida == True)
+    afectadas = (await db.execute(q.execution_options(synchronize_session=False))).rowcount
+    await db.commit()
+    return {"afectadas": afectadas, "duracion_ms": round((time.perf_counter() - inicio) * 1000, 2)}
 
 @notificaciones_router.get("/{notificacion_id}", response_model=NotificacionDetailResponse)
+@query_budget(5)
 async def get_notificacion_detail(
     notificacion_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     """
     Obtiene el detalle completo de una notificación específica y la marca como leída.
     """
-    notificacion = db.query(Notificacion).filter(
+    notificacion = (await db.execute(select(Notificacion).where(
         Notificacion.id == notificacion_id,
         Notificacion.usuario_dni == current_user.numero_de_dni
-    ).first()
+    ))).scalars().first()
 
     if notificacion is None:
         raise HTTPException(status_code=404, detail="Notificación no encontrada.")
@@ -62,7 +248,11 @@ async def get_notificacion_detail(
     if notificacion.link and "/transferencias/" in notificacion.link:
         try:
             transferencia_id = int(notificacion.link.split("/")[-1])
-            transferencia = db.query(Transferencia).filter(Transferencia.id == transferencia_id).first()
+            transferencia = (await db.execute(
+                select(Transferencia)
+                .where(Transferencia.id == transferencia_id)
+                .options(selectinload(Transferencia.animales).selectinload(Animal.raza))
+            )).scalars().first()
             if transferencia:
                 response_data.detalles_transferencia = transferencia
         except (ValueError, IndexError):
@@ -73,17 +263,16 @@ async def get_notificacion_detail(
 @notificaciones_router.patch("/{notificacion_id}", response_model=NotificacionDetailResponse)
 async def marcar_notificacion_leida(
     notificacion_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    notificacion = db.query(Notificacion).filter(
+    notificacion = (await db.execute(select(Notificacion).where(
         Notificacion.id == notificacion_id,
         Notificacion.usuario_dni == current_user.numero_de_dni
-    ).first()
+    ))).scalars().first()
     if not notificacion:
         raise HTTPException(status_code=404, detail="Notificación no encontrada.")
     if not notificacion.leida:
         notificacion.leida = True
-        db.commit()
-        db.refresh(notificacion)
+        await db.commit()
     return NotificacionDetailResponse.model_validate(notificacion)
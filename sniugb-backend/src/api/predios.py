@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from fastapi.routing import APIRoute
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func
 from typing import List, Optional
 
-from src.utils.security import get_current_user, get_db
+from src.utils.security import get_current_user_async, get_async_db
+from src.utils.query_stats import query_budget
 from src.models.database_models import Usuario, Predio, Animal, Raza, generate_predio_code
 from src.models.predio_models import PredioCreateSchema, PredioResponseSchema
-from src.models.animal_models import AnimalCreateSchema, AnimalResponseSchema
+from src.models.animal_models import AnimalCreateSchema, AnimalResponseSchema, ImportacionAnimalesResponseSchema
 from src.services.animal_service import generar_nuevo_cui
+from src.services.importacion_service import MAX_BYTES, importar_animales
 
 predios_router = APIRouter(
     prefix="/predios",
@@ -19,14 +22,14 @@ predios_router = APIRouter(
 @predios_router.post("/", response_model=PredioResponseSchema, status_code=status.HTTP_201_CREATED)
 async def create_predio(
     predio_data: PredioCreateSchema,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     """Crea un nuevo predio para el usuario autenticado, asegurando un código único."""
     
     while True:
         codigo_unico = generate_predio_code()
-        predio_existente = db.query(Predio).filter(Predio.codigo_predio == codigo_unico).first()
+        predio_existente = await db.get(Predio, codigo_unico)
         if not predio_existente:
             break
 
@@ -38,63 +41,70 @@ async def create_predio(
         propietario_dni=current_user.numero_de_dni
     )
     db.add(new_predio)
-    db.commit()
-    db.refresh(new_predio)
+    await db.commit()
     return new_predio
 
 @predios_router.get("/me", response_model=List[PredioResponseSchema])
+@query_budget(3)
 async def get_my_predios(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     """Obtiene la lista de todos los predios del usuario autenticado."""
-    return db.query(Predio).filter(Predio.propietario_dni == current_user.numero_de_dni).all()
+    return (await db.execute(
+        select(Predio).where(Predio.propietario_dni == current_user.numero_de_dni)
+    )).scalars().all()
 
 @predios_router.delete("/{codigo_predio}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_predio(
     codigo_predio: str,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     """Elimina un predio, solo si no tiene animales registrados."""
-    predio = db.query(Predio).filter(Predio.codigo_predio == codigo_predio, Predio.propietario_dni == current_user.numero_de_dni).first()
+    predio = (await db.execute(
+        select(Predio).where(Predio.codigo_predio == codigo_predio, Predio.propietario_dni == current_user.numero_de_dni)
+    )).scalars().first()
     
     if not predio:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Predio no encontrado.")
     
-    animal_count = db.query(Animal).filter(Animal.predio_codigo == codigo_predio, Animal.estado == "activo").count()
+    animal_count = (await db.execute(
+        select(func.count()).select_from(Animal).where(Animal.predio_codigo == codigo_predio, Animal.estado == "activo")
+    )).scalar_one()
     if animal_count > 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No se puede eliminar el predio porque tiene {animal_count} animales activos registrados.")
         
-    db.delete(predio)
-    db.commit()
+    await db.delete(predio)
+    await db.commit()
     return None
 
 @predios_router.get("/{codigo_predio}/animales", response_model=List[AnimalResponseSchema])
+@query_budget(4)
 async def get_animales_by_predio(
     codigo_predio: str,
     estado: Optional[str] = Query("activo", enum=["activo", "en_papelera"]),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     """
     Obtiene la lista de animales de un predio específico,
     filtrando por estado ('activo' o 'en_papelera').
     """
     # 1. Verificar que el predio le pertenece al usuario
-    predio = db.query(Predio).filter(
+    predio = (await db.execute(select(Predio).where(
         Predio.codigo_predio == codigo_predio,
         Predio.propietario_dni == current_user.numero_de_dni
-    ).first()
+    ))).scalars().first()
 
     if not predio:
         raise HTTPException(status_code=404, detail="Predio no encontrado o no te pertenece.")
 
     # 2. Consultar animales basado en el predio y el estado solicitado
-    animales = db.query(Animal).filter(
+    animales = (await db.execute(select(Animal).where(
         Animal.predio_codigo == codigo_predio,
         Animal.estado == estado
-    ).all()
+    ).options(selectinload(Animal.raza)))).scalars().all()
 
     return animales
 
@@ -103,25 +113,30 @@ async def get_animales_by_predio(
 async def create_animal_in_predio(
     codigo_predio: str,
     animal_data: AnimalCreateSchema,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     """Crea un nuevo animal en un predio específico del usuario."""
     # 1. Verificar que el predio le pertenece al usuario
-    predio = db.query(Predio).filter(
+    predio = (await db.execute(select(Predio).where(
         Predio.codigo_predio == codigo_predio,
         Predio.propietario_dni == current_user.numero_de_dni
-    ).first()
+    ))).scalars().first()
 
     if not predio:
         raise HTTPException(status_code=404, detail="El predio especificado no existe o no te pertenece.")
     
-    raza_obj = db.query(Raza).filter(func.upper(Raza.nombre) == animal_data.raza.upper()).first()
+    raza_obj = (await db.execute(
+        select(Raza).where(func.upper(Raza.nombre) == animal_data.raza.upper())
+    )).scalars().first()
     if not raza_obj:
         raise HTTPException(status_code=400, detail=f"La raza '{animal_data.raza}' no es válida.")
 
     try:
-        nuevo_cui = generar_nuevo_cui(db=db, departamento_nombre=predio.departamento, raza_nombre=animal_data.raza)
+        # El servicio es síncrono: se ejecuta sobre la misma conexión vía run_sync.
+        nuevo_cui = await db.run_sync(
+            lambda s: generar_nuevo_cui(db=s, departamento_nombre=predio.departamento, raza_nombre=animal_data.raza)
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -137,9 +152,41 @@ async def create_animal_in_predio(
     
     try:
         db.add(new_animal)
-        db.commit()
-        db.refresh(new_animal)
+        await db.commit()
         return new_animal
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al registrar el animal: {e}")
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al registrar el animal: {e}")
+
+
+@predios_router.post("/{codigo_predio}/animales/importar", response_model=ImportacionAnimalesResponseSchema)
+async def importar_animales_en_predio(
+    codigo_predio: str,
+    archivo: UploadFile = File(..., description="CSV o XLSX con columnas nombre, raza, sexo, fecha_nacimiento, peso"),
+    parcial: bool = Query(False, description="Insertar las filas válidas aunque otras tengan errores"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    """
+    Registra el hato completo de un predio desde una planilla. Devuelve el CUI
+    asignado a cada fila y los errores por fila; si hay errores y no se pidió
+    `parcial`, no se inserta ningún animal.
+    """
+    predio = (await db.execute(select(Predio).where(
+        Predio.codigo_predio == codigo_predio,
+        Predio.propietario_dni == current_user.numero_de_dni
+    ))).scalars().first()
+    if not predio:
+        raise HTTPException(status_code=404, detail="El predio especificado no existe o no te pertenece.")
+
+    if archivo.size is not None and archivo.size > MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"El archivo supera el máximo de {MAX_BYTES // (1024 * 1024)} MB.")
+
+    try:
+        return await importar_animales(db, predio, archivo.file, archivo.filename, parcial=parcial)
+    except ValueError as e:  # incluye ArchivoInvalido
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al importar los animales: {e}")
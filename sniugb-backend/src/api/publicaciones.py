@@ -2,7 +2,7 @@ import bleach
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import desc
-from src.utils.security import get_db
+from src.utils.security import get_db, get_read_db
 from src.models import database_models as models
 from src.models.admin_models import ArticulosResponse, ArticuloSchema 
 
@@ -31,7 +31,7 @@ def get_articulos_recientes(db: Session = Depends(get_db)):
 
 @publicaciones_router.get("/", response_model=ArticulosResponse)
 def get_publicaciones(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     limit: int = Query(6, ge=1),
     categoria_id: int | None = Query(None)
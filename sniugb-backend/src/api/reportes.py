@@ -3,10 +3,9 @@ from fastapi.routing import APIRoute
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.inspection import inspect
-import pandas as pd
 import io
 
-from src.utils.security import get_current_user, get_db
+from src.utils.security import get_current_user, get_read_db
 from src.models.database_models import (
     Usuario, Animal, EventoSanitario, 
     EventoProduccion, InventarioItem, Predio
@@ -29,7 +28,7 @@ TABLAS_MAP = {
 @reportes_router.post("/generar")
 async def generar_reporte(
     reporte_data: ReporteCreateSchema,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
@@ -85,6 +84,8 @@ async def generar_reporte(
     if reporte_data.formato == 'json':
         return data_list
     
+    import pandas as pd  # import diferido: solo los formatos csv/xlsx lo necesitan
+
     df = pd.DataFrame(data_list)
     
     if reporte_data.formato == 'csv':
@@ -7,7 +7,7 @@ import os
 from src.utils.security import get_current_user, get_db
 from src.models.database_models import Usuario, ContenidoAyuda, SolicitudSoporte, UserRole
 from src.models.soporte_models import ContenidoAyudaResponseSchema, SolicitudSoporteCreateSchema
-from src.services.notification_service import send_new_support_ticket_notification
+from src.services.notification_service import enqueue_new_support_ticket_notification
 
 soporte_router = APIRouter(
     prefix="/soporte",
@@ -37,16 +37,18 @@ async def create_solicitud_soporte(
         usuario_dni=current_user.numero_de_dni
     )
     db.add(nueva_solicitud)
-    db.commit()
-    
+
+    # El aviso al administrador va al outbox en la misma transacción (lo envía el despachador)
     admin_email = os.getenv("SUPPORT_EMAIL_ADDRESS")
     if admin_email:
-        send_new_support_ticket_notification(
+        enqueue_new_support_ticket_notification(
+            db,
             admin_email=admin_email,
             user_name=current_user.nombre_completo,
             user_dni=current_user.numero_de_dni,
             ticket_category=solicitud_data.categoria,
             ticket_message=solicitud_data.mensaje
         )
-    
+    db.commit()
+
     return {"message": "Tu solicitud de soporte ha sido enviada con éxito."}
\ No newline at end of file
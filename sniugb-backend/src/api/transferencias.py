@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.routing import APIRoute
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 
 from src.utils.security import get_current_user, get_db
@@ -9,7 +9,8 @@ from src.models.database_models import (
     TransferenciaEstado, Notificacion, TransferenciaAnimal
 )
 from src.models.transferencia_models import TransferenciaCreateSchema, TransferenciaResponseSchema, TransferenciaApproveSchema
-from src.services.notification_service import send_transfer_request_email, send_transfer_request_whatsapp
+from src.services.notification_service import enqueue_transfer_request_email, enqueue_transfer_request_whatsapp
+from src.utils.query_stats import query_budget
 
 transferencias_router = APIRouter(
     prefix="/transferencias",
@@ -17,7 +18,15 @@ transferencias_router = APIRouter(
     route_class=APIRoute
 )
 
+# Carga en bloque de lo que serializa TransferenciaResponseSchema (animales -> raza):
+# evita una consulta por animal al construir la respuesta.
+_CARGA_RESPUESTA = selectinload(Transferencia.animales).selectinload(Animal.raza)
+
+# 13 = usuario (si no está en principal_cache) + predio destino + pendientes + animales y sus
+# predios + receptor + INSERT transferencia/asociación/notificación + outbox (ambos mensajes
+# en un solo INSERT multi-fila) + recarga de la respuesta (transferencia, animales, razas)
 @transferencias_router.post("/solicitar", response_model=TransferenciaResponseSchema, status_code=status.HTTP_201_CREATED)
+@query_budget(13)
 async def solicitar_transferencia(
     request: TransferenciaCreateSchema,
     db: Session = Depends(get_db),
@@ -51,7 +60,9 @@ async def solicitar_transferencia(
             detail=f"No se puede crear la solicitud. Los siguientes animales ya están en una transferencia pendiente: {', '.join(cuis_bloqueados)}"
         )
     
-    animales_a_transferir = db.query(Animal).filter(Animal.cui.in_(request.animal_cuis)).all()
+    animales_a_transferir = db.query(Animal).options(
+        selectinload(Animal.predio)
+    ).filter(Animal.cui.in_(request.animal_cuis)).all()
     if len(animales_a_transferir) != len(set(request.animal_cuis)):
         raise HTTPException(status_code=404, detail="Uno o más CUIs de animales no fueron encontrados.")
     
@@ -66,8 +77,10 @@ async def solicitar_transferencia(
         if animal.estado != "activo":
             raise HTTPException(status_code=400, detail=f"El animal {animal.cui} no está activo y no puede ser transferido.")
 
+    solicitante_nombre = current_user.nombre_completo
+    receptor = db.query(Usuario).filter(Usuario.numero_de_dni == receptor_dni).first()
     try:
-        # 1. Crear y guardar la solicitud de transferencia PRIMERO
+        # 1. Crear la solicitud y hacer flush para obtener su ID sin cerrar la transacción
         nueva_solicitud = Transferencia(
             solicitante_dni=current_user.numero_de_dni,
             receptor_dni=receptor_dni,
@@ -75,47 +88,55 @@ async def solicitar_transferencia(
             animales=animales_a_transferir
         )
         db.add(nueva_solicitud)
-        db.commit()
-        db.refresh(nueva_solicitud) # Ahora 'nueva_solicitud.id' tiene un valor
+        db.flush()
 
-        # 2. Crear la notificación AHORA que tenemos el ID
+        # 2. Crear la notificación en la misma transacción: se guardan juntas o ninguna
         nueva_notificacion = Notificacion(
             usuario_dni=receptor_dni,
-            mensaje=f"Has recibido una solicitud de transferencia de {current_user.nombre_completo} para {len(nueva_solicitud.animales)} animal(es).",
-            link=f"/transferencias/{nueva_solicitud.id}" # <-- Ahora esto funcionará
+            mensaje=f"Has recibido una solicitud de transferencia de {solicitante_nombre} para {len(animales_a_transferir)} animal(es).",
+            link=f"/transferencias/{nueva_solicitud.id}"
         )
         db.add(nueva_notificacion)
+
+        # 3. Email/WhatsApp al outbox, también en la misma transacción: el despachador
+        #    los envía en segundo plano y la petición no espera a SendGrid ni a WhatsApp.
+        if receptor:
+            enqueue_transfer_request_email(
+                db,
+                to_email=receptor.email,
+                solicitante_nombre=solicitante_nombre,
+                codigo=nueva_solicitud.codigo_confirmacion,
+                animales=animales_a_transferir
+            )
+            enqueue_transfer_request_whatsapp(
+                db,
+                to_phone=receptor.telefono,
+                solicitante_nombre=solicitante_nombre,
+                codigo=nueva_solicitud.codigo_confirmacion,
+                animales=animales_a_transferir
+            )
+        solicitud_id = nueva_solicitud.id
         db.commit()
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al crear la solicitud: {e}")
     
-    receptor = db.query(Usuario).filter(Usuario.numero_de_dni == receptor_dni).first()
-    if receptor:
-        send_transfer_request_email(
-            to_email=receptor.email, 
-            solicitante_nombre=current_user.nombre_completo,
-            codigo=nueva_solicitud.codigo_confirmacion,
-            animales=nueva_solicitud.animales
-        )
-        send_transfer_request_whatsapp(
-            to_phone=receptor.telefono,
-            solicitante_nombre=current_user.nombre_completo,
-            codigo=nueva_solicitud.codigo_confirmacion,
-            animales=nueva_solicitud.animales
-        )
+    nueva_solicitud = db.query(Transferencia).options(_CARGA_RESPUESTA).filter(
+        Transferencia.id == solicitud_id
+    ).first()
 
     return nueva_solicitud
 
 @transferencias_router.post("/aprobar", response_model=TransferenciaResponseSchema)
+@query_budget(9)
 async def aprobar_transferencia(
     request: TransferenciaApproveSchema,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """Aprueba una solicitud de transferencia usando el código de transferencia y el código de verificación."""
-    solicitud = db.query(Transferencia).filter(
+    solicitud = db.query(Transferencia).options(_CARGA_RESPUESTA).filter(
         Transferencia.codigo_transferencia == request.codigo_transferencia,
         Transferencia.receptor_dni == current_user.numero_de_dni
     ).first()
@@ -132,15 +153,18 @@ async def aprobar_transferencia(
     solicitud.estado = TransferenciaEstado.APROBADA
     for animal in solicitud.animales:
         animal.predio_codigo = solicitud.predio_destino_codigo
-    
+
+    solicitud_id = solicitud.id
     db.commit()
-    db.refresh(solicitud)
-    return solicitud
+    return db.query(Transferencia).options(_CARGA_RESPUESTA).filter(
+        Transferencia.id == solicitud_id
+    ).first()
 
 @transferencias_router.get("/me", response_model=List[TransferenciaResponseSchema])
+@query_budget(5)
 async def get_mis_transferencias(db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_user)):
     """Obtiene las solicitudes de transferencia enviadas y recibidas por el usuario."""
-    solicitudes = db.query(Transferencia).filter(
+    solicitudes = db.query(Transferencia).options(_CARGA_RESPUESTA).filter(
         (Transferencia.solicitante_dni == current_user.numero_de_dni) |
         (Transferencia.receptor_dni == current_user.numero_de_dni)
     ).order_by(Transferencia.fecha_solicitud.desc()).all()
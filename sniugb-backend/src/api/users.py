@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.routing import APIRoute
 from sqlalchemy.orm import Session
 
-from src.utils.security import get_current_user, get_db, verify_password, get_password_hash
+from src.utils.security import get_current_user, get_db, verify_password_async, get_password_hash_async
+from src.utils import principal_cache
 from src.models.database_models import Usuario
 from src.models.user_models import UserResponseSchema, UserUpdateProfileSchema, UserUpdatePasswordSchema
 
@@ -36,6 +37,7 @@ async def update_user_profile(
     
     try:
         db.commit()
+        principal_cache.invalidar(current_user.numero_de_dni)
         db.refresh(current_user)
         return current_user
     except Exception as e:
@@ -56,14 +58,15 @@ async def update_user_password(
     Requiere la contraseña actual para verificación.
     """
     # 1. Verificar que la contraseña actual es correcta
-    if not verify_password(password_data.current_password, current_user.password):
+    if not await verify_password_async(password_data.current_password, current_user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="La contraseña actual es incorrecta.")
         
     # 2. Encriptar la nueva contraseña
-    new_hashed_password = get_password_hash(password_data.new_password)
+    new_hashed_password = await get_password_hash_async(password_data.new_password)
     
     # 3. Actualizar en la base de datos
     current_user.password = new_hashed_password
     db.commit()
+    principal_cache.invalidar(current_user.numero_de_dni)
     
     return {"message": "Contraseña actualizada exitosamente."}
\ No newline at end of file
@@ -31,7 +31,7 @@ async def consulta_dni(
     if not dni or not dni.isdigit() or len(dni) != 8:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El DNI debe tener 8 dígitos numéricos.")
 
-    data = get_data_from_reniec(dni)
+    data = await get_data_from_reniec(dni)
 
     if data and data.get("nombre_completo"):
         return {"nombre": data["nombre_completo"]}
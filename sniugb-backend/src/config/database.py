@@ -1,8 +1,12 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool  # 👈 importa NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from dotenv import load_dotenv
 import os
+import time
+
+from src.utils.metrics import DB_POOL_CHECKOUT_SECONDS, instrument_pool
 
 load_dotenv()
 
@@ -17,12 +21,113 @@ DATABASE_URL = (
     f"postgresql+psycopg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?sslmode={DB_SSLMODE}"
 )
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    poolclass=NullPool,
-    connect_args={"prepare_threshold": None},
-)
+# --- Pool de conexiones ---
+# DB_POOL_MODE:
+#   "queue"     -> pool propio contra Postgres directo (reutiliza conexiones TLS).
+#   "pgbouncer" -> pool propio detrás de PgBouncer en modo transacción:
+#                  sin prepared statements del lado servidor.
+#   "null"      -> sin pool: una conexión nueva por sesión (comportamiento anterior).
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # segundos
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+if DB_POOL_MODE not in ("queue", "pgbouncer", "null"):
+    raise ValueError(f"DB_POOL_MODE inválido: {DB_POOL_MODE!r} (queue | pgbouncer | null)")
+
+
+def timed_pool_class(base, etiqueta: str):
+    """
+    Devuelve una subclase de `base` que registra en Prometheus el tiempo de espera
+    de cada checkout. Se usa una subclase (y no un atributo de instancia) porque
+    `dispose()` recrea el pool a partir de su clase.
+    """
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return base._do_get(self)
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(pool=etiqueta).observe(time.perf_counter() - inicio)
+
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def engine_options(pool_base=QueuePool, etiqueta: str = "primary") -> dict:
+    """Argumentos de create_engine según DB_POOL_MODE."""
+    opciones: dict = {"echo": False, "pool_pre_ping": DB_POOL_PRE_PING}
+    if DB_POOL_MODE == "null":
+        opciones.update(poolclass=NullPool, connect_args={"prepare_threshold": None})
+        return opciones
+
+    opciones.update(
+        poolclass=timed_pool_class(pool_base, etiqueta),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_use_lifo=True,  # deja enfriar las conexiones sobrantes para que se reciclen
+    )
+    if DB_POOL_MODE == "pgbouncer":
+        # PgBouncer (transaction pooling) no garantiza la misma conexión de servidor
+        # entre transacciones: los prepared statements rompen.
+        opciones["connect_args"] = {"prepare_threshold": None}
+    return opciones
+
+
+engine = create_engine(DATABASE_URL, **engine_options())
+instrument_pool(engine, "primary")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# --- Motor asíncrono (psycopg async) para los handlers `async def` ---
+# Misma URL y misma configuración de pool; el driver psycopg 3 soporta ambos modos.
+async_engine = create_async_engine(DATABASE_URL, **engine_options(AsyncAdaptedQueuePool, "async"))
+instrument_pool(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: tras el commit los objetos siguen siendo serializables sin
+# disparar cargas implícitas (que en modo async no están permitidas).
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# --- Conexiones LISTEN (stream SSE, invalidación de principal_cache) ---
+# LISTEN necesita una sesión de servidor fija: con PgBouncer en modo transacción,
+# apuntar NOTIFY_LISTEN_DSN directo a Postgres.
+NOTIFY_LISTEN_DSN = os.getenv("NOTIFY_LISTEN_DSN")
+
+
+def listen_dsn() -> str:
+    """DSN libpq para psycopg.AsyncConnection.connect de los listeners."""
+    if NOTIFY_LISTEN_DSN:
+        return NOTIFY_LISTEN_DSN
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+# --- Réplica de solo lectura (opcional) ---
+# DB_REPLICA_URL: URL SQLAlchemy completa de la réplica. Si no se define, las
+# sesiones de lectura usan la primaria (mismo pool), siempre en modo read-only.
+DATABASE_REPLICA_URL = os.getenv("DB_REPLICA_URL") or None
+REPLICA_CONFIGURED = DATABASE_REPLICA_URL is not None
+
+if REPLICA_CONFIGURED:
+    replica_engine = create_engine(DATABASE_REPLICA_URL, **engine_options(etiqueta="replica"))
+    instrument_pool(replica_engine, "replica")
+    async_replica_engine = create_async_engine(
+        DATABASE_REPLICA_URL, **engine_options(AsyncAdaptedQueuePool, "replica_async")
+    )
+    instrument_pool(async_replica_engine.sync_engine, "replica_async")
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+
+# postgresql_readonly abre las transacciones como READ ONLY: una escritura
+# accidental en un handler de lectura falla también contra la primaria.
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False,
+    bind=replica_engine.execution_options(postgresql_readonly=True),
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_replica_engine.execution_options(postgresql_readonly=True),
+    class_=AsyncSession, autoflush=False, expire_on_commit=False,
+)
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.database_models import ReniecCache
+
+
+def purge_reniec_cache():
+    """Elimina las consultas RENIEC cacheadas que ya vencieron."""
+    db: Session = SessionLocal()
+    try:
+        borrados = db.execute(
+            delete(ReniecCache).where(ReniecCache.expira < datetime.now(timezone.utc))
+        ).rowcount
+        db.commit()
+        if borrados:
+            print(f"✅ Se purgaron {borrados} consultas RENIEC vencidas.")
+    except Exception as e:
+        print(f"❌ Error durante la purga de la caché RENIEC: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,223 @@
+import os
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal, engine
+from src.models.database_models import Usuario
+from src.utils.metrics import NOTIFICATION_COUNTER_DRIFT
+
+# Usuarios por transacción: cada lote bloquea solo sus filas de contador.
+RECONCILE_CHUNK = int(os.getenv("NOTIFICATION_COUNTER_RECONCILE_CHUNK", "1000"))
+
+_ASEGURAR = text("""
+    INSERT INTO notificaciones_contadores (usuario_dni, no_leidas)
+    SELECT dni, 0 FROM unnest(CAST(:dnis AS text[])) AS dni
+    ON CONFLICT (usuario_dni) DO NOTHING
+""")
+
+# Con la fila del contador bloqueada, un insert/update concurrente espera en su
+# trigger hasta nuestro commit y aplica su delta después: el recuento no se pisa.
+_BLOQUEAR = text("""
+    SELECT usuario_dni FROM notificaciones_contadores
+    WHERE usuario_dni = ANY(CAST(:dnis AS text[]))
+    ORDER BY usuario_dni
+    FOR UPDATE
+""")
+
+_CORREGIR = text("""
+    UPDATE notificaciones_contadores c SET no_leidas = r.real
+    FROM (
+        SELECT d.dni, (
+            SELECT count(*) FROM notificaciones n WHERE n.usuario_dni = d.dni AND n.leida = false
+        ) AS real
+        FROM unnest(CAST(:dnis AS text[])) AS d(dni)
+    ) r
+    WHERE c.usuario_dni = r.dni AND c.no_leidas <> r.real
+    RETURNING c.usuario_dni
+""")
+
+
+def reconcile_unread_counters(chunk: int = RECONCILE_CHUNK) -> int:
+    """
+    Recalcula por lotes de usuarios el contador de no leídas y corrige las filas
+    que se desviaron (p. ej. escrituras con los triggers deshabilitados).
+    Devuelve cuántos contadores se corrigieron.
+    """
+    print(f"[{datetime.now()}] Reconciliando contadores de notificaciones no leídas...")
+    db: Session = SessionLocal()
+    corregidos, ultimo = 0, ""
+    try:
+        while True:
+            dnis = db.execute(
+                select(Usuario.numero_de_dni)
+                .where(Usuario.numero_de_dni > ultimo)
+                .order_by(Usuario.numero_de_dni)
+                .limit(chunk)
+            ).scalars().all()
+            if not dnis:
+                break
+            db.execute(_ASEGURAR, {"dnis": dnis})
+            db.execute(_BLOQUEAR, {"dnis": dnis})
+            lote = len(db.execute(_CORREGIR, {"dnis": dnis}).all())
+            db.commit()
+            corregidos += lote
+            ultimo = dnis[-1]
+        if corregidos:
+            NOTIFICATION_COUNTER_DRIFT.inc(corregidos)
+            print(f"⚠️ Se corrigieron {corregidos} contadores de no leídas.")
+        return corregidos
+    except Exception as e:
+        print(f"❌ Error al reconciliar contadores de notificaciones: {e}")
+        db.rollback()
+        return corregidos
+    finally:
+        db.close()
+
+
+# --- Particiones mensuales y retención (tabla particionada, migración 2f8a6d0c4e19) ---
+PARTITIONS_AHEAD = int(os.getenv("NOTIFICACIONES_PARTITIONS_AHEAD", "3"))
+RETENTION_MONTHS = int(os.getenv("NOTIFICACIONES_RETENTION_MONTHS", "12"))
+RETENTION_MODE = os.getenv("NOTIFICACIONES_RETENTION_MODE", "drop").lower()  # drop | archive
+ARCHIVE_SCHEMA = os.getenv("NOTIFICACIONES_ARCHIVE_SCHEMA", "archivo")
+RETENTION_CHUNK = int(os.getenv("NOTIFICACIONES_RETENTION_CHUNK", "5000"))
+# DETACH/ATTACH piden locks sobre la tabla padre: mejor fallar y reintentar mañana
+# que dejar en cola a todas las consultas detrás de una transacción larga.
+DDL_LOCK_TIMEOUT = os.getenv("NOTIFICACIONES_DDL_LOCK_TIMEOUT", "5s")
+
+PARTICION_DEFAULT = "notificaciones_default"
+_PARTICION = re.compile(r"^notificaciones_p(\d{4})(\d{2})$")
+
+
+def _sumar_meses(mes: date, n: int) -> date:
+    total = mes.year * 12 + mes.month - 1 + n
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _limite(mes: date) -> str:
+    return f"{mes:%Y-%m-%d} 00:00:00+00"  # límites en UTC, igual que la migración
+
+
+def _particiones(db: Session) -> dict[date, str]:
+    nombres = db.execute(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'notificaciones'::regclass
+    """)).scalars().all()
+    particiones = {}
+    for nombre in nombres:
+        m = _PARTICION.match(nombre)
+        if m:
+            particiones[date(int(m.group(1)), int(m.group(2)), 1)] = nombre
+    return particiones
+
+
+def ensure_notification_partitions(db: Session, ahead: int = PARTITIONS_AHEAD) -> list[str]:
+    """
+    Crea las particiones del mes actual y de los `ahead` siguientes. Se crean
+    sueltas y se adjuntan con ATTACH PARTITION (no bloquea lecturas/escrituras de
+    la tabla padre); si la DEFAULT recibió filas de ese mes, se mueven antes.
+    """
+    existentes = _particiones(db)
+    actual = datetime.now(timezone.utc).date().replace(day=1)
+    creadas = []
+    for i in range(ahead + 1):
+        mes = _sumar_meses(actual, i)
+        if mes in existentes:
+            continue
+        nombre, desde, hasta = f"notificaciones_p{mes:%Y%m}", _limite(mes), _limite(_sumar_meses(mes, 1))
+        db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+        db.execute(text(f"CREATE TABLE {nombre} (LIKE notificaciones INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        # Directo sobre las particiones: los triggers por sentencia del padre no se disparan
+        # (las filas solo cambian de partición; contador y stream no se enteran)
+        db.execute(text(f"""
+            WITH movidas AS (
+                DELETE FROM {PARTICION_DEFAULT}
+                WHERE fecha_creacion >= CAST(:desde AS timestamptz) AND fecha_creacion < CAST(:hasta AS timestamptz)
+                RETURNING *
+            )
+            INSERT INTO {nombre} SELECT * FROM movidas
+        """), {"desde": desde, "hasta": hasta})
+        db.execute(text(f"ALTER TABLE notificaciones ATTACH PARTITION {nombre} FOR VALUES FROM ('{desde}') TO ('{hasta}')"))
+        db.commit()
+        creadas.append(nombre)
+    return creadas
+
+
+def apply_notification_retention(db: Session, months: int = RETENTION_MONTHS) -> dict:
+    """
+    Retención de notificaciones LEÍDAS con más de `months` meses. Las no leídas se
+    conservan siempre (el contador y la bandeja las siguen mostrando).
+    - Partición vencida sin no leídas: DETACH + DROP (o se mueve al esquema de
+      archivo con NOTIFICACIONES_RETENTION_MODE=archive).
+    - Partición vencida con alguna no leída (y la DEFAULT): se borran sus leídas por lotes.
+    """
+    corte = _sumar_meses(datetime.now(timezone.utc).date().replace(day=1), -months)
+    resultado = {"particiones": [], "filas_borradas": 0}
+    for mes, nombre in sorted(_particiones(db).items()):
+        if _sumar_meses(mes, 1) > corte:
+            continue
+        db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+        # SHARE: nadie puede marcar/insertar en la partición mientras se decide
+        db.execute(text(f"LOCK TABLE {nombre} IN SHARE MODE"))
+        if db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {nombre} WHERE leida = false)")).scalar():
+            db.commit()
+            resultado["filas_borradas"] += _borrar_leidas(db, nombre)
+            continue
+        db.execute(text(f"ALTER TABLE notificaciones DETACH PARTITION {nombre}"))
+        if RETENTION_MODE == "archive":
+            db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            db.execute(text(f"ALTER TABLE {nombre} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        else:
+            db.execute(text(f"DROP TABLE {nombre}"))
+        db.commit()
+        resultado["particiones"].append(nombre)
+    resultado["filas_borradas"] += _borrar_leidas(db, PARTICION_DEFAULT, antes_de=_limite(corte))
+    return resultado
+
+
+def _borrar_leidas(db: Session, particion: str, antes_de: str | None = None) -> int:
+    # Solo filas leídas: el contador de no leídas no cambia y no hace falta avisar al stream,
+    # por eso se borra directo en la partición (sin los triggers del padre).
+    filtro = "leida IS NOT false" + (" AND fecha_creacion < CAST(:antes_de AS timestamptz)" if antes_de else "")
+    total = 0
+    while True:
+        borradas = db.execute(text(f"""
+            DELETE FROM {particion} WHERE ctid = ANY(ARRAY(
+                SELECT ctid FROM {particion} WHERE {filtro} LIMIT :lote
+            ))
+        """), {"lote": RETENTION_CHUNK, "antes_de": antes_de}).rowcount
+        db.commit()
+        total += borradas
+        if borradas < RETENTION_CHUNK:
+            return total
+
+
+def maintain_notification_partitions() -> None:
+    """Crea las particiones futuras de notificaciones y aplica la retención."""
+    print(f"[{datetime.now()}] Mantenimiento de particiones de notificaciones...")
+    # Corre al arrancar cada worker: un advisory lock evita que dos procesos hagan el DDL a la vez.
+    # La sesión queda atada a una sola conexión, que es la dueña del lock.
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(hashtext('sniugb_particiones_notificaciones'))")).scalar():
+            conn.rollback()
+            return
+        conn.commit()
+        db = Session(bind=conn)
+        try:
+            creadas = ensure_notification_partitions(db)
+            if creadas:
+                print(f"✅ Particiones creadas: {', '.join(creadas)}")
+            retencion = apply_notification_retention(db)
+            if retencion["particiones"] or retencion["filas_borradas"]:
+                destino = "archivadas" if RETENTION_MODE == "archive" else "eliminadas"
+                print(f"✅ Particiones {destino}: {retencion['particiones'] or '-'}; "
+                      f"notificaciones leídas borradas: {retencion['filas_borradas']}")
+        except Exception as e:
+            print(f"❌ Error en el mantenimiento de particiones de notificaciones: {e}")
+            db.rollback()
+        finally:
+            db.close()
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext('sniugb_particiones_notificaciones'))"))
+            conn.commit()
@@ -0,0 +1,16 @@
+import os
+
+from src.services.outbox_service import BATCH_SIZE, despachar_pendientes
+
+# Tope de lotes por ejecución: con mucho atraso, el resto queda para la siguiente.
+MAX_BATCHES_PER_RUN = int(os.getenv("OUTBOX_MAX_BATCHES_PER_RUN", "20"))
+
+
+async def dispatch_outbox():
+    """Envía los emails/WhatsApp pendientes del outbox, lote por lote."""
+    try:
+        for _ in range(MAX_BATCHES_PER_RUN):
+            if await despachar_pendientes(BATCH_SIZE) < BATCH_SIZE:
+                break
+    except Exception as e:
+        print(f"❌ Error en el despachador del outbox: {e}")
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.database_models import RateLimitContador
+
+
+def purge_rate_limit_counters():
+    """
+    Elimina las ventanas vencidas del rate limiter en Postgres (solo se usan
+    cuando no hay Redis; con Redis la tabla queda vacía y esto no hace nada).
+    """
+    db: Session = SessionLocal()
+    try:
+        borrados = db.execute(
+            delete(RateLimitContador).where(RateLimitContador.expira < datetime.now(timezone.utc))
+        ).rowcount
+        db.commit()
+        if borrados:
+            print(f"✅ Se purgaron {borrados} contadores del rate limiter.")
+    except Exception as e:
+        print(f"❌ Error durante la purga de contadores del rate limiter: {e}")
+        db.rollback()
+    finally:
+        db.close()
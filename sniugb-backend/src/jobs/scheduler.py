@@ -1,5 +1,16 @@
+import os
+from datetime import datetime
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from .expiration_jobs import expire_old_transfer_requests
+from .token_jobs import purge_refresh_tokens
+from .rate_limit_jobs import purge_rate_limit_counters
+from .cache_jobs import purge_reniec_cache
+from .outbox_jobs import dispatch_outbox
+from .notificacion_jobs import maintain_notification_partitions, reconcile_unread_counters
+
+# Cada cuánto revisa el despachador el outbox de emails/WhatsApp
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
 
 # Creamos una instancia del programador
 scheduler = AsyncIOScheduler()
@@ -11,5 +22,17 @@ def setup_jobs():
     # Programamos la tarea para que se ejecute cada hora.
     # Puedes ajustar el intervalo a 'minutes=30', 'days=1', etc.
     scheduler.add_job(expire_old_transfer_requests, 'interval', hours=1)
+    # Purga de refresh tokens expirados/revocados (por lotes)
+    scheduler.add_job(purge_refresh_tokens, 'interval', hours=6)
+    # Ventanas vencidas del rate limiter (respaldo en Postgres)
+    scheduler.add_job(purge_rate_limit_counters, 'interval', minutes=10)
+    # Consultas RENIEC vencidas en la caché persistente
+    scheduler.add_job(purge_reniec_cache, 'interval', hours=24)
+    # Reconciliación de los contadores de no leídas (corrige deriva)
+    scheduler.add_job(reconcile_unread_counters, 'interval', hours=24)
+    # Particiones mensuales de notificaciones (meses futuros) y retención de las leídas
+    scheduler.add_job(maintain_notification_partitions, 'interval', hours=24, next_run_time=datetime.now())
+    # Despachador del outbox: una sola ejecución a la vez por proceso (SKIP LOCKED reparte entre procesos)
+    scheduler.add_job(dispatch_outbox, 'interval', seconds=OUTBOX_POLL_SECONDS, max_instances=1, coalesce=True)
     
     print("Tareas programadas configuradas.")
\ No newline at end of file
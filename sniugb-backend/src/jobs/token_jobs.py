@@ -0,0 +1,47 @@
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.database_models import RefreshToken
+
+# Filas borradas por transacción: lotes cortos para no bloquear refresh/logout.
+PURGE_CHUNK = int(os.getenv("REFRESH_TOKEN_PURGE_CHUNK", "5000"))
+
+
+def purge_refresh_tokens(chunk: int = PURGE_CHUNK) -> int:
+    """
+    Elimina por lotes los refresh tokens expirados o revocados. Un token sin fila
+    ya no puede usarse (/auth/refresh exige la fila vigente), así que borrar los
+    revocados no reabre nada.
+    """
+    print(f"[{datetime.now()}] Ejecutando purga de refresh tokens...")
+    db: Session = SessionLocal()
+    total = 0
+    try:
+        while True:
+            ahora = datetime.now(timezone.utc)
+            lote = (
+                select(RefreshToken.id)
+                .where(or_(RefreshToken.expires_at < ahora, RefreshToken.revoked_at.is_not(None)))
+                .limit(chunk)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            borrados = db.execute(
+                delete(RefreshToken).where(RefreshToken.id.in_(lote)).execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            total += borrados
+            if borrados < chunk:
+                break
+        print(f"✅ Se purgaron {total} refresh tokens.")
+        return total
+    except Exception as e:
+        print(f"❌ Error durante la purga de refresh tokens: {e}")
+        db.rollback()
+        return total
+    finally:
+        db.close()
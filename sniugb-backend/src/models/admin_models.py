@@ -1,6 +1,8 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import List
+from typing import Any, List, Optional
+
+from src.models.database_models import UserRole
 
 
 # --- Esquemas para Razas y Departamentos (Mantenemos estos) ---
@@ -69,4 +71,24 @@ class ArticulosResponse(BaseModel):
     articulos: List[ArticuloSchema]
     total: int
     page: int
-    pages: int
\ No newline at end of file
+    pages: int
+# --- Rendimiento: sentencias SQL lentas ---
+class SlowQuerySchema(BaseModel):
+    huella: str
+    pid: int  # worker que la registró (el buffer es por proceso)
+    fecha: datetime
+    duracion_ms: float
+    metodo: Optional[str] = None
+    ruta: Optional[str] = None
+    sql: str
+    parametros: Optional[Any] = None
+    plan: Optional[str] = None
+    plan_error: Optional[str] = None
+
+# --- Difusión de notificaciones ---
+class DifusionNotificacionSchema(BaseModel):
+    mensaje: str = Field(..., min_length=1, max_length=1000)
+    link: Optional[str] = None
+    # Filtros de destinatarios (solo cuentas activas). rol=None -> todos los roles.
+    rol: Optional[UserRole] = UserRole.GANADERO
+    departamento: Optional[str] = None  # usuarios con al menos un predio en ese departamento
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
-from typing import List
+from typing import List, Optional
 from .evento_models import EventoSanitarioResponseSchema, EventoProduccionResponseSchema
 
 class AnimalCreateSchema(BaseModel):
@@ -33,8 +33,9 @@ class AnimalDeleteConfirmationSchema(BaseModel):
     confirmacion_cui: str
 
 class AnimalDetailResponseSchema(AnimalResponseSchema):
-    eventos_sanitarios: List[EventoSanitarioResponseSchema] = []
-    eventos_produccion: List[EventoProduccionResponseSchema] = []
+    # None = no se pidió el historial (?incluir_historial=true); [] = el animal no tiene eventos
+    eventos_sanitarios: Optional[List[EventoSanitarioResponseSchema]] = None
+    eventos_produccion: Optional[List[EventoProduccionResponseSchema]] = None
 
     class Config:
         from_attributes = True
@@ -43,4 +44,42 @@ class AnimalUpdateSchema(BaseModel):
     nombre: str | None = None
     sexo: str | None = None
     peso: str | None = None
-    estado: str | None = None
\ No newline at end of file
+    estado: str | None = None
+class ErrorFilaImportacionSchema(BaseModel):
+    fila: int
+    columna: str | None = None
+    mensaje: str
+
+class AnimalImportadoSchema(BaseModel):
+    fila: int
+    cui: str
+
+class ImportacionAnimalesResponseSchema(BaseModel):
+    filas: int
+    insertados: int
+    rechazadas: int
+    errores: List[ErrorFilaImportacionSchema] = []
+    errores_omitidos: int = 0   # errores no detallados por superar ANIMALES_IMPORT_MAX_ERRORS
+    animales: List[AnimalImportadoSchema] = []
+    duracion_ms: float
+
+class ValidarCuisSchema(BaseModel):
+    cuis: List[str] = Field(..., min_length=1, max_length=10_000, description="CUIs leídos o tipeados, tal cual")
+    predio: str | None = Field(None, description="Acotar la búsqueda en el hato a un predio propio")
+
+class CuiInvalidoSchema(BaseModel):
+    cui: str
+    motivo: str
+
+class CuiEnHatoSchema(BaseModel):
+    cui: str
+    predio_codigo: str
+    estado: str
+
+class ValidacionCuisResponseSchema(BaseModel):
+    total: int                          # CUIs distintos recibidos
+    validos: int
+    invalidos: List[CuiInvalidoSchema]  # formato o dígito de control
+    en_hato: List[CuiEnHatoSchema]      # válidos y del usuario
+    no_en_hato: List[str]               # válidos pero no registrados en sus predios
+
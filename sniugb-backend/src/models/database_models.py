@@ -1,7 +1,8 @@
 from sqlalchemy import (
-    Column, String, DateTime, func, ForeignKey, Integer, text,
-    Enum as SQLAlchemyEnum, Text, Boolean, Float
+    Column, String, DateTime, func, ForeignKey, Integer, BigInteger, text,
+    Enum as SQLAlchemyEnum, Text, Boolean, Float, Index
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import declarative_base
 import uuid
@@ -68,6 +69,17 @@ class Departamento(Base):
     nombre = Column(String, unique=True, index=True, nullable=False)
     codigo_ubigeo = Column(String(2), nullable=False)
 
+class CuiContador(Base):
+    """
+    Último serial de CUI asignado por (departamento, especie). Lo avanza
+    animal_service.reservar_seriales_cui con un upsert atómico: la fila queda
+    bloqueada hasta el commit y serializa las altas del mismo par.
+    """
+    __tablename__ = "cui_contadores"
+    codigo_ubigeo = Column(String(2), primary_key=True)
+    digito_especie = Column(String(1), primary_key=True)
+    ultimo_serial = Column(Integer, nullable=False, server_default="0")
+
 # --------- Usuario / Predio ---------
 
 class Usuario(Base):
@@ -91,6 +103,7 @@ def generate_predio_code():
 
 class Predio(Base):
     __tablename__ = "predios"
+    __table_args__ = (Index("ix_predios_propietario_dni", "propietario_dni"),)
     codigo_predio = Column(String, primary_key=True, default=generate_predio_code)
     nombre_predio = Column(String, nullable=False)
     departamento = Column(String, nullable=False)
@@ -104,6 +117,17 @@ class Predio(Base):
 
 class Animal(Base):
     __tablename__ = "animales"
+    __table_args__ = (
+        Index("ix_animales_predio_codigo_estado", "predio_codigo", "estado"),
+        # Búsqueda del chip de la UI (revisión 8d3f5b2a6c71): prefijo de CUI con
+        # collation "C" (LIKE 'q%' como rango y ya ordenado) y trigramas sobre nombre
+        # acotados al predio (GIN compuesto: requiere pg_trgm y btree_gin).
+        Index("ix_animales_predio_cui_prefijo", "predio_codigo", text('cui COLLATE "C"')),
+        Index(
+            "ix_animales_predio_nombre_trgm", "predio_codigo", "nombre",
+            postgresql_using="gin", postgresql_ops={"nombre": "gin_trgm_ops"},
+        ),
+    )
     cui = Column(String(11), primary_key=True, index=True)
     nombre = Column(String)
     raza_id = Column(Integer, ForeignKey("razas.id"))
@@ -149,6 +173,8 @@ class EventoSanitario(Base):
 
 class EventoSanitarioAnimal(Base):
     __tablename__ = "evento_sanitario_animales"
+    # La PK (evento_id, animal_cui) no sirve para la línea de tiempo de un animal
+    __table_args__ = (Index("ix_evento_sanitario_animales_animal_cui", "animal_cui"),)
     evento_id = Column(Integer, ForeignKey("eventos_sanitarios.id"), primary_key=True)
     animal_cui = Column(String(11), ForeignKey("animales.cui"), primary_key=True)
 
@@ -156,6 +182,11 @@ class EventoSanitarioAnimal(Base):
 
 class EventoProduccion(Base):
     __tablename__ = "eventos_produccion"
+    __table_args__ = (
+        Index("ix_eventos_produccion_animal_tipo_fecha", "animal_cui", "tipo_evento", "fecha_evento"),
+        # Línea de tiempo: recorre el historial del animal en orden (fecha, id) con cursor
+        Index("ix_eventos_produccion_animal_fecha_id", "animal_cui", "fecha_evento", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     animal_cui = Column(String(11), ForeignKey("animales.cui"), nullable=False, index=True)
     fecha_evento = Column(DateTime(timezone=True), nullable=False)
@@ -186,6 +217,7 @@ class ControlCalidad(Base):
 
 class ControlCalidadAnimal(Base):
     __tablename__ = "control_calidad_animales"
+    __table_args__ = (Index("ix_control_calidad_animales_animal_cui", "animal_cui"),)
     control_id = Column(Integer, ForeignKey("control_calidad.id"), primary_key=True)
     animal_cui = Column(String(11), ForeignKey("animales.cui"), primary_key=True)
 
@@ -193,11 +225,14 @@ class ControlCalidadAnimal(Base):
 
 class TransferenciaAnimal(Base):
     __tablename__ = 'transferencia_animal_association'
+    # La PK (transferencia_id, animal_cui) no sirve para buscar por animal
+    __table_args__ = (Index("ix_transferencia_animal_animal_cui", "animal_cui"),)
     transferencia_id = Column(Integer, ForeignKey('transferencias.id'), primary_key=True)
     animal_cui = Column(String(11), ForeignKey('animales.cui'), primary_key=True)
 
 class Transferencia(Base):
     __tablename__ = "transferencias"
+    __table_args__ = (Index("ix_transferencias_receptor_estado", "receptor_dni", "estado"),)
     id = Column(Integer, primary_key=True, index=True)
     codigo_transferencia = Column(String, unique=True, index=True, default=lambda: f"TRANS-{uuid.uuid4().hex[:8].upper()}")
     codigo_confirmacion = Column(String, index=True, default=lambda: str(random.randint(100000, 999999)))
@@ -225,16 +260,38 @@ class InventarioItem(Base):
 
 
 class Notificacion(Base):
+    """
+    Particionada por mes sobre fecha_creacion (migración 2f8a6d0c4e19): la PK
+    incluye la clave de partición. Las particiones futuras y la retención las
+    mantiene el job maintain_notification_partitions.
+    """
     __tablename__ = "notificaciones"
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        Index("ix_notificaciones_usuario_leida_fecha", "usuario_dni", "leida", "fecha_creacion"),
+        {"postgresql_partition_by": "RANGE (fecha_creacion)"},
+    )
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     usuario_dni = Column(String, ForeignKey("datos_del_usuario.numero_de_dni"), nullable=False)
     mensaje = Column(String, nullable=False)
     leida = Column(Boolean, default=False)
-    fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
+    fecha_creacion = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     link = Column(String, nullable=True)
 
+class NotificacionContador(Base):
+    """
+    No leídas por usuario, mantenido por triggers de `notificaciones` en la misma
+    transacción que cada insert/update/delete (migración 9c5e1a3b7d42). El job
+    reconcile_unread_counters corrige cualquier deriva.
+    """
+    __tablename__ = "notificaciones_contadores"
+    usuario_dni = Column(String, ForeignKey("datos_del_usuario.numero_de_dni", ondelete="CASCADE"), primary_key=True)
+    no_leidas = Column(Integer, nullable=False, server_default="0")
+
 class Evento(Base):
     __tablename__ = "eventos_calendario"
+    __table_args__ = (
+        Index("ix_eventos_calendario_usuario_tipo_fecha", "usuario_dni", "tipo", "fecha_evento"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     usuario_dni = Column(String, ForeignKey("datos_del_usuario.numero_de_dni"), nullable=False)
     fecha_evento = Column(DateTime(timezone=True), nullable=False)
@@ -299,4 +356,56 @@ class RefreshToken(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False)
     revoked_at = Column(DateTime(timezone=True), nullable=True)
 
-    user = relationship("Usuario", back_populates="refresh_tokens")
\ No newline at end of file
+    user = relationship("Usuario", back_populates="refresh_tokens")
+
+class RateLimitContador(Base):
+    """
+    Contadores del rate limiter cuando no hay Redis (ver src/utils/rate_limit_storage.py).
+    UNLOGGED: son datos efímeros, no necesitan WAL ni sobrevivir a un crash.
+    """
+    __tablename__ = "rate_limit_contadores"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+    clave = Column(String, primary_key=True)
+    ventana = Column(BigInteger, primary_key=True)  # nº de ventana (epoch // expiry); 0 = ventana fija
+    conteo = Column(Integer, nullable=False)
+    expira = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ReniecCache(Base):
+    """
+    Caché persistente de consultas DNI a ApiPeru (RENIEC), compartida entre workers.
+    nombre_completo NULL = DNI no encontrado (caché negativa, con TTL más corto).
+    """
+    __tablename__ = "reniec_cache"
+    dni = Column(String(8), primary_key=True)
+    nombre_completo = Column(String, nullable=True)
+    consultado_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expira = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class MensajeSaliente(Base):
+    """
+    Outbox de emails y WhatsApp: se inserta en la misma transacción que la fila de
+    negocio y lo envía el despachador en segundo plano (src/services/outbox_service.py).
+    payload = cuerpo listo para el proveedor (email: to_email/subject/html_content;
+    whatsapp: payload de la Graph API). proximo_intento también sirve de "lease"
+    mientras el mensaje está en estado 'enviando'.
+    """
+    __tablename__ = "outbox_mensajes"
+    __table_args__ = (
+        Index(
+            "ix_outbox_mensajes_pendientes", "proximo_intento",
+            postgresql_where=text("estado IN ('pendiente', 'enviando')"),
+        ),
+    )
+    id = Column(BigInteger, primary_key=True)
+    canal = Column(String(16), nullable=False)  # email | whatsapp
+    tipo = Column(String(64), nullable=False)   # plantilla de origen (transfer_request, support_ticket...)
+    destinatario = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    estado = Column(String(16), nullable=False, server_default="pendiente")  # pendiente | enviando | enviado | fallido
+    intentos = Column(Integer, nullable=False, server_default="0")
+    proximo_intento = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    ultimo_error = Column(Text, nullable=True)
+    creado_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    enviado_en = Column(DateTime(timezone=True), nullable=True)
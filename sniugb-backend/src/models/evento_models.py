@@ -1,11 +1,12 @@
 # src/models/evento_models.py
 from __future__ import annotations
-from typing import Optional, List
+from typing import Optional, List, Literal
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
 # Usamos los enums reales del modelo de BD
 from src.models.database_models import ProduccionTipo
+from src.utils.cui import CUI
 
 # ============================================================
 # SANIDAD (evento principal + asociación masiva a animales)
@@ -26,7 +27,7 @@ class EventoSanitarioCreateSchema(BaseModel):
     observaciones: Optional[str] = None
 
     # Selección masiva: se guarda en evento_sanitario_animales
-    animales_cui: List[str] = Field(default_factory=list, description="Lista de CUI de animales del predio")
+    animales_cui: List[CUI] = Field(default_factory=list, description="Lista de CUI de animales del predio")
 
 class EventoSanitarioResponseSchema(BaseModel):
     id: int
@@ -85,7 +86,7 @@ class ControlCalidadCreateSchema(BaseModel):
     observaciones: Optional[str] = None
 
     # Asociación masiva
-    animales_cui: List[str] = Field(default_factory=list)
+    animales_cui: List[CUI] = Field(default_factory=list)
 
     @validator("producto")
     def validar_producto_sin_pesaje(cls, v: ProduccionTipo) -> ProduccionTipo:
@@ -106,6 +107,28 @@ class ControlCalidadResponseSchema(BaseModel):
         from_attributes = True
 
 
+# ============================================================
+# LÍNEA DE TIEMPO DEL ANIMAL (producción + sanidad + calidad)
+# ============================================================
+
+TipoTimeline = Literal["produccion", "sanitario", "calidad"]
+
+class TimelineEventoSchema(BaseModel):
+    tipo: TipoTimeline
+    id: int  # id en la tabla de su tipo
+    fecha: datetime
+    subtipo: str  # produccion: LECHE/CARNE/CUERO/PESAJE; sanitario: enfermedad; calidad: método
+    producto: Optional[str] = None  # calidad: producto evaluado
+    valor_cantidad: Optional[float] = None  # sanitario: dosis
+    unidad_medida: Optional[str] = None
+    tratamiento: Optional[str] = None  # solo sanitario
+    observaciones: Optional[str] = None
+
+class TimelineAnimalResponseSchema(BaseModel):
+    items: List[TimelineEventoSchema]
+    siguiente_cursor: Optional[str] = None  # None: no hay más eventos
+
+
 # ============================================================
 # HISTÓRICOS (opcional: partos, muerte, compra, etc.)
 # ============================================================
@@ -14,4 +14,13 @@ class NotificacionResponse(BaseModel):
 
 class NotificacionDetailResponse(NotificacionResponse):
     # Añadimos un campo opcional que contendrá los detalles de la transferencia
-    detalles_transferencia: TransferenciaResponseSchema | None = None
\ No newline at end of file
+    detalles_transferencia: TransferenciaResponseSchema | None = None
+
+class MarcarLeidasSchema(BaseModel):
+    # Sin `hasta` se marcan todas; con `hasta`, solo las creadas hasta ese instante
+    # (lo que el usuario tenía en pantalla, sin tocar las que llegaron después).
+    hasta: datetime | None = None
+
+class OperacionMasivaResponse(BaseModel):
+    afectadas: int
+    duracion_ms: float
@@ -3,9 +3,10 @@ from datetime import datetime
 from typing import List, Literal
 from .animal_models import AnimalResponseSchema
 from src.models.database_models import TransferenciaEstado
+from src.utils.cui import CUI
 
 class TransferenciaCreateSchema(BaseModel):
-    animal_cuis: List[str]
+    animal_cuis: List[CUI]
     predio_destino_codigo: str
 
 class TransferenciaApproveSchema(BaseModel):
@@ -1,24 +1,42 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
-from src.models.database_models import Animal, Raza, Departamento
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.models.database_models import Raza, Departamento, CuiContador
+from src.utils.cui import calcular_digito_luhn
 
-# --- Implementación del Algoritmo de Luhn ---
-def calcular_digito_luhn(numero_sin_verificar: str) -> str:
-    suma = 0
-    num_digitos = len(numero_sin_verificar)
-    paridad = num_digitos % 2
-
-    for i, digito_str in enumerate(numero_sin_verificar):
-        digito = int(digito_str)
-        if i % 2 == paridad:
-            digito *= 2
-        if digito > 9:
-            digito -= 9
-        suma += digito
-    
-    return str((10 - (suma % 10)) % 10)
 
 # --- Lógica de Generación del CUI ---
+SERIAL_MAXIMO = 9_999_999  # 7 dígitos de serie por (departamento, especie)
+
+
+def reservar_seriales_cui(db: Session, codigo_depto: str, digito_especie: str, cantidad: int) -> int:
+    """
+    Reserva `cantidad` seriales consecutivos para (departamento, especie) y devuelve
+    el primero. Una sola sentencia sobre cui_contadores (O(1), sin recorrer
+    animales): el UPDATE bloquea la fila del par hasta el commit, así dos altas
+    simultáneas nunca reciben el mismo serial y un bloque reservado queda contiguo.
+    Si la transacción se revierte, los seriales vuelven a quedar libres.
+    """
+    stmt = pg_insert(CuiContador).values(
+        codigo_ubigeo=codigo_depto, digito_especie=digito_especie, ultimo_serial=cantidad
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CuiContador.codigo_ubigeo, CuiContador.digito_especie],
+        set_={"ultimo_serial": CuiContador.ultimo_serial + stmt.excluded.ultimo_serial},
+    ).returning(CuiContador.ultimo_serial)
+    ultimo_serial = db.execute(stmt).scalar_one()
+
+    if ultimo_serial > SERIAL_MAXIMO:
+        raise ValueError("No quedan números de serie de CUI para ese departamento y especie.")
+    return ultimo_serial - cantidad + 1
+
+
+def construir_cui(digito_especie: str, codigo_depto: str, serial: int) -> str:
+    """CUI de 11 dígitos: especie (1) + ubigeo (2) + serie (7) + dígito de Luhn (1)."""
+    cui_base = f"{digito_especie}{codigo_depto}{str(serial).zfill(7)}"
+    return f"{cui_base}{calcular_digito_luhn(cui_base)}"
+
+
 def generar_nuevo_cui(db: Session, departamento_nombre: str, raza_nombre: str) -> str:
     """
     Genera un nuevo Código Único de Identificación completo, con serialización por
@@ -36,29 +54,8 @@ def generar_nuevo_cui(db: Session, departamento_nombre: str, raza_nombre: str) -
         raise ValueError("El departamento especificado no es válido.")
     codigo_depto = depto_obj.codigo_ubigeo
 
-        # 3. Obtener el siguiente número de serie
-    # La consulta ahora filtra tanto por departamento como por dígito de especie.
-    query = text(
-        "SELECT MAX(CAST(SUBSTRING(cui FROM 4 FOR 7) AS INTEGER)) "
-        "FROM animales "
-        "WHERE SUBSTRING(cui FROM 2 FOR 2) = :codigo_depto "
-        "AND SUBSTRING(cui FROM 1 FOR 1) = :digito_especie"
-    )
-    ultimo_serial = db.execute(
-        query,
-        {"codigo_depto": codigo_depto, "digito_especie": str(digito_especie)}
-    ).scalar_one_or_none()
-
-    nuevo_serial = (ultimo_serial or 0) + 1
-    serial_str = str(nuevo_serial).zfill(7)
-
-    # 4. Construir el CUI base de 10 dígitos
-    cui_base = f"{digito_especie}{codigo_depto}{serial_str}"
-
-    # 5. Calcular el dígito de control de Luhn
-    digito_control = calcular_digito_luhn(cui_base)
-
-    # 6. Unir todo para el CUI final de 11 dígitos
-    cui_final = f"{cui_base}{digito_control}"
+    # 3. Reservar el siguiente número de serie del par (departamento, especie)
+    nuevo_serial = reservar_seriales_cui(db, codigo_depto, str(digito_especie), 1)
 
-    return cui_final
\ No newline at end of file
+    # 4. CUI de 11 dígitos (el mismo armado que la importación masiva)
+    return construir_cui(str(digito_especie), codigo_depto, nuevo_serial)
\ No newline at end of file
@@ -1,3 +1,4 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -6,27 +7,37 @@ from src.models.user_models import UserCreateSchema
 from src.models.database_models import Usuario
 
 # Se importan las funciones de utilidad
-from src.utils.security import get_password_hash
+from src.utils.security import get_password_hash_async
 from .reniec_service import get_data_from_reniec
 
-def create_new_user(user_data: UserCreateSchema, db: Session):
+async def create_new_user(user_data: UserCreateSchema, db: Session):
     """
     Crea un nuevo usuario, validando DNI, normalizando teléfono y obteniendo el nombre.
+    La contraseña se hashea al final, solo si el usuario se va a insertar: argon2 es
+    caro y el pool de hash es acotado (un registro inválido no debe consumirlo).
     """
     # 1. Validar DNI y obtener nombre desde el servicio externo
-    reniec_data = get_data_from_reniec(user_data.numero_de_dni)
+    reniec_data = await get_data_from_reniec(user_data.numero_de_dni)
     if not reniec_data or not reniec_data.get("nombre_completo"):
         return "dni_not_found"
 
-    # 2. Encriptar la contraseña
-    hashed_password = get_password_hash(user_data.password)
-    
-    # 3. Normalizar el número de teléfono al formato E.164 (opcional pero recomendado)
+    # 2. Normalizar el número de teléfono al formato E.164 (opcional pero recomendado)
     formatted_phone = user_data.telefono
     if not formatted_phone.startswith('+'):
         # Asume el código de país de Perú (+51)
         formatted_phone = f"+51{user_data.telefono}"
 
+    # 3. Duplicados antes de hashear (el IntegrityError de abajo cubre las carreras)
+    existente = db.query(Usuario.telefono).filter(or_(
+        Usuario.numero_de_dni == user_data.numero_de_dni,
+        Usuario.email == user_data.email,
+        Usuario.telefono == formatted_phone,
+    )).first()
+    if existente is not None:
+        return "duplicate_phone" if existente.telefono == formatted_phone else "duplicate_entry"
+
+    hashed_password = await get_password_hash_async(user_data.password)
+
     # 4. Crear el objeto de usuario para la base de datos
     db_user = Usuario(
         # --- CORRECCIÓN AQUÍ ---
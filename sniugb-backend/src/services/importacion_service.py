@@ -0,0 +1,275 @@
+"""
+Importación masiva de animales a un predio desde un CSV o XLSX.
+
+1. El archivo se lee fila a fila desde el temporal del upload (Starlette lo vuelca
+   a disco pasado 1 MB), sin cargarlo entero en memoria.
+2. Las filas se validan por lotes de ANIMALES_IMPORT_CHUNK en el threadpool (no
+   bloquean el event loop) contra los catálogos de razas y departamentos en caché.
+3. Se reserva de una vez un bloque contiguo de seriales de CUI por especie.
+4. Las filas válidas se insertan con un solo COPY y un solo commit.
+
+Por defecto es todo o nada: si alguna fila tiene errores no se inserta ninguna
+(re-subir el archivo corregido no duplica animales). Con `parcial=True` se
+insertan las válidas y el reporte lista las rechazadas.
+"""
+import csv
+import io
+import os
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import BinaryIO, Iterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.models.database_models import AnimalCondicionSalud, Predio
+from src.services.animal_service import construir_cui, reservar_seriales_cui
+from src.utils import catalogo_cache
+from src.utils.catalogo_cache import Catalogos
+from src.utils.metrics import ANIMAL_IMPORT_ROWS
+
+MAX_FILAS = int(os.getenv("ANIMALES_IMPORT_MAX_ROWS", "20000"))
+MAX_BYTES = int(float(os.getenv("ANIMALES_IMPORT_MAX_MB", "10")) * 1024 * 1024)
+LOTE = int(os.getenv("ANIMALES_IMPORT_CHUNK", "1000"))
+MAX_ERRORES = int(os.getenv("ANIMALES_IMPORT_MAX_ERRORS", "500"))  # errores detallados en la respuesta
+
+COLUMNAS = ("nombre", "raza", "sexo", "fecha_nacimiento", "peso")
+ALIAS = {"fecha_de_nacimiento": "fecha_nacimiento", "nacimiento": "fecha_nacimiento", "peso_kg": "peso"}
+SEXOS = {"MACHO", "HEMBRA"}
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+
+COPY_ANIMALES = (
+    "COPY animales (cui, nombre, raza_id, sexo, fecha_nacimiento, peso, condicion_salud, estado, predio_codigo) "
+    "FROM STDIN"
+)
+
+
+class ArchivoInvalido(ValueError):
+    """El archivo no se puede procesar (formato, encabezados, tamaño)."""
+
+
+@dataclass
+class FilaValida:
+    fila: int
+    nombre: str
+    raza_id: int
+    digito_especie: str
+    sexo: str
+    fecha_nacimiento: date
+    peso: str
+    cui: str | None = None
+
+
+# ---------- lectura ----------
+
+def _normalizar_encabezado(valor) -> str:
+    texto = unicodedata.normalize("NFKD", str(valor or "")).encode("ascii", "ignore").decode()
+    clave = "_".join(texto.strip().lower().split())
+    return ALIAS.get(clave, clave)
+
+
+def _encabezados(crudos) -> list[str]:
+    encabezados = [_normalizar_encabezado(h) for h in crudos]
+    faltan = [c for c in COLUMNAS if c not in encabezados]
+    if faltan:
+        raise ArchivoInvalido(f"Faltan columnas: {', '.join(faltan)}. Se esperan: {', '.join(COLUMNAS)}.")
+    return encabezados
+
+
+def _filas_csv(archivo: BinaryIO) -> Iterator[tuple[int, dict]]:
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")  # Excel en español exporta con ';'
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(texto, dialecto)
+        encabezados = _encabezados(next(lector, []))
+        for numero, valores in enumerate(lector, start=2):
+            yield numero, dict(zip(encabezados, valores))
+    except UnicodeDecodeError:
+        raise ArchivoInvalido("El CSV debe estar codificado en UTF-8.")
+    finally:
+        texto.detach()  # no cerrar el archivo del upload
+
+
+def _filas_xlsx(archivo: BinaryIO) -> Iterator[tuple[int, dict]]:
+    import zipfile
+
+    from openpyxl import load_workbook  # import diferido: solo la importación XLSX lo necesita
+
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, ValueError, OSError):
+        raise ArchivoInvalido("El archivo XLSX está dañado o no es un libro de Excel.")
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = _encabezados(next(filas, ()))
+        for numero, valores in enumerate(filas, start=2):
+            yield numero, dict(zip(encabezados, valores))
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo: BinaryIO, nombre_archivo: str) -> Iterator[tuple[int, dict]]:
+    """(número de fila en la planilla, {columna: valor}); la fila 1 son los encabezados."""
+    extension = (nombre_archivo or "").rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return _filas_csv(archivo)
+    if extension == "xlsx":
+        return _filas_xlsx(archivo)
+    raise ArchivoInvalido("Formato no soportado: subir un archivo .csv o .xlsx.")
+
+
+# ---------- validación ----------
+
+def _texto(valor) -> str:
+    return "" if valor is None else str(valor).strip()
+
+
+def _fecha(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    raise ValueError("Fecha inválida: usar AAAA-MM-DD o DD/MM/AAAA.")
+
+
+def _peso(valor) -> str:
+    if isinstance(valor, (int, float)):
+        numero = float(valor)
+    else:
+        try:
+            numero = float(_texto(valor).replace(",", "."))
+        except ValueError:
+            raise ValueError("El peso debe ser un número.")
+    if numero <= 0:
+        raise ValueError("El peso debe ser mayor que 0.")
+    return f"{numero:g}"
+
+
+def validar_fila(numero: int, datos: dict, catalogos: Catalogos) -> tuple[FilaValida | None, list[dict]]:
+    errores = []
+
+    def error(columna: str, mensaje: str) -> None:
+        errores.append({"fila": numero, "columna": columna, "mensaje": mensaje})
+
+    nombre = _texto(datos.get("nombre"))
+    if not nombre:
+        error("nombre", "El nombre es obligatorio.")
+
+    raza = catalogos.razas.get(_texto(datos.get("raza")).upper())
+    if raza is None:
+        error("raza", f"La raza '{_texto(datos.get('raza'))}' no es válida.")
+
+    sexo = _texto(datos.get("sexo")).upper()
+    if sexo not in SEXOS:
+        error("sexo", "El sexo debe ser MACHO o HEMBRA.")
+
+    fecha = peso = None
+    try:
+        fecha = _fecha(datos.get("fecha_nacimiento"))
+        if fecha > date.today():
+            error("fecha_nacimiento", "La fecha de nacimiento no puede ser futura.")
+    except ValueError as e:
+        error("fecha_nacimiento", str(e))
+    try:
+        peso = _peso(datos.get("peso"))
+    except ValueError as e:
+        error("peso", str(e))
+
+    if errores:
+        return None, errores
+    return FilaValida(numero, nombre, raza[0], raza[1], sexo, fecha, peso), []
+
+
+def _validar_lote(filas: Iterator[tuple[int, dict]], catalogos: Catalogos) -> tuple[int, list[FilaValida], list[dict]]:
+    """Lee y valida hasta LOTE filas no vacías. Se ejecuta en el threadpool."""
+    leidas, validas, errores = 0, [], []
+    for numero, datos in filas:
+        if not any(_texto(v) for v in datos.values()):
+            continue  # filas en blanco al final de la planilla
+        leidas += 1
+        valida, errores_fila = validar_fila(numero, datos, catalogos)
+        if valida is not None:
+            validas.append(valida)
+        errores.extend(errores_fila)
+        if leidas >= LOTE:
+            break
+    return leidas, validas, errores
+
+
+# ---------- importación ----------
+
+async def _copiar(db: AsyncSession, predio_codigo: str, filas: list[FilaValida]) -> None:
+    """COPY dentro de la transacción en curso de la sesión (la que reservó los seriales)."""
+    conexion = await (await db.connection()).get_raw_connection()
+    async with conexion.driver_connection.cursor() as cur:
+        async with cur.copy(COPY_ANIMALES) as copy:
+            for f in filas:
+                await copy.write_row((
+                    f.cui, f.nombre, f.raza_id, f.sexo, f.fecha_nacimiento, f.peso,
+                    AnimalCondicionSalud.SANO.name, "activo", predio_codigo,
+                ))
+
+
+async def importar_animales(db: AsyncSession, predio: Predio, archivo: BinaryIO, nombre_archivo: str,
+                            parcial: bool = False) -> dict:
+    """
+    Valida e inserta los animales del archivo en `predio`. Devuelve el reporte
+    (ImportacionAnimalesResponseSchema). Lanza ArchivoInvalido o ValueError.
+    """
+    inicio = time.perf_counter()
+    catalogos = await catalogo_cache.obtener(db)
+    codigo_depto = catalogos.departamentos.get((predio.departamento or "").upper())
+    if codigo_depto is None:
+        raise ValueError(f"El departamento del predio ('{predio.departamento}') no es válido.")
+
+    filas = leer_filas(archivo, nombre_archivo)
+    total, validas, errores = 0, [], []
+    while True:
+        leidas, validas_lote, errores_lote = await run_in_threadpool(_validar_lote, filas, catalogos)
+        total += leidas
+        if total > MAX_FILAS:
+            raise ArchivoInvalido(f"El archivo supera el máximo de {MAX_FILAS} animales por importación.")
+        validas.extend(validas_lote)
+        errores.extend(errores_lote)
+        if leidas < LOTE:
+            break
+
+    rechazadas = total - len(validas)
+    insertar = validas if (parcial or not rechazadas) else []
+    if insertar:
+        # Un bloque contiguo por especie; en orden fijo para no cruzar locks de cui_contadores con otra importación
+        por_especie: dict[str, list[FilaValida]] = {}
+        for f in insertar:
+            por_especie.setdefault(f.digito_especie, []).append(f)
+        for especie in sorted(por_especie):
+            grupo = por_especie[especie]
+            primero = await db.run_sync(reservar_seriales_cui, codigo_depto, especie, len(grupo))
+            for serial, f in enumerate(grupo, start=primero):
+                f.cui = construir_cui(especie, codigo_depto, serial)
+        await _copiar(db, predio.codigo_predio, insertar)
+        await db.commit()
+
+    ANIMAL_IMPORT_ROWS.labels(resultado="insertada").inc(len(insertar))
+    ANIMAL_IMPORT_ROWS.labels(resultado="rechazada").inc(rechazadas)
+    return {
+        "filas": total,
+        "insertados": len(insertar),
+        "rechazadas": rechazadas,
+        "errores": errores[:MAX_ERRORES],
+        "errores_omitidos": max(len(errores) - MAX_ERRORES, 0),
+        "animales": [{"fila": f.fila, "cui": f.cui} for f in insertar],
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
@@ -0,0 +1,145 @@
+"""
+Difusión en tiempo real de notificaciones (stream SSE) sobre LISTEN/NOTIFY.
+
+Los triggers de la tabla `notificaciones` publican cada cambio en el canal
+`sniugb_notificaciones` al hacer commit (migración 4b7d2e9c1f60), venga del
+worker que venga. Cada proceso mantiene UNA conexión dedicada con LISTEN y
+reparte los eventos en memoria a las suscripciones SSE del usuario.
+
+Backpressure: cada suscripción tiene una cola acotada. Si el cliente no consume
+al ritmo (red lenta, pestaña dormida), se vacía la cola y se le envía un único
+`resync`: el cliente recarga la lista y el contador por los endpoints REST. Lo
+mismo si se cae la conexión LISTEN (pudieron perderse eventos mientras tanto).
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+
+import psycopg
+
+from src.utils.metrics import NOTIFY_LISTENER_UP, SSE_CONNECTIONS, SSE_REJECTED, SSE_RESYNCS
+
+logger = logging.getLogger(__name__)
+
+CANAL = "sniugb_notificaciones"
+MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "2000"))     # por proceso
+MAX_PER_USER = int(os.getenv("SSE_MAX_CONNECTIONS_PER_USER", "5"))  # pestañas/dispositivos
+QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+
+RESYNC = {"evento": "resync"}
+
+
+class StreamSaturado(Exception):
+    """Se alcanzó el tope de conexiones SSE (del proceso o del usuario)."""
+
+
+def _dsn() -> str:
+    from src.config.database import listen_dsn  # diferido: evita el ciclo con la config de la BD
+    return listen_dsn()
+
+
+class Suscripcion:
+    def __init__(self, dni: str):
+        self.dni = dni
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def entregar(self, evento: dict) -> None:
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.resync("backpressure")
+
+    def resync(self, motivo: str) -> None:
+        while not self.cola.empty():
+            self.cola.get_nowait()
+        self.cola.put_nowait(RESYNC)
+        SSE_RESYNCS.labels(motivo=motivo).inc()
+
+
+class Difusor:
+    """Una conexión LISTEN por proceso y reparto en memoria por DNI."""
+
+    def __init__(self):
+        self._suscripciones: dict[str, set[Suscripcion]] = defaultdict(set)
+        self._total = 0
+        self._tarea: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def suscribir(self, dni: str) -> Suscripcion:
+        if self._total >= MAX_CONNECTIONS or len(self._suscripciones.get(dni, ())) >= MAX_PER_USER:
+            SSE_REJECTED.inc()
+            raise StreamSaturado()
+        sub = Suscripcion(dni)
+        self._suscripciones[dni].add(sub)
+        self._total += 1
+        SSE_CONNECTIONS.set(self._total)
+        self._asegurar_escucha()
+        return sub
+
+    def desuscribir(self, sub: Suscripcion) -> None:
+        subs = self._suscripciones.get(sub.dni)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._suscripciones[sub.dni]
+        self._total -= 1
+        SSE_CONNECTIONS.set(self._total)
+
+    def _asegurar_escucha(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._tarea is None or self._tarea.done() or self._loop is not loop:
+            self._tarea = loop.create_task(self._escuchar())
+            self._loop = loop
+
+    def _repartir(self, payload: str) -> None:
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            logger.warning("Payload NOTIFY inválido en %s: %.200s", CANAL, payload)
+            return
+        for sub in tuple(self._suscripciones.get(evento.get("usuario_dni"), ())):
+            sub.entregar(evento)
+
+    def _resync_todos(self, motivo: str) -> None:
+        for subs in self._suscripciones.values():
+            for sub in subs:
+                sub.resync(motivo)
+
+    async def _escuchar(self) -> None:
+        espera, reconexion = 1.0, False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(_dsn(), autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CANAL}")
+                    NOTIFY_LISTENER_UP.set(1)
+                    espera = 1.0
+                    if reconexion:
+                        # Lo publicado mientras no escuchábamos se perdió
+                        self._resync_todos("reconexion")
+                    async for notificacion in conn.notifies():
+                        self._repartir(notificacion.payload)
+            except asyncio.CancelledError:
+                NOTIFY_LISTENER_UP.set(0)
+                raise
+            except Exception as e:
+                NOTIFY_LISTENER_UP.set(0)
+                logger.warning("Conexión LISTEN %s caída (%s); reintento en %.0f s", CANAL, e, espera)
+            reconexion = True
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 30.0)
+
+    async def detener(self) -> None:
+        """Cierra la conexión LISTEN (apagado de la app)."""
+        if self._tarea is not None and not self._tarea.done():
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+        self._tarea = None
+
+
+difusor = Difusor()
@@ -1,55 +1,103 @@
 import os
-import requests
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 from typing import List
-from src.models.database_models import Animal
+
+import httpx
 from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from src.models.database_models import Animal, MensajeSaliente
+from src.utils import http_client
 
 load_dotenv()
 
-def send_reset_code_by_email(to_email: str, code: str) -> bool:
-    api_key = os.getenv("SENDGRID_API_KEY")
-    from_email = os.getenv("FROM_EMAIL")
+SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
+WHATSAPP_API_URL = "https://graph.facebook.com/v18.0/{phone_number_id}/messages"
+
+
+async def enviar_email(api_key: str, from_email: str, to_email: str, subject: str, html_content: str) -> int:
+    """
+    Envía un correo con la API v3 de SendGrid por el cliente HTTP compartido
+    (sin crear un SendGridAPIClient por mensaje). Devuelve el status HTTP.
+    """
+    resp = await http_client.request(
+        "sendgrid", "POST", SENDGRID_URL,
+        headers={"Authorization": f"Bearer {api_key}"},
+        json={
+            "personalizations": [{"to": [{"email": to_email}]}],
+            "from": {"email": from_email},
+            "subject": subject,
+            "content": [{"type": "text/html", "value": html_content}],
+        },
+    )
+    if resp.status_code not in (200, 202):
+        print(f"SendGrid no aceptó el envío: {resp.status_code} {resp.text}")
+    return resp.status_code
+
+
+async def enviar_whatsapp(token: str, phone_number_id: str, payload: dict) -> httpx.Response:
+    """POST a la Graph API de WhatsApp; lanza httpx.HTTPStatusError si no es 2xx."""
+    resp = await http_client.request(
+        "whatsapp", "POST", WHATSAPP_API_URL.format(phone_number_id=phone_number_id),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        json=payload,
+    )
+    resp.raise_for_status()
+    return resp
+
+
+def config_email() -> tuple[str | None, str | None]:
+    """(SENDGRID_API_KEY, FROM_EMAIL)"""
+    return os.getenv("SENDGRID_API_KEY"), os.getenv("FROM_EMAIL")
+
+
+def config_whatsapp() -> tuple[str | None, str | None]:
+    """(token, phone_number_id). Acepta ambos nombres de variable para compatibilidad."""
+    return (os.getenv("WHATSAPP_TOKEN") or os.getenv("WHATSAPP_API_TOKEN")), os.getenv("WHATSAPP_PHONE_NUMBER_ID")
+
+
+def _encolar(db: Session, canal: str, tipo: str, destinatario: str, payload: dict) -> MensajeSaliente:
+    """
+    Agrega el mensaje al outbox en la sesión del llamador: se guarda con su commit
+    (o se descarta con su rollback). Lo envía el despachador (src/services/outbox_service.py).
+    """
+    mensaje = MensajeSaliente(canal=canal, tipo=tipo, destinatario=destinatario, payload=payload)
+    db.add(mensaje)
+    return mensaje
+
+
+async def send_reset_code_by_email(to_email: str, code: str) -> bool:
+    api_key, from_email = config_email()
     if not api_key or not from_email:
         print("Falta SENDGRID_API_KEY o FROM_EMAIL")
         return False
 
-    message = Mail(
-        from_email=from_email,
-        to_emails=to_email,
+    message = dict(
+        to_email=to_email,
         subject='Tu Código de Recuperación de Contraseña SNIUGB',
         html_content=(
             'Hola,<br><br>'
             f'Tu código para restablecer tu contraseña es: <strong>{code}</strong><br><br>'
             'Este código expirará en 10 minutos.'
-        )
+        ),
     )
     try:
-        sg = SendGridAPIClient(api_key)
-        resp = sg.send(message)
-        ok = resp.status_code in (200, 202)
-        if not ok:
-            print(f"SendGrid no aceptó el envío: {resp.status_code} {getattr(resp, 'body', '')}")
-        else:
-            print(f"Correo de reseteo aceptado por SendGrid ({resp.status_code}) para {to_email}")
+        status_code = await enviar_email(api_key, from_email, **message)
+        ok = status_code in (200, 202)
+        if ok:
+            print(f"Correo de reseteo aceptado por SendGrid ({status_code}) para {to_email}")
         return ok
     except Exception as e:
         print(f"Error al enviar email de reseteo: {e}")
         return False
 
 
-def send_reset_code_by_whatsapp(to_phone: str, code: str) -> bool:
-    # Acepta ambos nombres de variable para compatibilidad
-    whatsapp_token = os.getenv("WHATSAPP_TOKEN") or os.getenv("WHATSAPP_API_TOKEN")
-    phone_number_id = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
+async def send_reset_code_by_whatsapp(to_phone: str, code: str) -> bool:
+    whatsapp_token, phone_number_id = config_whatsapp()
     if not whatsapp_token or not phone_number_id:
         print("Falta WHATSAPP_TOKEN/WHATSAPP_API_TOKEN o WHATSAPP_PHONE_NUMBER_ID")
         return False
 
     formatted_to_phone = to_phone[1:] if to_phone.startswith('+') else to_phone
-    api_url = f"https://graph.facebook.com/v18.0/{phone_number_id}/messages"
-    headers = {"Authorization": f"Bearer {whatsapp_token}", "Content-Type": "application/json"}
 
     payload = {
         "messaging_product": "whatsapp",
@@ -69,31 +117,30 @@ def send_reset_code_by_whatsapp(to_phone: str, code: str) -> bool:
         }
     }
     try:
-        r = requests.post(api_url, headers=headers, json=payload)
-        r.raise_for_status()
+        await enviar_whatsapp(whatsapp_token, phone_number_id, payload)
         print(f"WhatsApp reset enviado a {formatted_to_phone}")
         return True
-    except requests.exceptions.RequestException as e:
-        print(f"Error WhatsApp reset: {e.response.text if e.response else e}")
+    except httpx.HTTPStatusError as e:
+        print(f"Error WhatsApp reset: {e.response.text}")
+        return False
+    except httpx.HTTPError as e:
+        print(f"Error WhatsApp reset: {e}")
         return False
 
 
-def send_transfer_request_email(to_email: str, solicitante_nombre: str, codigo: str, animales: List[Animal]) -> bool:
+def enqueue_transfer_request_email(
+    db: Session, to_email: str, solicitante_nombre: str, codigo: str, animales: List[Animal]
+) -> MensajeSaliente | None:
+    if not to_email:
+        return None
     animal_list_html = "<ul>"
     for animal in animales:
         cui_tail = animal.cui[-4:] if getattr(animal, "cui", None) else "----"
         animal_list_html += f"<li><b>{animal.nombre}</b> (CUI: ...{cui_tail})</li>"
     animal_list_html += "</ul>"
 
-    api_key = os.getenv("SENDGRID_API_KEY")
-    from_email = os.getenv("FROM_EMAIL")
-    if not api_key or not from_email:
-        print("Falta SENDGRID_API_KEY o FROM_EMAIL")
-        return False
-
-    message = Mail(
-        from_email=from_email,
-        to_emails=to_email,
+    message = dict(
+        to_email=to_email,
         subject='[SNIUGB] Tienes una nueva solicitud de transferencia',
         html_content=f'''
             Hola,<br><br>
@@ -105,35 +152,19 @@ def send_transfer_request_email(to_email: str, solicitante_nombre: str, codigo:
             <br>
             Este código es secreto y solo debe ser usado por ti.<br>
             La solicitud expirará en 24 horas.
-        '''
+        ''',
     )
-    try:
-        sg = SendGridAPIClient(api_key)
-        resp = sg.send(message)
-        ok = resp.status_code in (200, 202)
-        if not ok:
-            print(f"SendGrid no aceptó el envío: {resp.status_code} {getattr(resp, 'body', '')}")
-        else:
-            print(f"Correo de transferencia aceptado por SendGrid ({resp.status_code}) para {to_email}")
-        return ok
-    except Exception as e:
-        print(f"Error al enviar email de transferencia: {e}")
-        return False
+    return _encolar(db, "email", "transfer_request", to_email, message)
 
 
-def send_transfer_request_whatsapp(to_phone: str, solicitante_nombre: str, codigo: str, animales: List[Animal]) -> bool:
-    whatsapp_token = os.getenv("WHATSAPP_TOKEN") or os.getenv("WHATSAPP_API_TOKEN")
-    phone_number_id = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
-    if not whatsapp_token or not phone_number_id:
-        print("Falta WHATSAPP_TOKEN/WHATSAPP_API_TOKEN o WHATSAPP_PHONE_NUMBER_ID")
-        return False
-
+def enqueue_transfer_request_whatsapp(
+    db: Session, to_phone: str, solicitante_nombre: str, codigo: str, animales: List[Animal]
+) -> MensajeSaliente | None:
+    if not to_phone:
+        return None
     formatted_to_phone = to_phone[1:] if to_phone.startswith('+') else to_phone
     nombres_animales = ", ".join([animal.nombre for animal in animales]) if animales else "N/A"
 
-    api_url = f"https://graph.facebook.com/v18.0/{phone_number_id}/messages"
-    headers = {"Authorization": f"Bearer {whatsapp_token}", "Content-Type": "application/json"}
-
     payload = {
         "messaging_product": "whatsapp",
         "to": formatted_to_phone,
@@ -159,32 +190,19 @@ def send_transfer_request_whatsapp(to_phone: str, solicitante_nombre: str, codig
             ]
         }
     }
-    try:
-        r = requests.post(api_url, headers=headers, json=payload)
-        r.raise_for_status()
-        print(f"Notificación de transferencia de WhatsApp enviada a {formatted_to_phone}.")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"Error al enviar notificación de transferencia de WhatsApp: {e.response.text if e.response else e}")
-        return False
+    return _encolar(db, "whatsapp", "transfer_request", formatted_to_phone, payload)
 
 
-def send_new_support_ticket_notification(
+def enqueue_new_support_ticket_notification(
+    db: Session,
     admin_email: str,
     user_name: str,
     user_dni: str,
     ticket_category: str,
     ticket_message: str
-) -> bool:
-    api_key = os.getenv("SENDGRID_API_KEY")
-    from_email = os.getenv("FROM_EMAIL")
-    if not api_key or not from_email:
-        print("Falta SENDGRID_API_KEY o FROM_EMAIL")
-        return False
-
-    message = Mail(
-        from_email=from_email,
-        to_emails=admin_email,
+) -> MensajeSaliente:
+    message = dict(
+        to_email=admin_email,
         subject=f'[SNIUGB Soporte] Nuevo Ticket: {ticket_category}',
         html_content=f'''
             <h3>Se ha recibido una nueva solicitud de soporte.</h3>
@@ -193,17 +211,6 @@ def send_new_support_ticket_notification(
             <hr>
             <p><strong>Mensaje:</strong></p>
             <p>{ticket_message}</p>
-        '''
+        ''',
     )
-    try:
-        sg = SendGridAPIClient(api_key)
-        resp = sg.send(message)
-        ok = resp.status_code in (200, 202)
-        if not ok:
-            print(f"SendGrid no aceptó el envío: {resp.status_code} {getattr(resp, 'body', '')}")
-        else:
-            print(f"Notificación de soporte aceptada por SendGrid ({resp.status_code}) para {admin_email}")
-        return ok
-    except Exception as e:
-        print(f"Error al enviar email de soporte: {e}")
-        return False
+    return _encolar(db, "email", "support_ticket", admin_email, message)
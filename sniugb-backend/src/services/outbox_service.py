@@ -0,0 +1,174 @@
+"""
+Despachador del outbox de mensajes (tabla outbox_mensajes).
+
+Los handlers solo insertan el mensaje en su propia transacción
+(notification_service.enqueue_*); aquí se envía en segundo plano:
+
+1. Reclamar un lote: UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+   que lo marca 'enviando' con un lease (proximo_intento = now() + lease). Varios
+   workers pueden despachar a la vez sin tomar el mismo mensaje, y si un worker
+   muere a mitad de envío, el mensaje se vuelve a reclamar al vencer el lease.
+2. Enviar el lote con concurrencia acotada, fuera de toda transacción.
+3. Registrar el resultado: 'enviado', o reintento con backoff exponencial, o
+   'fallido' (error permanente del proveedor o intentos agotados).
+
+Entrega "al menos una vez": un crash entre el envío y el paso 3 puede duplicar
+un mensaje, nunca perderlo.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import func, select, update
+
+from src.config.database import AsyncSessionLocal
+from src.models.database_models import MensajeSaliente
+from src.services.notification_service import config_email, config_whatsapp, enviar_email, enviar_whatsapp
+from src.utils.metrics import OUTBOX_DISPATCH_SECONDS, OUTBOX_MESSAGES
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "10"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_RECLAMABLES = ("pendiente", "enviando")
+
+
+class FalloEntrega(Exception):
+    """El proveedor no aceptó el mensaje. permanente=True: no tiene sentido reintentar (4xx)."""
+
+    def __init__(self, detalle: str, permanente: bool = False):
+        super().__init__(detalle)
+        self.permanente = permanente
+
+
+def _es_permanente(status_code: int) -> bool:
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+async def _entregar(canal: str, payload: dict) -> None:
+    """Envía un mensaje del outbox; lanza FalloEntrega o httpx.HTTPError si no se pudo."""
+    if canal == "email":
+        api_key, from_email = config_email()
+        if not api_key or not from_email:
+            raise FalloEntrega("Falta SENDGRID_API_KEY o FROM_EMAIL")
+        status_code = await enviar_email(api_key, from_email, **payload)
+        if status_code not in (200, 202):
+            raise FalloEntrega(f"SendGrid respondió {status_code}", _es_permanente(status_code))
+    elif canal == "whatsapp":
+        token, phone_number_id = config_whatsapp()
+        if not token or not phone_number_id:
+            raise FalloEntrega("Falta WHATSAPP_TOKEN/WHATSAPP_API_TOKEN o WHATSAPP_PHONE_NUMBER_ID")
+        try:
+            await enviar_whatsapp(token, phone_number_id, payload)
+        except httpx.HTTPStatusError as e:
+            raise FalloEntrega(
+                f"WhatsApp respondió {e.response.status_code}: {e.response.text[:500]}",
+                _es_permanente(e.response.status_code),
+            ) from e
+    else:
+        raise FalloEntrega(f"Canal desconocido: {canal!r}", permanente=True)
+
+
+def _espera_reintento(intentos: int) -> timedelta:
+    # Backoff exponencial con jitter: 30 s, 1 min, 2 min... hasta BACKOFF_MAX_SECONDS
+    base = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(intentos - 1, 0))
+    return timedelta(seconds=random.uniform(base / 2, base))
+
+
+async def _reclamar(lote: int) -> list:
+    candidatos = (
+        select(MensajeSaliente.id)
+        .where(MensajeSaliente.estado.in_(ESTADOS_RECLAMABLES), MensajeSaliente.proximo_intento <= func.now())
+        .order_by(MensajeSaliente.proximo_intento)
+        .limit(lote)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        filas = (await db.execute(
+            update(MensajeSaliente)
+            .where(MensajeSaliente.id.in_(candidatos))
+            .values(
+                estado="enviando",
+                intentos=MensajeSaliente.intentos + 1,
+                proximo_intento=func.now() + timedelta(seconds=LEASE_SECONDS),
+            )
+            .returning(MensajeSaliente.id, MensajeSaliente.canal, MensajeSaliente.payload, MensajeSaliente.intentos)
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+    return filas
+
+
+async def _registrar(enviados: list[int], fallas: list[tuple[int, str, datetime | None]]) -> None:
+    """fallas: (id, error, proximo_intento); proximo_intento None = fallido definitivo."""
+    async with AsyncSessionLocal() as db:
+        if enviados:
+            await db.execute(
+                update(MensajeSaliente)
+                .where(MensajeSaliente.id.in_(enviados))
+                .values(estado="enviado", enviado_en=func.now(), ultimo_error=None)
+                .execution_options(synchronize_session=False)
+            )
+        for mensaje_id, error, proximo in fallas:
+            valores = {"ultimo_error": error[:2000]}
+            if proximo is None:
+                valores["estado"] = "fallido"
+            else:
+                valores.update(estado="pendiente", proximo_intento=proximo)
+            await db.execute(
+                update(MensajeSaliente).where(MensajeSaliente.id == mensaje_id).values(**valores)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+
+
+async def despachar_pendientes(lote: int = BATCH_SIZE) -> int:
+    """Reclama y envía un lote de mensajes. Devuelve cuántos se reclamaron."""
+    inicio = time.perf_counter()
+    filas = await _reclamar(lote)
+    if not filas:
+        return 0
+
+    semaforo = asyncio.Semaphore(CONCURRENCY)
+
+    async def _uno(fila):
+        async with semaforo:
+            try:
+                await _entregar(fila.canal, fila.payload)
+                return fila, None
+            except (FalloEntrega, httpx.HTTPError) as e:
+                return fila, e
+            except Exception as e:
+                # Un payload mal armado (TypeError/KeyError...) no puede tumbar el lote:
+                # sin esto nadie registra el resultado, todo el lote queda 'enviando' y se
+                # reenvía al vencer el lease. Cuenta como intento y se descarta en MAX_ATTEMPTS.
+                logger.exception("Error inesperado enviando el mensaje %s del outbox (%s)", fila.id, fila.canal)
+                return fila, e
+
+    enviados: list[int] = []
+    fallas: list[tuple[int, str, datetime | None]] = []
+    for fila, error in await asyncio.gather(*(_uno(f) for f in filas)):
+        if error is None:
+            enviados.append(fila.id)
+            OUTBOX_MESSAGES.labels(canal=fila.canal, resultado="enviado").inc()
+            continue
+        definitivo = getattr(error, "permanente", False) or fila.intentos >= MAX_ATTEMPTS
+        proximo = None if definitivo else datetime.now(timezone.utc) + _espera_reintento(fila.intentos)
+        fallas.append((fila.id, f"{type(error).__name__}: {error}", proximo))
+        OUTBOX_MESSAGES.labels(canal=fila.canal, resultado="fallido" if definitivo else "reintento").inc()
+        if definitivo:
+            print(f"❌ Mensaje {fila.id} del outbox ({fila.canal}) descartado tras {fila.intentos} intento(s): {error}")
+
+    await _registrar(enviados, fallas)
+    OUTBOX_DISPATCH_SECONDS.observe(time.perf_counter() - inicio)
+    return len(filas)
@@ -1,25 +1,97 @@
-import requests
+import asyncio
 import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import httpx
 from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.config.database import AsyncSessionLocal
+from src.models.database_models import ReniecCache
+from src.utils import http_client
 
 load_dotenv()
 
 APIPERU_TOKEN = os.getenv("APIPERU_TOKEN")
 # CORRECCIÓN: La URL base no debe tener el DNI.
-API_URL = "https://apiperu.dev/api/dni" 
+# APIPERU_URL permite apuntar a un stub local (scripts/reniec_stub.py) en desarrollo/CI.
+API_URL = os.getenv("APIPERU_URL", "https://apiperu.dev/api/dni")
+
+# --- Caché de dos niveles (LRU por worker + tabla reniec_cache compartida) ---
+# Los nombres casi no cambian: TTL largo. Los "no encontrado" caducan antes por si
+# el DNI se registra después o ApiPeru tuvo un falso negativo. Los errores de red
+# o de configuración no se cachean.
+CACHE_TTL = timedelta(hours=float(os.getenv("RENIEC_CACHE_TTL_HOURS", "720")))
+CACHE_NEGATIVE_TTL = timedelta(minutes=float(os.getenv("RENIEC_CACHE_NEGATIVE_TTL_MINUTES", "60")))
+LRU_MAX = int(os.getenv("RENIEC_CACHE_LRU_SIZE", "5000"))
+
+_NO_ENCONTRADO = ""  # marcador en la LRU (None = no está en caché)
+
+_lru: "OrderedDict[str, tuple[float, str]]" = OrderedDict()  # dni -> (vence epoch, nombre | "")
+_en_vuelo: dict[str, asyncio.Task] = {}
+
+
+def _lru_obtener(dni: str) -> str | None:
+    entrada = _lru.get(dni)
+    if entrada is None:
+        return None
+    vence, nombre = entrada
+    if vence < time.time():
+        del _lru[dni]
+        return None
+    _lru.move_to_end(dni)
+    return nombre
+
 
-def get_data_from_reniec(dni: str) -> dict | None:
+def _lru_guardar(dni: str, nombre: str, vence: datetime) -> None:
+    _lru[dni] = (vence.timestamp(), nombre)
+    _lru.move_to_end(dni)
+    while len(_lru) > LRU_MAX:
+        _lru.popitem(last=False)
+
+
+async def _db_obtener(dni: str) -> tuple[str, datetime] | None:
+    async with AsyncSessionLocal() as db:
+        fila = (await db.execute(
+            select(ReniecCache.nombre_completo, ReniecCache.expira)
+            .where(ReniecCache.dni == dni, ReniecCache.expira > datetime.now(timezone.utc))
+        )).first()
+    if fila is None:
+        return None
+    return (fila.nombre_completo or _NO_ENCONTRADO), fila.expira
+
+
+async def _db_guardar(dni: str, nombre: str | None, vence: datetime) -> None:
+    async with AsyncSessionLocal() as db:
+        try:
+            stmt = pg_insert(ReniecCache).values(dni=dni, nombre_completo=nombre, expira=vence)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[ReniecCache.dni],
+                set_={"nombre_completo": stmt.excluded.nombre_completo,
+                      "expira": stmt.excluded.expira,
+                      "consultado_en": datetime.now(timezone.utc)},
+            ))
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            print(f"No se pudo guardar la consulta RENIEC en caché: {e}")
+
+
+async def _consultar_apiperu(dni: str) -> tuple[bool, str | None]:
     """
-    Consulta la API externa para obtener datos de RENIEC a partir de un DNI,
-    usando el método GET y manejando los errores de forma robusta.
+    Consulta ApiPeru. Devuelve (definitivo, nombre): definitivo=False si el
+    resultado no debe cachearse (sin token, error de red, 5xx, circuito abierto...).
     """
     if not APIPERU_TOKEN:
         print("ERROR: No se encontró el token de ApiPeru en el archivo .env")
-        return None
+        return False, None
 
     # CORRECCIÓN: Se construye la URL completa, añadiendo el DNI al final.
     full_url = f"{API_URL}/{dni}"
-    
+
     headers = {
         'Authorization': f'Bearer {APIPERU_TOKEN}',
         'Content-Type': 'application/json',
@@ -27,37 +99,71 @@ def get_data_from_reniec(dni: str) -> dict | None:
     }
 
     try:
-        # CORRECCIÓN: Se usa requests.get() en lugar de requests.post()
-        # y se elimina el parámetro 'json'.
-        response = requests.get(full_url, headers=headers)
+        response = await http_client.request("apiperu", "GET", full_url, headers=headers)
 
         # Esta línea lanzará una excepción para errores como 404, 500, etc.
-        response.raise_for_status() 
-        
+        response.raise_for_status()
+
         data = response.json()
         if data.get("success"):
             # Se extrae el nombre y se limpian espacios extra.
             nombre = data["data"].get("nombres", "")
             apellido_paterno = data["data"].get("apellido_paterno", "")
             apellido_materno = data["data"].get("apellido_materno", "")
-            
-            return {
-                "nombre_completo": f"{nombre} {apellido_paterno} {apellido_materno}".strip()
-            }
+
+            return True, f"{nombre} {apellido_paterno} {apellido_materno}".strip() or None
         else:
             print(f"ApiPeru devolvió un error de negocio: {data.get('message', 'Error desconocido')}")
-            return None
+            return True, None
 
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         # Este bloque se activa si raise_for_status() detecta un error.
         # Es ideal para manejar el error 404 (DNI no encontrado).
         if e.response.status_code == 404:
             print(f"DNI no encontrado en ApiPeru: {dni}")
-        else:
-            print(f"Error HTTP inesperado desde ApiPeru: {e.response.status_code} - {e.response.text}")
-        return None
-            
-    except requests.exceptions.RequestException as e:
-        # Para cualquier otro tipo de error (ej. problemas de red, timeout).
+            return True, None
+        print(f"Error HTTP inesperado desde ApiPeru: {e.response.status_code} - {e.response.text}")
+        return False, None
+
+    except httpx.HTTPError as e:
+        # Para cualquier otro tipo de error (ej. problemas de red, timeout, circuito abierto).
         print(f"Error de conexión al consultar la API de RENIEC: {e}")
-        return None
\ No newline at end of file
+        return False, None
+
+
+async def _resolver(dni: str) -> str | None:
+    """Nivel 2 (BD) y, si no está, ApiPeru; guarda el resultado en ambos niveles."""
+    cacheado = await _db_obtener(dni)
+    if cacheado is not None:
+        nombre, vence = cacheado
+        _lru_guardar(dni, nombre, vence)
+        return nombre or None
+
+    definitivo, nombre = await _consultar_apiperu(dni)
+    if definitivo:
+        vence = datetime.now(timezone.utc) + (CACHE_TTL if nombre else CACHE_NEGATIVE_TTL)
+        await _db_guardar(dni, nombre, vence)
+        _lru_guardar(dni, nombre or _NO_ENCONTRADO, vence)
+    return nombre
+
+
+async def get_data_from_reniec(dni: str) -> dict | None:
+    """
+    Consulta la API externa para obtener datos de RENIEC a partir de un DNI,
+    usando el método GET y manejando los errores de forma robusta.
+    Pasa por la caché (LRU del worker -> tabla reniec_cache -> ApiPeru) y las
+    consultas simultáneas del mismo DNI comparten una sola llamada a ApiPeru.
+    """
+    nombre = _lru_obtener(dni)
+    if nombre is None:
+        tarea = _en_vuelo.get(dni)
+        if tarea is None:
+            tarea = asyncio.ensure_future(_resolver(dni))
+            _en_vuelo[dni] = tarea
+            tarea.add_done_callback(lambda _: _en_vuelo.pop(dni, None))
+        # shield: si este llamador se cancela, los demás siguen esperando la misma consulta
+        nombre = await asyncio.shield(tarea)
+
+    if not nombre:
+        return None
+    return {"nombre_completo": nombre}
@@ -0,0 +1,45 @@
+import os
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.database_models import Departamento, Raza
+
+# Caché por proceso (por worker) de los catálogos de razas y departamentos: cambian
+# casi nunca y la importación masiva valida miles de filas contra ellos sin ir a la
+# BD por fila. El TTL acota cuánto tarda un worker en ver una raza nueva;
+# CATALOGO_CACHE_TTL_SECONDS=0 la desactiva.
+TTL_SECONDS = float(os.getenv("CATALOGO_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class Catalogos:
+    razas: dict[str, tuple[int, str]]  # NOMBRE EN MAYÚSCULAS -> (id, digito_especie)
+    departamentos: dict[str, str]      # NOMBRE EN MAYÚSCULAS -> codigo_ubigeo
+
+
+_entrada: tuple[float, Catalogos] | None = None
+
+
+async def obtener(db: AsyncSession) -> Catalogos:
+    """Catálogos vigentes; si vencieron se recargan con dos SELECT sobre tablas chicas."""
+    global _entrada
+    if _entrada is not None and _entrada[0] > time.monotonic():
+        return _entrada[1]
+
+    razas = (await db.execute(select(Raza.nombre, Raza.id, Raza.digito_especie))).all()
+    departamentos = (await db.execute(select(Departamento.nombre, Departamento.codigo_ubigeo))).all()
+    catalogos = Catalogos(
+        razas={nombre.upper(): (id_, digito) for nombre, id_, digito in razas},
+        departamentos={nombre.upper(): codigo for nombre, codigo in departamentos},
+    )
+    if TTL_SECONDS > 0:
+        _entrada = (time.monotonic() + TTL_SECONDS, catalogos)
+    return catalogos
+
+
+def limpiar() -> None:
+    global _entrada
+    _entrada = None
@@ -0,0 +1,76 @@
+"""
+CUI (Código Único de Identificación) del animal: 11 dígitos =
+especie (1) + ubigeo del departamento (2) + serie (7) + dígito de control Luhn (1).
+
+- `CUI`: tipo Pydantic para bodies y parámetros; un CUI mal tipeado o mal leído
+  por el lector de crotales se rechaza con 422 antes de tocar la BD.
+- `verificar_cuis`: la misma verificación para miles de CUIs en una pasada
+  vectorizada con NumPy (POST /animales/validar-cuis).
+"""
+from typing import Annotated
+
+from pydantic import AfterValidator, Field
+
+CUI_LONGITUD = 11
+
+MOTIVO_FORMATO = "Debe tener 11 dígitos."
+MOTIVO_CONTROL = "El dígito de control no coincide."
+
+
+# --- Implementación del Algoritmo de Luhn ---
+def calcular_digito_luhn(numero_sin_verificar: str) -> str:
+    suma = 0
+    num_digitos = len(numero_sin_verificar)
+    paridad = num_digitos % 2
+
+    for i, digito_str in enumerate(numero_sin_verificar):
+        digito = int(digito_str)
+        if i % 2 == paridad:
+            digito *= 2
+        if digito > 9:
+            digito -= 9
+        suma += digito
+
+    return str((10 - (suma % 10)) % 10)
+
+
+def validar_cui(valor: str) -> str:
+    valor = valor.strip()
+    if len(valor) != CUI_LONGITUD or not (valor.isascii() and valor.isdigit()):
+        raise ValueError(f"CUI inválido: {MOTIVO_FORMATO.lower()}")
+    if calcular_digito_luhn(valor[:-1]) != valor[-1]:
+        raise ValueError(f"CUI inválido: {MOTIVO_CONTROL.lower()}")
+    return valor
+
+
+CUI = Annotated[str, AfterValidator(validar_cui), Field(examples=["11500000015"])]
+
+
+def verificar_cuis(cuis: list[str]) -> list[str | None]:
+    """
+    Motivo de rechazo de cada CUI (None si es válido), en el mismo orden.
+    Arma una matriz n x 11 de dígitos y calcula el Luhn de todas las filas a la
+    vez, con las mismas posiciones duplicadas que calcular_digito_luhn.
+    """
+    import numpy as np  # import diferido: solo la validación masiva lo necesita
+
+    if not cuis:
+        return []
+    texto = np.asarray([c.strip() for c in cuis], dtype=np.str_)
+    n, ancho = len(texto), texto.dtype.itemsize // 4  # UCS-4: un uint32 por carácter
+    codigos = np.zeros((n, CUI_LONGITUD), dtype=np.int64)
+    usados = min(ancho, CUI_LONGITUD)
+    codigos[:, :usados] = texto.view(np.uint32).reshape(n, ancho)[:, :usados]
+    digitos = codigos - ord("0")
+
+    formato_ok = (np.char.str_len(texto) == CUI_LONGITUD) & ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+
+    base = np.where(formato_ok[:, None], digitos[:, :-1], 0)
+    duplicar = np.arange(CUI_LONGITUD - 1) % 2 == (CUI_LONGITUD - 1) % 2
+    pesados = np.where(duplicar, base * 2, base)
+    pesados = np.where(pesados > 9, pesados - 9, pesados)
+    control = (10 - pesados.sum(axis=1) % 10) % 10
+    control_ok = control == digitos[:, -1]
+
+    motivos = np.where(~formato_ok, MOTIVO_FORMATO, np.where(~control_ok, MOTIVO_CONTROL, ""))
+    return [m or None for m in motivos.tolist()]
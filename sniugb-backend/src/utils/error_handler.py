@@ -1,5 +1,6 @@
 
 from fastapi import Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -14,7 +15,8 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     )
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    details = exc.errors()
+    # jsonable_encoder: los validadores propios (p. ej. el tipo CUI) dejan el ValueError en `ctx`
+    details = jsonable_encoder(exc.errors())
     return JSONResponse(
         status_code=422,
         content={"error": {"code": "VALIDATION_ERROR", "message": "Datos inválidos", "details": details}},
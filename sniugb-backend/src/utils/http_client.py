@@ -0,0 +1,171 @@
+"""
+Cliente HTTP saliente compartido (httpx.AsyncClient) para ApiPeru, WhatsApp
+(graph.facebook.com) y SendGrid.
+
+- Un solo cliente por proceso: pools keep-alive por host, reutilizados entre peticiones.
+- Timeouts por defecto (conexión / lectura) configurables por entorno.
+- Reintentos acotados con backoff exponencial y jitter. Los POST solo se
+  reintentan si la petición no llegó a enviarse (error de conexión) o si el
+  upstream respondió 429/503, para no duplicar mensajes.
+- Circuit breaker por upstream: tras N fallos seguidos se corta el tráfico
+  durante un tiempo y se responde al instante con CircuitoAbierto.
+- Métricas Prometheus de latencia, errores y estado del circuito.
+"""
+import asyncio
+import os
+import random
+import time
+
+import httpx
+
+from src.utils.metrics import OUTBOUND_HTTP_CIRCUIT_OPEN, OUTBOUND_HTTP_ERRORS, OUTBOUND_HTTP_SECONDS
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.2"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "2"))
+CB_FAILURES = int(os.getenv("HTTP_CB_FAILURES", "5"))
+CB_RESET_SECONDS = float(os.getenv("HTTP_CB_RESET_SECONDS", "30"))
+
+IDEMPOTENTES = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+STATUS_REINTENTABLES = {429, 502, 503, 504}
+STATUS_REINTENTABLES_POST = {429, 503}
+
+
+class CircuitoAbierto(httpx.HTTPError):
+    """El upstream acumuló demasiados fallos: no se intenta la llamada."""
+
+    def __init__(self, upstream: str):
+        super().__init__(f"Circuito abierto para '{upstream}'")
+        self.upstream = upstream
+
+
+class CircuitBreaker:
+    """
+    closed -> (CB_FAILURES fallos seguidos) -> open -> (CB_RESET_SECONDS) -> half-open:
+    se deja pasar una sola llamada de prueba; si va bien se cierra, si falla se reabre.
+    """
+
+    def __init__(self, upstream: str, fallos: int = CB_FAILURES, espera: float = CB_RESET_SECONDS):
+        self.upstream = upstream
+        self.umbral = fallos
+        self.espera = espera
+        self.fallos = 0
+        self.abierto_hasta = 0.0
+        self.sondeando = False
+        OUTBOUND_HTTP_CIRCUIT_OPEN.labels(upstream=upstream).set(0)
+
+    def permitir(self) -> bool:
+        if self.fallos < self.umbral:
+            return True
+        if time.monotonic() < self.abierto_hasta or self.sondeando:
+            return False
+        self.sondeando = True  # half-open: una llamada de prueba
+        return True
+
+    def exito(self) -> None:
+        self.fallos = 0
+        self.sondeando = False
+        OUTBOUND_HTTP_CIRCUIT_OPEN.labels(upstream=self.upstream).set(0)
+
+    def fallo(self) -> None:
+        self.fallos += 1
+        self.sondeando = False
+        if self.fallos >= self.umbral:
+            self.abierto_hasta = time.monotonic() + self.espera
+            OUTBOUND_HTTP_CIRCUIT_OPEN.labels(upstream=self.upstream).set(1)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_cliente: httpx.AsyncClient | None = None
+_cliente_loop: asyncio.AbstractEventLoop | None = None
+
+
+def breaker(upstream: str) -> CircuitBreaker:
+    if upstream not in _breakers:
+        _breakers[upstream] = CircuitBreaker(upstream)
+    return _breakers[upstream]
+
+
+def cliente() -> httpx.AsyncClient:
+    """Cliente compartido del event loop actual (se recrea si cambia el loop, p. ej. en scripts)."""
+    global _cliente, _cliente_loop
+    loop = asyncio.get_running_loop()
+    if _cliente is None or _cliente.is_closed or _cliente_loop is not loop:
+        _cliente = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+        )
+        _cliente_loop = loop
+    return _cliente
+
+
+async def cerrar() -> None:
+    """Cierra el cliente compartido (apagado de la app)."""
+    global _cliente
+    if _cliente is not None and not _cliente.is_closed:
+        await _cliente.aclose()
+    _cliente = None
+
+
+def _espera_reintento(intento: int) -> float:
+    # Backoff exponencial con "full jitter"
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** intento))
+
+
+async def request(upstream: str, method: str, url: str, *, reintentos: int | None = None, **kwargs) -> httpx.Response:
+    """
+    Petición HTTP a `upstream` (etiqueta lógica: "apiperu", "whatsapp", "sendgrid"...).
+    Devuelve la respuesta tal cual (también 4xx/5xx: el llamador decide) y lanza
+    httpx.HTTPError en errores de transporte o CircuitoAbierto.
+    """
+    method = method.upper()
+    cb = breaker(upstream)
+    reintentos = MAX_RETRIES if reintentos is None else reintentos
+    idempotente = method in IDEMPOTENTES
+    intento = 0
+    while True:
+        if not cb.permitir():
+            OUTBOUND_HTTP_ERRORS.labels(upstream=upstream, kind="circuit_open").inc()
+            raise CircuitoAbierto(upstream)
+
+        inicio = time.perf_counter()
+        try:
+            resp = await cliente().request(method, url, **kwargs)
+        except asyncio.CancelledError:
+            cb.sondeando = False  # una sonda cancelada no debe dejar el circuito trabado
+            raise
+        except httpx.TransportError as e:
+            OUTBOUND_HTTP_SECONDS.labels(upstream=upstream, method=method, status="error").observe(
+                time.perf_counter() - inicio
+            )
+            OUTBOUND_HTTP_ERRORS.labels(upstream=upstream, kind=type(e).__name__).inc()
+            cb.fallo()
+            # Sin enviar (conexión/pool) se puede reintentar siempre; si ya se envió, solo si es idempotente
+            no_enviada = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+            if intento < reintentos and (idempotente or no_enviada):
+                await asyncio.sleep(_espera_reintento(intento))
+                intento += 1
+                continue
+            raise
+
+        OUTBOUND_HTTP_SECONDS.labels(upstream=upstream, method=method, status=str(resp.status_code)).observe(
+            time.perf_counter() - inicio
+        )
+        if resp.status_code >= 500 or resp.status_code == 429:
+            OUTBOUND_HTTP_ERRORS.labels(upstream=upstream, kind=f"http_{resp.status_code}").inc()
+            cb.fallo()
+        else:
+            cb.exito()  # 4xx de negocio (p. ej. 404 de ApiPeru) no son fallas del upstream
+
+        reintentables = STATUS_REINTENTABLES if idempotente else STATUS_REINTENTABLES_POST
+        if resp.status_code in reintentables and intento < reintentos:
+            await resp.aclose()
+            await asyncio.sleep(_espera_reintento(intento))
+            intento += 1
+            continue
+        return resp
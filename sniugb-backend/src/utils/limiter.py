@@ -1,5 +1,109 @@
+import logging
+import os
+
+from fastapi import Request
+from limits import parse
 from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from slowapi.wrappers import Limit
+
+from src.utils import rate_limit_storage  # noqa: F401  (registra el esquema sniugb+postgresql://)
+from src.utils.metrics import RATE_LIMIT_DECISIONS
+
+logger = logging.getLogger(__name__)
+
+# --- Storage compartido ---
+# Los contadores deben ser comunes a todos los workers y sobrevivir reinicios:
+#   RATE_LIMIT_STORAGE_URI explícito (redis://..., memory://, sniugb+postgresql://), o
+#   REDIS_URL si responde, o
+#   Postgres (tabla rate_limit_contadores) como respaldo.
+# Si el storage cae en caliente, slowapi sigue limitando en memoria por worker
+# y vuelve al storage compartido cuando se recupera.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI")
+REDIS_URL = os.getenv("REDIS_URL")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+POSTGRES_STORAGE_URI = "sniugb+postgresql://"
+
+
+def _redis_disponible(url: str) -> bool:
+    try:
+        import redis
+        return bool(redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5).ping())
+    except Exception as e:
+        logger.warning("Redis no disponible para el rate limiter (%s); se usa Postgres.", e)
+        return False
+
+
+def _storage_uri() -> str:
+    if RATE_LIMIT_STORAGE_URI:
+        return RATE_LIMIT_STORAGE_URI
+    if REDIS_URL and _redis_disponible(REDIS_URL):
+        return REDIS_URL
+    return POSTGRES_STORAGE_URI
+
+
+class _EstrategiaMedida:
+    """Envuelve la estrategia de `limits` para contar cada decisión en métricas."""
+
+    def __init__(self, estrategia):
+        self._estrategia = estrategia
+
+    def __getattr__(self, nombre):
+        return getattr(self._estrategia, nombre)
+
+    def hit(self, item, *identifiers, cost: int = 1) -> bool:
+        permitido = self._estrategia.hit(item, *identifiers, cost=cost)
+        # identifiers = (clave, ámbito): la clave (IP/DNI) no va como etiqueta
+        RATE_LIMIT_DECISIONS.labels(
+            scope=identifiers[-1] if len(identifiers) > 1 else "",
+            key_type="dni" if identifiers and str(identifiers[0]).startswith("dni:") else "ip",
+            limit=str(item),
+            decision="allowed" if permitido else "blocked",
+        ).inc()
+        return permitido
+
+
+class LimiterMedido(Limiter):
+    """Limiter de slowapi cuyas decisiones quedan en sniugb_rate_limit_decisions_total."""
+
+    @property
+    def limiter(self):
+        return _EstrategiaMedida(super().limiter)
+
+
+# Limiter único y reusable por toda la app (por IP; ver limitar_por_dni para DNI)
+limiter = LimiterMedido(
+    key_func=get_remote_address,
+    default_limits=[],
+    storage_uri=_storage_uri(),
+    strategy=RATE_LIMIT_STRATEGY,
+    in_memory_fallback_enabled=True,
+    key_style="endpoint",  # ámbito = módulo.función, no la URL (acota la cardinalidad de métricas)
+)
+
 
-# Limiter único y reusable por toda la app
-limiter = Limiter(key_func=get_remote_address, default_limits=[])
+def limitar_por_dni(request: Request, dni: str, limite: str) -> None:
+    """
+    Aplica `limite` (p. ej. "5/minute") por DNI, además del límite por IP del
+    decorador: frena ataques a una misma cuenta desde muchas IPs. El DNI suele
+    venir en el body, por eso se llama desde el handler y no vía key_func.
+    """
+    if not limiter.enabled or not dni:
+        return
+    item = parse(limite)
+    endpoint = request.scope.get("endpoint")
+    ambito = f"{endpoint.__module__}.{endpoint.__name__}" if endpoint else request.url.path
+    try:
+        permitido = limiter.limiter.hit(item, f"dni:{dni}", ambito)
+    except Exception:
+        # Igual que slowapi en _check_request_limit: si el storage compartido no
+        # responde se pasa al limiter en memoria del worker (y slowapi vuelve al
+        # compartido cuando lo detecta recuperado).
+        if not limiter._in_memory_fallback_enabled or limiter._storage_dead:
+            raise
+        logger.warning("Storage del rate limiter inaccesible; se limita en memoria por worker.")
+        limiter._storage_dead = True
+        permitido = limiter.limiter.hit(item, f"dni:{dni}", ambito)
+    if not permitido:
+        raise RateLimitExceeded(Limit(item, lambda: dni, ambito, False, None, None, None, 1, False))
@@ -0,0 +1,151 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Métricas propias de la aplicación. Se registran en el registry por defecto de
+# prometheus_client, que es el que publica el Instrumentator en /metrics.
+
+# --- Pool de conexiones a la BD ---
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "sniugb_db_pool_checkout_seconds",
+    "Tiempo de espera para obtener una conexión del pool.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_IN_USE = Gauge(
+    "sniugb_db_pool_in_use",
+    "Conexiones del pool actualmente prestadas.",
+    ["pool"],
+)
+DB_POOL_IDLE = Gauge(
+    "sniugb_db_pool_idle",
+    "Conexiones abiertas y libres dentro del pool.",
+    ["pool"],
+)
+DB_POOL_OVERFLOW = Gauge(
+    "sniugb_db_pool_overflow",
+    "Conexiones abiertas por encima de pool_size (overflow).",
+    ["pool"],
+)
+
+
+def instrument_pool(engine, etiqueta: str) -> None:
+    """
+    Publica el estado del pool de `engine` como gauges evaluados al momento del scrape.
+    Se lee `engine.pool` en cada lectura porque `dispose()` reemplaza el pool.
+    """
+    if not hasattr(engine.pool, "checkedout"):
+        return  # NullPool / StaticPool: no hay nada que medir
+    DB_POOL_IN_USE.labels(pool=etiqueta).set_function(lambda: engine.pool.checkedout())
+    DB_POOL_IDLE.labels(pool=etiqueta).set_function(lambda: engine.pool.checkedin())
+    DB_POOL_OVERFLOW.labels(pool=etiqueta).set_function(lambda: max(engine.pool.overflow(), 0))
+
+
+# --- Consultas SQL por petición ---
+DB_QUERIES_PER_REQUEST = Histogram(
+    "sniugb_db_queries_per_request",
+    "Sentencias SQL ejecutadas por petición HTTP.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "sniugb_db_time_per_request_seconds",
+    "Tiempo total en la BD por petición HTTP.",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# --- Sentencias lentas ---
+DB_SLOW_QUERIES = Counter(
+    "sniugb_db_slow_queries_total",
+    "Sentencias SQL que superaron DB_SLOW_QUERY_MS.",
+    ["route"],
+)
+
+# --- Hash de contraseñas (argon2) ---
+PASSWORD_HASH_SECONDS = Histogram(
+    "sniugb_password_hash_seconds",
+    "Duración de cada hash/verificación de contraseña en el pool dedicado.",
+    ["op"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "sniugb_password_hash_pending",
+    "Operaciones de hash en curso o en cola en el pool.",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "sniugb_password_hash_rejected_total",
+    "Operaciones de hash rechazadas (503) por superar PASSWORD_HASH_MAX_PENDING.",
+)
+
+# --- Rate limiter ---
+RATE_LIMIT_DECISIONS = Counter(
+    "sniugb_rate_limit_decisions_total",
+    "Decisiones del rate limiter por ámbito (endpoint), tipo de clave y límite.",
+    ["scope", "key_type", "limit", "decision"],
+)
+
+# --- HTTP saliente (ApiPeru, WhatsApp, SendGrid) ---
+OUTBOUND_HTTP_SECONDS = Histogram(
+    "sniugb_outbound_http_seconds",
+    "Latencia de cada intento de petición HTTP saliente.",
+    ["upstream", "method", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+OUTBOUND_HTTP_ERRORS = Counter(
+    "sniugb_outbound_http_errors_total",
+    "Errores de HTTP saliente: de transporte, 5xx/429 o circuito abierto.",
+    ["upstream", "kind"],
+)
+OUTBOUND_HTTP_CIRCUIT_OPEN = Gauge(
+    "sniugb_outbound_http_circuit_open",
+    "1 si el circuit breaker del upstream está abierto.",
+    ["upstream"],
+)
+
+# --- Outbox de mensajes (email / WhatsApp) ---
+OUTBOX_MESSAGES = Counter(
+    "sniugb_outbox_messages_total",
+    "Intentos de entrega del outbox por canal y resultado (enviado, reintento, fallido).",
+    ["canal", "resultado"],
+)
+OUTBOX_DISPATCH_SECONDS = Histogram(
+    "sniugb_outbox_dispatch_seconds",
+    "Duración de cada lote del despachador del outbox.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# --- Stream SSE de notificaciones (LISTEN/NOTIFY) ---
+SSE_CONNECTIONS = Gauge(
+    "sniugb_sse_connections",
+    "Conexiones SSE abiertas en este proceso.",
+)
+SSE_EVENTS = Counter(
+    "sniugb_sse_events_total",
+    "Eventos enviados por el stream SSE, por tipo.",
+    ["evento"],
+)
+SSE_RESYNCS = Counter(
+    "sniugb_sse_resyncs_total",
+    "Pedidos de resincronización al cliente (cola llena o reconexión del LISTEN).",
+    ["motivo"],
+)
+SSE_REJECTED = Counter(
+    "sniugb_sse_rejected_total",
+    "Conexiones SSE rechazadas (503) por superar los topes de conexiones.",
+)
+NOTIFY_LISTENER_UP = Gauge(
+    "sniugb_notify_listener_up",
+    "1 si la conexión LISTEN de notificaciones está activa en este proceso.",
+)
+
+# --- Contador de notificaciones no leídas ---
+NOTIFICATION_COUNTER_DRIFT = Counter(
+    "sniugb_notification_counter_drift_total",
+    "Contadores de no leídas corregidos por el job de reconciliación.",
+)
+
+# --- Importación masiva de animales ---
+ANIMAL_IMPORT_ROWS = Counter(
+    "sniugb_animal_import_rows_total",
+    "Filas procesadas por la importación masiva de animales (insertada, rechazada).",
+    ["resultado"],
+)
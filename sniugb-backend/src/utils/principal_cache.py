@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.models.database_models import Usuario
+
+logger = logging.getLogger(__name__)
+
+# Caché por proceso (por worker) de los datos del usuario autenticado, para que
+# get_current_user no consulte `datos_del_usuario` en cada petición.
+#
+# Invalidación entre workers: un trigger de `datos_del_usuario` publica el DNI de
+# cada fila modificada o borrada en el canal `sniugb_usuarios` (migración
+# e4a8c2f61b37) al hacer commit, y cada proceso lo escucha con una conexión LISTEN
+# (`escuchar_invalidaciones`, arrancada en el lifespan). Mientras esa conexión no
+# está activa la caché no se usa: sin LISTEN no hay forma de enterarse de que un
+# admin desactivó la cuenta en otro worker. El TTL queda como red de seguridad.
+# AUTH_CACHE_TTL_SECONDS=0 la desactiva.
+TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+MAX_ENTRADAS = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+CANAL = "sniugb_usuarios"
+
+# Las credenciales no se cachean: quien las necesite (cambio de contraseña) las
+# lee de la BD al acceder al atributo (queda expirado en el Usuario reconstruido).
+_EXCLUIDAS = {"password", "reset_token", "reset_token_expires"}
+_COLUMNAS = [attr.key for attr in sa_inspect(Usuario).column_attrs if attr.key not in _EXCLUIDAS]
+
+_lock = threading.Lock()
+_entradas: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+_generacion = 0  # sube con cada invalidación; ver marca()/guardar()
+_escuchando = False
+_tarea: asyncio.Task | None = None
+
+
+def obtener(dni: str) -> dict | None:
+    """Snapshot de columnas del usuario `dni`, o None si no está, venció o no hay LISTEN."""
+    if TTL_SECONDS <= 0 or not _escuchando:
+        return None
+    with _lock:
+        entrada = _entradas.get(dni)
+        if entrada is None:
+            return None
+        vence, snapshot = entrada
+        if vence < time.monotonic():
+            del _entradas[dni]
+            return None
+        _entradas.move_to_end(dni)
+        return snapshot
+
+
+def marca() -> int:
+    """Tomar ANTES de leer el usuario de la BD y pasarla a guardar()."""
+    return _generacion
+
+
+def guardar(user: Usuario, marca_lectura: int) -> None:
+    """
+    Guarda un snapshot de las columnas de `user` (no de sus relaciones ni credenciales).
+    Si hubo una invalidación desde `marca_lectura`, la fila leída puede ser anterior
+    al cambio y no se guarda.
+    """
+    if TTL_SECONDS <= 0 or not _escuchando:
+        return
+    snapshot = {col: getattr(user, col) for col in _COLUMNAS}
+    with _lock:
+        if marca_lectura != _generacion:
+            return
+        _entradas[user.numero_de_dni] = (time.monotonic() + TTL_SECONDS, snapshot)
+        _entradas.move_to_end(user.numero_de_dni)
+        while len(_entradas) > MAX_ENTRADAS:
+            _entradas.popitem(last=False)
+
+
+def invalidar(dni: str) -> None:
+    """Descarta el snapshot de `dni`; la siguiente petición lo relee de la BD."""
+    global _generacion
+    with _lock:
+        _generacion += 1
+        _entradas.pop(dni, None)
+
+
+def limpiar() -> None:
+    global _generacion
+    with _lock:
+        _generacion += 1
+        _entradas.clear()
+
+
+def reconstruir(snapshot: dict, session) -> Usuario:
+    """
+    Crea un Usuario persistente a partir del snapshot y lo asocia a `session`
+    sin ejecutar SELECT: los handlers pueden modificarlo y hacer commit como si
+    lo hubieran leído de la BD (y las relaciones se cargan en diferido).
+    """
+    user = Usuario(**snapshot)
+    make_transient_to_detached(user)
+    session.add(user)
+    return user
+
+
+async def escuchar_invalidaciones() -> None:
+    """LISTEN sobre CANAL hasta ser cancelada; reconecta con backoff si se cae."""
+    import psycopg
+
+    from src.config.database import listen_dsn  # diferido: evita el ciclo con la config de la BD
+
+    global _escuchando
+    espera = 1.0
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(listen_dsn(), autocommit=True) as conn:
+                await conn.execute(f"LISTEN {CANAL}")
+                limpiar()  # lo cambiado mientras no escuchábamos no llegó
+                _escuchando = True
+                espera = 1.0
+                async for notificacion in conn.notifies():
+                    invalidar(notificacion.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Conexión LISTEN %s caída (%s); caché de usuarios desactivada, reintento en %.0f s",
+                           CANAL, e, espera)
+        finally:
+            _escuchando = False
+            limpiar()
+        await asyncio.sleep(espera)
+        espera = min(espera * 2, 30.0)
+
+
+def iniciar() -> None:
+    """Arranca el listener en el event loop actual (lifespan de la app)."""
+    global _tarea
+    if TTL_SECONDS > 0 and (_tarea is None or _tarea.done()):
+        _tarea = asyncio.get_running_loop().create_task(escuchar_invalidaciones())
+
+
+async def detener() -> None:
+    global _tarea
+    if _tarea is not None and not _tarea.done():
+        _tarea.cancel()
+        try:
+            await _tarea
+        except asyncio.CancelledError:
+            pass
+    _tarea = None
@@ -0,0 +1,134 @@
+import contextvars
+import logging
+import os
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from prometheus_fastapi_instrumentator.routing import get_route_name
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.utils.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST
+from src.utils.slow_queries import es_lenta, registrar_lenta
+
+logger = logging.getLogger(__name__)
+
+# Presupuesto de consultas por ruta (detector de N+1).
+#   DB_QUERY_BUDGET_DEFAULT: presupuesto para rutas sin @query_budget (0 = sin límite).
+#   DB_QUERY_BUDGET_STRICT:  si está activo, exceder el presupuesto responde 500
+#                            (pensado para CI / entornos de prueba); si no, solo se loguea.
+QUERY_BUDGET_DEFAULT = int(os.getenv("DB_QUERY_BUDGET_DEFAULT", "0"))
+QUERY_BUDGET_STRICT = os.getenv("DB_QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+
+class RequestQueryStats:
+    """Contador de sentencias y tiempo de BD de una petición."""
+    __slots__ = ("queries", "db_time", "request")
+
+    def __init__(self, request: Request | None = None):
+        self.queries = 0
+        self.db_time = 0.0
+        self.request = request
+
+
+_current: contextvars.ContextVar[RequestQueryStats | None] = contextvars.ContextVar(
+    "sniugb_query_stats", default=None
+)
+
+
+def current_stats() -> RequestQueryStats | None:
+    """Estadísticas de la petición en curso (None fuera de una petición HTTP)."""
+    return _current.get()
+
+
+def route_template(request: Request) -> str:
+    """
+    Plantilla de la ruta (`/api/v1/predios/{codigo_predio}`), no la URL concreta.
+    Se resuelve igual que el label `handler` del Instrumentator para poder cruzar métricas.
+    """
+    return get_route_name(request, should_include_root_path=False) or "none"
+
+
+# Los listeners se registran sobre la clase Engine: cubren el motor síncrono, el
+# asíncrono (su sync_engine) y la réplica sin tener que enumerarlos.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sniugb_inicio = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_sniugb_inicio", None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += duracion
+
+    if es_lenta(duracion):
+        request = stats.request if stats is not None else None
+        registrar_lenta(
+            conn, statement, parameters, executemany, duracion,
+            metodo=request.method if request is not None else None,
+            ruta=route_template(request) if request is not None else None,
+        )
+
+
+def query_budget(max_queries: int):
+    """
+    Declara el máximo de sentencias SQL esperado para un endpoint.
+    Debe ir debajo del decorador de la ruta:
+
+        @router.get("/...")
+        @query_budget(5)
+        async def handler(...): ...
+    """
+    def decorator(fn):
+        fn.__query_budget__ = max_queries
+        return fn
+    return decorator
+
+
+def _budget_for(scope: dict) -> int:
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__query_budget__", QUERY_BUDGET_DEFAULT)
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Cuenta las sentencias SQL y el tiempo de BD de cada petición, los expone en
+    las cabeceras X-DB-Queries / X-DB-Time (ms) y en Prometheus por plantilla de ruta.
+    """
+    stats = RequestQueryStats(request)
+    token = _current.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+
+    ruta = route_template(request)
+    DB_QUERIES_PER_REQUEST.labels(method=request.method, route=ruta).observe(stats.queries)
+    DB_TIME_PER_REQUEST.labels(method=request.method, route=ruta).observe(stats.db_time)
+
+    budget = _budget_for(request.scope)
+    if budget and stats.queries > budget:
+        logger.warning(
+            "Presupuesto de consultas excedido en %s %s: %d > %d",
+            request.method, ruta, stats.queries, budget,
+        )
+        if QUERY_BUDGET_STRICT:
+            response = JSONResponse(
+                status_code=500,
+                content={"error": {
+                    "code": "QUERY_BUDGET_EXCEEDED",
+                    "message": f"{request.method} {ruta} ejecutó {stats.queries} consultas (máximo {budget}).",
+                }},
+            )
+
+    response.headers["X-DB-Queries"] = str(stats.queries)
+    response.headers["X-DB-Time"] = f"{stats.db_time * 1000:.1f}"
+    return response
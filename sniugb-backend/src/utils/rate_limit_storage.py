@@ -0,0 +1,125 @@
+"""
+Storage de `limits` sobre Postgres (tabla rate_limit_contadores), respaldo del
+rate limiter cuando no hay Redis. Comparte los contadores entre workers y
+sobrevive a reinicios, igual que Redis, a costa de una sentencia por chequeo.
+
+Se registra con el esquema `sniugb+postgresql://` y usa el engine de la app.
+Soporta las estrategias sliding-window-counter y fixed-window.
+"""
+import math
+import time
+from datetime import datetime, timezone
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+_ACQUIRE = text("""
+    WITH previa AS (
+        SELECT coalesce(
+            (SELECT conteo FROM rate_limit_contadores WHERE clave = :clave AND ventana = :ventana - 1), 0
+        ) AS conteo
+    )
+    INSERT INTO rate_limit_contadores AS rl (clave, ventana, conteo, expira)
+    SELECT :clave, :ventana, :cantidad, :expira FROM previa
+    WHERE floor(:peso * previa.conteo) + :cantidad <= :limite
+    ON CONFLICT (clave, ventana) DO UPDATE SET conteo = rl.conteo + EXCLUDED.conteo
+    WHERE floor(:peso * (SELECT conteo FROM previa) + rl.conteo) + :cantidad <= :limite
+    RETURNING conteo
+""")
+
+_VENTANAS = text("""
+    SELECT ventana, conteo FROM rate_limit_contadores
+    WHERE clave = :clave AND ventana IN (:ventana - 1, :ventana)
+""")
+
+_INCR = text("""
+    INSERT INTO rate_limit_contadores AS rl (clave, ventana, conteo, expira)
+    VALUES (:clave, 0, :cantidad, :expira)
+    ON CONFLICT (clave, ventana) DO UPDATE SET
+        conteo = CASE WHEN rl.expira <= now() THEN EXCLUDED.conteo ELSE rl.conteo + EXCLUDED.conteo END,
+        expira = CASE WHEN rl.expira <= now() THEN EXCLUDED.expira ELSE rl.expira END
+    RETURNING conteo
+""")
+
+
+def _epoch_a_fecha(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, timezone.utc)
+
+
+class PostgresStorage(Storage, SlidingWindowCounterSupport):
+    STORAGE_SCHEME = ["sniugb+postgresql"]
+
+    def __init__(self, uri: str | None = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        from src.config.database import engine  # diferido: evita el ciclo con la config de la BD
+        self.engine = engine
+
+    @property
+    def base_exceptions(self):
+        return SQLAlchemyError
+
+    # --- sliding-window-counter ---
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        ahora = time.time()
+        ventana = math.floor(ahora / expiry)
+        # Peso de la ventana anterior: fracción de ella que aún cae dentro de los últimos `expiry` s
+        peso = 1 - (ahora - ventana * expiry) / expiry
+        with self.engine.begin() as conn:
+            fila = conn.execute(_ACQUIRE, {
+                "clave": key, "ventana": ventana, "cantidad": amount, "limite": limit,
+                "peso": peso, "expira": _epoch_a_fecha((ventana + 2) * expiry),
+            }).first()
+        return fila is not None
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple[int, float, int, float]:
+        ahora = time.time()
+        ventana = math.floor(ahora / expiry)
+        with self.engine.connect() as conn:
+            conteos = dict(conn.execute(_VENTANAS, {"clave": key, "ventana": ventana}).all())
+        previo, actual = conteos.get(ventana - 1, 0), conteos.get(ventana, 0)
+        restante = (ventana + 1) * expiry - ahora
+        return previo, (restante if previo else 0.0), actual, restante + expiry
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        self.clear(key)
+
+    # --- fixed-window ---
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(_INCR, {
+                "clave": key, "cantidad": amount, "expira": _epoch_a_fecha(time.time() + expiry),
+            }).scalar_one()
+
+    def get(self, key: str) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT conteo FROM rate_limit_contadores WHERE clave = :clave AND ventana = 0 AND expira > now()"
+            ), {"clave": key}).scalar() or 0
+
+    def get_expiry(self, key: str) -> float:
+        with self.engine.connect() as conn:
+            expira = conn.execute(text(
+                "SELECT expira FROM rate_limit_contadores WHERE clave = :clave AND ventana = 0"
+            ), {"clave": key}).scalar()
+        return expira.timestamp() if expira else time.time()
+
+    # --- administración ---
+    def check(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def reset(self) -> int | None:
+        with self.engine.begin() as conn:
+            return conn.execute(text("DELETE FROM rate_limit_contadores")).rowcount
+
+    def clear(self, key: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM rate_limit_contadores WHERE clave = :clave"), {"clave": key})
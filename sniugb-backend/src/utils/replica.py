@@ -0,0 +1,45 @@
+import math
+import os
+from functools import lru_cache
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# Read-your-writes: tras una escritura exitosa de un usuario, sus lecturas van a la
+# primaria durante DB_REPLICA_STICKY_SECONDS (0 = desactivado) para no ver datos
+# desfasados por el lag de la réplica.
+#
+# La marca viaja con el cliente, no en memoria del proceso: la petición siguiente
+# puede llegar a otro worker u otra instancia. Es el DNI firmado con JWT_SECRET y
+# fechado; se devuelve en la cabecera HEADER (la SPA la reenvía) y en la cookie
+# COOKIE (clientes del mismo origen), y al leer se acepta si la firma es válida,
+# no ha vencido y corresponde al usuario del token.
+STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+HEADER = "X-DB-Primary"
+COOKIE = "sniugb_primary"
+
+
+@lru_cache(maxsize=1)
+def _firmador() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(os.getenv("JWT_SECRET", ""), salt="sniugb-read-your-writes")
+
+
+def marca_escritura(dni: str) -> str | None:
+    """Marca firmada que registra que `dni` acaba de escribir en la primaria."""
+    if STICKY_SECONDS <= 0:
+        return None
+    return _firmador().dumps(dni)
+
+
+def vigencia_marca() -> int:
+    """Segundos de vida de la cookie (la firma guarda segundos enteros)."""
+    return math.ceil(STICKY_SECONDS)
+
+
+def escritura_reciente(marca: str | None, dni: str | None) -> bool:
+    """True si `marca` es de `dni` y se emitió hace menos de DB_REPLICA_STICKY_SECONDS."""
+    if not marca or not dni or STICKY_SECONDS <= 0:
+        return False
+    try:
+        return _firmador().loads(marca, max_age=STICKY_SECONDS) == dni
+    except BadSignature:  # incluye SignatureExpired
+        return False
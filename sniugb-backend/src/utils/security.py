@@ -1,16 +1,26 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
+import asyncio
 import os
+import time
 import uuid
 import re
+from concurrent.futures import ThreadPoolExecutor
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.models.database_models import Usuario, UserRole
-from src.config.database import SessionLocal
+from src.config.database import (
+    SessionLocal, AsyncSessionLocal, ReadSessionLocal, AsyncReadSessionLocal
+)
+from src.utils import replica
+from src.utils import principal_cache
+from src.utils.metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED, PASSWORD_HASH_SECONDS
 
 load_dotenv()
 
@@ -29,6 +39,53 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# argon2 consume CPU (decenas de ms por llamada): desde handlers async se ejecuta
+# en un pool propio para no congelar el event loop. PASSWORD_HASH_WORKERS acota la
+# concurrencia y PASSWORD_HASH_MAX_PENDING la cola; al superarla se responde 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or min(4, os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+_hash_pendientes = 0
+PASSWORD_HASH_PENDING.set_function(lambda: _hash_pendientes)
+
+def _medir_hash(op: str, fn, *args):
+    inicio = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        PASSWORD_HASH_SECONDS.labels(op=op).observe(time.perf_counter() - inicio)
+
+async def _en_pool_hash(op: str, fn, *args):
+    global _hash_pendientes
+    if _hash_pendientes >= PASSWORD_HASH_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El servidor está ocupado. Intenta nuevamente en unos segundos.",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pendientes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, _medir_hash, op, fn, *args)
+    finally:
+        _hash_pendientes -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password sin bloquear el event loop."""
+    return await _en_pool_hash("verify", pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash sin bloquear el event loop."""
+    return await _en_pool_hash("hash", pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verifica la contraseña y, si el hash usa un esquema o parámetros obsoletos
+    (p. ej. bcrypt), devuelve también el nuevo hash argon2 para guardarlo.
+    """
+    return await _en_pool_hash("verify", pwd_context.verify_and_update, plain_password, hashed_password)
+
 # --- Creación de Tokens JWT ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -49,28 +106,95 @@ def get_db():
     finally:
         db.close()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Usuario:
+async def get_async_db():
+    """Dependencia para obtener una sesión asíncrona (no bloquea el event loop)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def subject_from_request(request: Request) -> str | None:
+    """DNI del bearer token de la petición, o None si no hay token válido."""
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    payload = decode_token(auth[7:])
+    return payload.get("sub") if payload else None
+
+def _usar_primaria(request: Request) -> bool:
+    marca = request.headers.get(replica.HEADER) or request.cookies.get(replica.COOKIE)
+    return replica.escritura_reciente(marca, subject_from_request(request))
+
+def get_read_db(request: Request):
     """
-    Decodifica el token, valida al usuario y devuelve el objeto de usuario completo.
-    Protege rutas que requieren que un usuario simplemente esté logueado.
+    Sesión de solo lectura para handlers que no escriben: usa la réplica si está
+    configurada, salvo que el usuario haya escrito hace instantes (read-your-writes).
     """
-    credentials_exception = HTTPException(
+    db = SessionLocal() if _usar_primaria(request) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """Versión asíncrona de get_read_db."""
+    factory = AsyncSessionLocal if _usar_primaria(request) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _dni_from_token(token: str) -> str:
+    """Decodifica el access token y devuelve el DNI (claim 'sub')."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         dni: str = payload.get("sub")
         if dni is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-    
+        raise _credentials_exception()
+    return dni
+
+def _verificar_activo(user: Usuario) -> Usuario:
+    """Corta el acceso de las cuentas desactivadas aunque su token siga vigente."""
+    if user.estado != "activo":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="La cuenta está desactivada.")
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Usuario:
+    """
+    Decodifica el token, valida al usuario y devuelve el objeto de usuario completo.
+    Protege rutas que requieren que un usuario simplemente esté logueado.
+    Los datos del usuario salen de principal_cache si están vigentes (sin SELECT).
+    """
+    dni = _dni_from_token(token)
+    snapshot = principal_cache.obtener(dni)
+    if snapshot is not None:
+        return _verificar_activo(principal_cache.reconstruir(snapshot, db))
+    marca = principal_cache.marca()
     user = db.query(Usuario).filter(Usuario.numero_de_dni == dni).first()
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    principal_cache.guardar(user, marca)
+    return _verificar_activo(user)
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Usuario:
+    """Equivalente a get_current_user para los routers que usan AsyncSession."""
+    dni = _dni_from_token(token)
+    snapshot = principal_cache.obtener(dni)
+    if snapshot is not None:
+        return _verificar_activo(principal_cache.reconstruir(snapshot, db))
+    marca = principal_cache.marca()
+    user = (await db.execute(select(Usuario).where(Usuario.numero_de_dni == dni))).scalar_one_or_none()
+    if user is None:
+        raise _credentials_exception()
+    principal_cache.guardar(user, marca)
+    return _verificar_activo(user)
 
 async def get_current_admin_user(current_user: Usuario = Depends(get_current_user)) -> Usuario:
     """
@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from src.utils.metrics import DB_SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Registro de sentencias lentas. El buffer es por proceso: con varios workers
+# cada uno guarda las suyas (cada registro lleva el `pid` que lo produjo) y
+# /admin/perf/slow-queries muestra las del worker que atiende la petición. Todas
+# quedan además en el log (WARNING "Sentencia lenta ..."), que sí reúne a los workers.
+#   DB_SLOW_QUERY_MS:              umbral en milisegundos (0 = desactivado).
+#   DB_SLOW_QUERY_BUFFER:          cuántas sentencias se conservan (las más antiguas se descartan).
+#   DB_SLOW_QUERY_EXPLAIN:         adjunta un EXPLAIN (ANALYZE, BUFFERS) de los SELECT lentos.
+#   DB_SLOW_QUERY_EXPLAIN_INTERVAL: segundos mínimos entre dos EXPLAIN de la misma sentencia.
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+SLOW_QUERY_BUFFER = int(os.getenv("DB_SLOW_QUERY_BUFFER", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("DB_SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("DB_SLOW_QUERY_EXPLAIN_INTERVAL", "60"))
+
+SQL_MAX_CHARS = 4000
+
+# Opción de ejecución que marca las conexiones del propio registro (EXPLAIN):
+# sus sentencias no se cuentan ni se vuelven a registrar.
+SIN_REGISTRO = "sniugb_sin_registro"
+
+_registros: deque = deque(maxlen=SLOW_QUERY_BUFFER)
+_lock = threading.Lock()
+_ultimo_explain: dict[str, float] = {}
+# Un solo worker: los EXPLAIN ANALYZE se encolan en vez de competir con el tráfico.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+
+def forma_parametros(parameters, executemany: bool = False):
+    """
+    Devuelve la "forma" de los parámetros (solo nombres y tipos), nunca los valores:
+    pueden contener DNIs, correos o hashes.
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        primero = forma_parametros(parameters[0]) if parameters else None
+        return {"filas": len(parameters), "forma": primero}
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(v).__name__ for v in parameters]
+    return None
+
+
+def _huella(statement: str) -> str:
+    return hashlib.sha1(statement.encode("utf-8", "replace")).hexdigest()[:12]
+
+
+def _debe_explicar(statement: str, huella: str) -> bool:
+    if not SLOW_QUERY_EXPLAIN or not statement.lstrip().upper().startswith("SELECT"):
+        return False
+    if " FOR UPDATE" in statement.upper():
+        return False  # no tomar locks desde el registro
+    ahora = time.monotonic()
+    with _lock:
+        if ahora - _ultimo_explain.get(huella, float("-inf")) < SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        if len(_ultimo_explain) > 10_000:
+            _ultimo_explain.clear()
+        _ultimo_explain[huella] = ahora
+    return True
+
+
+def _explicar(registro: dict, statement: str, parameters) -> None:
+    """
+    Ejecuta EXPLAIN (ANALYZE, BUFFERS) en una conexión aparte, dentro de una
+    transacción de solo lectura que se descarta al terminar.
+    """
+    from src.config.database import engine  # import diferido: database importa metrics
+
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(postgresql_readonly=True, **{SIN_REGISTRO: True})
+            filas = conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + statement, parameters
+            ).all()
+            conn.rollback()
+        registro["plan"] = "\n".join(f[0] for f in filas)
+    except Exception as e:
+        registro["plan"] = None
+        registro["plan_error"] = str(e)[:500]
+
+
+def es_lenta(duracion: float) -> bool:
+    """True si una sentencia de `duracion` segundos supera DB_SLOW_QUERY_MS."""
+    return SLOW_QUERY_MS > 0 and duracion * 1000 >= SLOW_QUERY_MS
+
+
+def registrar_lenta(
+    conn, statement: str, parameters, executemany: bool, duracion: float,
+    metodo: str | None, ruta: str | None,
+) -> None:
+    """Guarda una sentencia lenta en el buffer y, si corresponde, encola su EXPLAIN."""
+    if conn.get_execution_options().get(SIN_REGISTRO):
+        return
+
+    huella = _huella(statement)
+    registro = {
+        "huella": huella,
+        "pid": os.getpid(),
+        "fecha": datetime.now(timezone.utc),
+        "duracion_ms": round(duracion * 1000, 2),
+        "metodo": metodo,
+        "ruta": ruta,
+        "sql": statement[:SQL_MAX_CHARS],
+        "parametros": forma_parametros(parameters, executemany),
+        "plan": None,
+        "plan_error": None,
+    }
+    with _lock:
+        _registros.append(registro)
+    DB_SLOW_QUERIES.labels(route=ruta or "none").inc()
+    logger.warning("Sentencia lenta (%.1f ms) en %s %s [%s]", duracion * 1000, metodo, ruta, huella)
+
+    if not executemany and _debe_explicar(statement, huella):
+        _executor.submit(_explicar, registro, statement, parameters)
+
+
+def slow_queries(limit: int | None = None) -> list[dict]:
+    """Sentencias lentas registradas, de la más reciente a la más antigua."""
+    with _lock:
+        registros = list(reversed(_registros))
+    return registros[:limit] if limit else registros
+
+
+def limpiar() -> None:
+    with _lock:
+        _registros.clear()
+        _ultimo_explain.clear()
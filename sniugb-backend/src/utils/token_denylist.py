@@ -0,0 +1,36 @@
+import os
+import threading
+import time
+
+# Denylist por proceso (por worker) de refresh tokens revocados: un jti revocado se
+# recuerda hasta su expiración para rechazar reusos sin ir a la BD. La BD sigue
+# siendo la fuente de verdad (otro worker puede no haberlo visto todavía).
+_MAX_ENTRADAS = int(os.getenv("REFRESH_DENYLIST_MAX_ENTRIES", "50000"))
+
+_lock = threading.Lock()
+_revocados: dict[str, float] = {}  # jti -> expiración (epoch)
+
+
+def revocar(jti: str, expira_epoch: float) -> None:
+    """Registra `jti` como revocado hasta `expira_epoch` (claim 'exp' del token)."""
+    ahora = time.time()
+    if expira_epoch <= ahora:
+        return  # ya expirado: la firma JWT lo rechaza sola
+    with _lock:
+        if len(_revocados) >= _MAX_ENTRADAS:
+            for clave in [k for k, t in _revocados.items() if t <= ahora]:
+                del _revocados[clave]
+            while len(_revocados) >= _MAX_ENTRADAS:
+                del _revocados[next(iter(_revocados))]  # el más antiguo insertado
+        _revocados[jti] = expira_epoch
+
+
+def esta_revocado(jti: str) -> bool:
+    with _lock:
+        t = _revocados.get(jti)
+        if t is None:
+            return False
+        if t <= time.time():
+            del _revocados[jti]
+            return False
+        return True
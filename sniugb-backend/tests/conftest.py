@@ -0,0 +1,61 @@
+"""
+Fixtures de los tests de integración: app en proceso (httpx + ASGITransport)
+contra la BD de .env / del job de CI, con los datos del benchmark.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Antes de importar la app: la config se lee al importar los módulos.
+os.environ["DB_QUERY_BUDGET_STRICT"] = "true"  # exceder @query_budget responde 500
+# Sin pool: cada test corre en su propio event loop y el motor async no puede
+# reutilizar conexiones abiertas en un loop anterior.
+os.environ.setdefault("DB_POOL_MODE", "null")
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+import server  # noqa: E402
+from benchmarks import datos  # noqa: E402
+from server import API_PREFIX as API  # noqa: E402
+from src.utils.limiter import limiter  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def datos_bench():
+    """Dos ganaderos, sus predios y 20 animales; se borra todo al terminar."""
+    limiter.enabled = False  # varios logins seguidos chocarían con el límite de /auth
+    d = datos.preparar(20)
+    yield d
+    datos.limpiar()
+
+
+@pytest.fixture
+async def client(datos_bench):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+async def _token(client: httpx.AsyncClient, dni: str) -> dict:
+    r = await client.post(f"{API}/auth/login", data={"username": dni, "password": datos.PASSWORD})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+async def vendedor(client):
+    return await _token(client, datos.VENDEDOR_DNI)
+
+
+@pytest.fixture
+async def comprador(client):
+    return await _token(client, datos.COMPRADOR_DNI)
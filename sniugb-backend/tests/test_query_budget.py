@@ -0,0 +1,48 @@
+"""
+Presupuesto de consultas (@query_budget) de las rutas calientes en modo estricto:
+una ruta que lo excede responde 500 QUERY_BUDGET_EXCEEDED en vez de 200/201, así
+que un N+1 nuevo rompe estos tests. Corren con principal_cache frío (ASGITransport
+no ejecuta el lifespan), el caso más caro de cada ruta.
+"""
+import pytest
+
+from benchmarks import datos
+from server import API_PREFIX as API
+from src.config.database import SessionLocal
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_dashboard_kpis(client, vendedor):
+    r = await client.get(f"{API}/dashboard/{datos.PREDIO_VENDEDOR}/kpis", params={"periodo": "mes"},
+                         headers=vendedor)
+    assert r.status_code == 200, r.text
+    assert "X-DB-Queries" in r.headers
+
+
+async def test_predio_animales(client, vendedor):
+    r = await client.get(f"{API}/predios/{datos.PREDIO_VENDEDOR}/animales", headers=vendedor)
+    assert r.status_code == 200, r.text
+    assert "X-DB-Queries" in r.headers
+
+
+async def test_transferencia_solicitar(client, comprador, datos_bench):
+    try:
+        r = await client.post(f"{API}/transferencias/solicitar", headers=comprador, json={
+            "animal_cuis": datos_bench.cuis[:5],
+            "predio_destino_codigo": datos.PREDIO_COMPRADOR,
+        })
+        assert r.status_code == 201, r.text
+        assert "X-DB-Queries" in r.headers
+    finally:
+        db = SessionLocal()
+        try:
+            datos.limpiar_transferencias(db)
+        finally:
+            db.close()
+
+
+async def test_animal_timeline(client, vendedor, datos_bench):
+    r = await client.get(f"{API}/animales/{datos_bench.cuis[0]}/timeline", headers=vendedor)
+    assert r.status_code == 200, r.text
+    assert "X-DB-Queries" in r.headers
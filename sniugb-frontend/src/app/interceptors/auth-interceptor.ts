@@ -1,8 +1,14 @@
-import { HttpInterceptorFn, HttpErrorResponse } from '@angular/common/http';
+import { HttpInterceptorFn, HttpErrorResponse, HttpResponse } from '@angular/common/http';
 import { inject } from '@angular/core';
 import { Router } from '@angular/router';
 import { AuthStore } from '../components/stores/auth.store';
-import { catchError, throwError } from 'rxjs';
+import { catchError, tap, throwError } from 'rxjs';
+
+// Read-your-writes con réplica: tras una escritura el backend devuelve una marca
+// firmada y de corta vida en esta cabecera; reenviarla hace que las lecturas
+// siguientes vayan a la primaria en cualquier worker. Si venció, el backend la ignora.
+const PRIMARY_HEADER = 'X-DB-Primary';
+let primaryMark: string | null = null;
 
 export const authInterceptor: HttpInterceptorFn = (req, next) => {
   const auth = inject(AuthStore);
@@ -12,10 +18,20 @@ export const authInterceptor: HttpInterceptorFn = (req, next) => {
   if (token) {
     req = req.clone({ setHeaders: { Authorization: `Bearer ${token}` } });
   }
+  if (primaryMark) {
+    req = req.clone({ setHeaders: { [PRIMARY_HEADER]: primaryMark } });
+  }
   return next(req).pipe(
+    tap((event) => {
+      const mark = event instanceof HttpResponse ? event.headers.get(PRIMARY_HEADER) : null;
+      if (mark) {
+        primaryMark = mark;
+      }
+    }),
     catchError((err: HttpErrorResponse) => {
       if (err.status === 401) {
         auth.clear();
+        primaryMark = null;
         router.navigate(['/']);
       }
       return throwError(() => err);